@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, Blueprint, Response, current_app, render_template, request, jsonify, redirect, url_for, flash, session
 from werkzeug.utils import secure_filename
 import time
 from flask_sqlalchemy import SQLAlchemy
@@ -9,40 +9,67 @@ from pytz import timezone as pytz_timezone
 import pandas as pd
 import os
 import pickle
-import yfinance as yf
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from modules.data_collector import DataCollector
-from modules.anomaly_detector import SimpleAnomalyDetector
 from modules.technical_analyzer import TechnicalAnalyzer
-from modules.alert_system import AlertSystem
+from modules.alert_system import AlertEngine
+from modules.alert_stream import AlertStream, BACKLOG_LIMIT
+from modules.alert_triggers import TRIGGER_METRICS, TRIGGER_DIRECTIONS, MAX_TRIGGERS_PER_USER, describe_trigger
+from modules.assets import StaticAssets
+from modules.profile_photos import ProfilePhotoStore
+from modules.downsampling import downsample_ohlcv
+from modules.sources import governor_status
+from modules.trading_calendar import get_calendar
+from modules.drift_monitor import DriftMonitor
+from modules.intraday_detector import IntradayAnomalyDetector
+from modules.file_lock import acquire_lock
+from config import ENERGY_STOCKS, AUTO_TRAIN_STOCKS, MODEL_DIR, MODEL_FILENAME, ONLINE_MODEL_FILENAME
 import json
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'anopus-secret-key-2024'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///anopus.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'static/uploads/profiles'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
-# Create upload folder if not exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-db = SQLAlchemy(app)
+db = SQLAlchemy()
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Silakan login untuk mengakses halaman ini.'
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models', 'anomaly_detector.pkl')
+# CSS/JS ber-hash di /assets (middleware WSGI), dipakai template lewat asset_url()
+assets = StaticAssets()
+
+# Thumbnail foto profil (WebP/JPEG ber-hash) dibuat di background, disajikan dari /avatars
+photo_store = ProfilePhotoStore()
+
+# Semua route didaftarkan ke blueprint, app dibuat oleh create_app()
+main = Blueprint('main', __name__)
+
+MODEL_PATH = os.path.join(MODEL_DIR, MODEL_FILENAME)
 anomaly_detector = None
 model_trained_once = False
 
 data_collector = None
 
+# Sketch skor & feature live per ticker untuk /api/model/drift
+drift_monitor = DriftMonitor()
+
+# Detector anomali bar intraday 5m (tidak perlu training)
+intraday_detector = IntradayAnomalyDetector(interval='5m')
+
+# Detector online (Half-Space Trees) yang belajar dari setiap hari broker baru
+ONLINE_MODEL_PATH = os.path.join(MODEL_DIR, ONLINE_MODEL_FILENAME)
+online_detector = None
+# State detector online disimpan berkala oleh thread background, bukan di jalur request.
+# Hanya proses leader yang meng-update dan menyimpan; proses lain me-reload file ini
+ONLINE_SAVE_SECONDS = 60
+_online_saver = None
+_online_mtime = None
+
 def init_anomaly_detector():
     """Initialize anomaly detector dengan model yang sudah ada"""
     global anomaly_detector
+    # scikit-learn hanya di-import saat model benar-benar dibutuhkan
+    from modules.anomaly_detector import SimpleAnomalyDetector
     try:
         if os.path.exists(MODEL_PATH):
             with open(MODEL_PATH, 'rb') as f:
@@ -55,27 +82,86 @@ def init_anomaly_detector():
         print(f"❌ Error initializing anomaly detector: {e}")
         anomaly_detector = SimpleAnomalyDetector()
 
+def init_online_detector():
+    """Load state detector online, atau mulai dari nol (inisialisasi dari window pertama)"""
+    global online_detector
+    from modules.anomaly_detector import SimpleAnomalyDetector
+    from modules.online_detector import OnlineAnomalyDetector
+    start_online_saver()
+    try:
+        if reload_online_detector():
+            print("✅ State detector online berhasil di-load")
+            return
+    except Exception as e:
+        print(f"❌ Error loading detector online: {e}")
+    online_detector = OnlineAnomalyDetector(SimpleAnomalyDetector().feature_columns)
+
+def reload_online_detector():
+    """Load ulang state detector online jika file di disk berubah sejak load terakhir"""
+    global online_detector, _online_mtime
+    from modules.online_detector import OnlineAnomalyDetector
+    if not os.path.exists(ONLINE_MODEL_PATH):
+        return False
+    mtime = os.path.getmtime(ONLINE_MODEL_PATH)
+    if mtime == _online_mtime:
+        return False
+    online_detector = OnlineAnomalyDetector.load(ONLINE_MODEL_PATH)
+    _online_mtime = mtime
+    return True
+
+def run_online_saver():
+    """Leader menyimpan state detector online jika ada update; proses lain me-reload versi leader"""
+    global _online_mtime
+    while True:
+        time.sleep(ONLINE_SAVE_SECONDS)
+        detector = online_detector
+        try:
+            if leader_state['leader']:
+                if detector is not None and detector.dirty:
+                    detector.save(ONLINE_MODEL_PATH)
+                    _online_mtime = os.path.getmtime(ONLINE_MODEL_PATH)
+            elif reload_online_detector():
+                print("🔄 State detector online di-reload dari leader")
+        except Exception as e:
+            print(f"⚠️ Error sinkronisasi detector online: {e}")
+
+def start_online_saver():
+    global _online_saver
+    if _online_saver is None:
+        _online_saver = threading.Thread(target=run_online_saver, name='anopus-online-saver', daemon=True)
+        _online_saver.start()
+
+def update_online_detector(stock_code, broker_data):
+    """Skor + update detector online dengan hari broker baru; hanya leader yang belajar (disimpan oleh run_online_saver)"""
+    if online_detector is None or anomaly_detector is None or broker_data is None or broker_data.empty:
+        return []
+    try:
+        return online_detector.observe(stock_code, broker_data, anomaly_detector.feature_matrix(broker_data),
+                                       learn=leader_state['leader'])
+    except Exception as e:
+        print(f"⚠️ Error update detector online: {e}")
+        return []
+
 def auto_train_model():
     """Auto-train model if not trained (run only once)"""
-    global anomaly_detector, model_trained_once
+    global anomaly_detector, online_detector, model_trained_once
     
     if model_trained_once or (anomaly_detector and anomaly_detector.is_trained):
         return
     
     try:
         print("⏳ Auto-training anomaly detector model...")
-        energy_stocks = ['ADRO.JK', 'PTBA.JK', 'BYAN.JK', 'ITMG.JK', 'GEMS.JK']
-        training_data = []
-        
-        for stock in energy_stocks:
-            broker_data = data_collector.get_broker_summary(stock, '6mo')
-            if not broker_data.empty:
-                training_data.append(broker_data)
+        from modules.model_training import collect_training_data
+        training_data = collect_training_data(AUTO_TRAIN_STOCKS, '6mo', workers=1)
         
         if training_data and anomaly_detector:
             anomaly_detector.train(training_data)
             print("✅ Anomaly detector model trained successfully")
             model_trained_once = True
+            
+            if leader_state['leader'] and online_detector is not None and not online_detector.ready:
+                from modules.model_training import bootstrap_online_detector
+                online_detector = bootstrap_online_detector(anomaly_detector, training_data)
     except Exception as e:
         print(f"⚠️ Error auto-training model: {e}")
 
@@ -89,18 +175,28 @@ def init_data_collector():
         print(f"❌ Error initializing DataCollector: {e}")
         data_collector = None
 
-@app.before_request
+# Lock agar warmup dan request pertama tidak menginisialisasi komponen bersamaan
+_init_lock = threading.Lock()
+
+def init_components():
+    """Inisialisasi DataCollector, model batch dan detector online (idempotent)"""
+    with _init_lock:
+        # Initialize data collector jika belum
+        if data_collector is None:
+            init_data_collector()
+        
+        # Initialize anomaly detector jika belum
+        if anomaly_detector is None:
+            init_anomaly_detector()
+        
+        if online_detector is None:
+            init_online_detector()
+
+@main.before_app_request
 def before_request():
-    """Initialize modules sebelum request diproses"""
-    global data_collector, anomaly_detector, model_trained_once
-    
-    # Initialize data collector jika belum
-    if data_collector is None:
-        init_data_collector()
-    
-    # Initialize anomaly detector jika belum
-    if anomaly_detector is None:
-        init_anomaly_detector()
+    """Initialize modules sebelum request diproses (jika warmup belum/tidak dijalankan)"""
+    if data_collector is None or anomaly_detector is None or online_detector is None:
+        init_components()
 
 # Model User
 class User(UserMixin, db.Model):
@@ -132,61 +228,103 @@ class User(UserMixin, db.Model):
 class Watchlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    stock_code = db.Column(db.String(20), nullable=False)
+    # Index stock_code untuk fan-out alert ticker -> user
+    stock_code = db.Column(db.String(20), nullable=False, index=True)
     stock_name = db.Column(db.String(100), nullable=False)
     added_date = db.Column(db.DateTime, default=lambda: datetime.now(pytz_timezone('Asia/Jakarta')))
     
     __table_args__ = (db.UniqueConstraint('user_id', 'stock_code', name='unique_user_stock'),)
 
+# Event alert per ticker (bukan per user); user membaca lewat join dengan watchlist.
+# Event dari trigger user punya user_id pemiliknya.
+class AlertEvent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    stock_code = db.Column(db.String(20), nullable=False)
+    rule = db.Column(db.String(40), nullable=False)
+    severity = db.Column(db.String(10), nullable=False)
+    message = db.Column(db.String(500), nullable=False)
+    action = db.Column(db.String(20))
+    fingerprint = db.Column(db.String(40), nullable=False)
+    # Sama dengan fingerprint untuk event yang hanya boleh ada sekali (anomali ber-key, trigger user); NULL untuk rule kondisi
+    dedup_key = db.Column(db.String(40), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_alert_event_stock_created', 'stock_code', 'created_at'),
+        db.Index('ux_alert_event_dedup_key', 'dedup_key', unique=True),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'stock_code': self.stock_code,
+            'stock_name': ENERGY_STOCKS.get(self.stock_code, self.stock_code),
+            'type': self.rule,
+            'severity': self.severity,
+            'message': self.message,
+            'action': self.action,
+            'timestamp': self.created_at.isoformat()
+        }
+
+# Trigger harga/indikator buatan user, mis. "ADRO naik melewati 2,800" atau "PGAS RSI turun melewati 30"
+class AlertTrigger(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    stock_code = db.Column(db.String(20), nullable=False)
+    metric = db.Column(db.String(10), nullable=False)
+    direction = db.Column(db.String(5), nullable=False)
+    threshold = db.Column(db.Float, nullable=False)
+    active = db.Column(db.Boolean, nullable=False, default=True, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    triggered_at = db.Column(db.DateTime)
+    
+    @property
+    def description(self):
+        return describe_trigger(self.stock_code, self.metric, self.direction, self.threshold)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'stock_code': self.stock_code,
+            'metric': self.metric,
+            'direction': self.direction,
+            'threshold': self.threshold,
+            'description': self.description,
+            'active': self.active,
+            'created_at': self.created_at.isoformat(),
+            'triggered_at': self.triggered_at.isoformat() if self.triggered_at else None
+        }
+
+# Evaluasi rule alert sekali per ticker per update data, event disimpan dengan dedup/cool-down
+alert_engine = AlertEngine(db, AlertEvent, Watchlist, AlertTrigger)
+# Push channel SSE: event baru langsung dikirim ke user yang memantau ticker-nya
+alert_stream = AlertStream(alert_engine)
+
 @login_manager.user_loader
 def load_user(user_id):
     return db.session.get(User, int(user_id))
 
-# Daftar saham energi dengan nama lengkap
-ENERGY_STOCKS = {
-    'ADRO.JK': 'Adaro Energy Indonesia Tbk',
-    'PTBA.JK': 'Bukit Asam Tbk',
-    'BYAN.JK': 'Bayan Resources Tbk',
-    'ITMG.JK': 'Indo Tambangraya Megah Tbk',
-    'GEMS.JK': 'Golden Energy Mines Tbk',
-    'MCOL.JK': 'Prima Andalan Mandiri Tbk',
-    'SMMT.JK': 'Golden Eagle Energy Tbk',
-    'RMKE.JK': 'RMK Energy Tbk',
-    'KKGI.JK': 'Resource Alam Indonesia Tbk',
-    'TOBA.JK': 'TBS Energi Utama Tbk',
-    'ARII.JK': 'Atlas Resources Tbk',
-    'DEWA.JK': 'Darma Henwa Tbk',
-    'MYOH.JK': 'Samindo Resources Tbk',
-    'TEBE.JK': 'Dana Brata Luhur Tbk',
-    'DOID.JK': 'Delta Dunia Makmur Tbk',
-    'RATU.JK': 'Mustika Ratu Tbk',
-    'MEDC.JK': 'Medco Energi Internasional Tbk',
-    'PGAS.JK': 'Perusahaan Gas Negara Tbk',
-    'ENRG.JK': 'Energi Mega Persada Tbk',
-    'INDY.JK': 'Indika Energy Tbk',
-    'RAJA.JK': 'Rukun Raharja Tbk',
-    'ESSA.JK': 'Surya Esa Perkasa Tbk',
-    'BIPI.JK': 'Astrindo Nusantara Infrastruktur Tbk',
-    'PGEO.JK': 'Pertamina Geothermal Energy Tbk',
-    'BREN.JK': 'Barito Renewables Energy Tbk',
-    'OASA.JK': 'Maharaksa Biru Energi Tbk',
-    'SEMA.JK': 'Semacom Integrated Tbk',
-    'JSKY.JK': 'Sky Energy Indonesia Tbk',
-    'BRPT.JK': 'Barito Pacific Tbk',
-    'CUAN.JK': 'Petrindo Jaya Kreasi Tbk',
-    'CDIA.JK': 'Chandra Daya Investasi Tbk',
-    'AKRA.JK': 'AKR Corporindo Tbk',
-    'PTRO.JK': 'Petrosea Tbk',
-    'MBAP.JK': 'Mitrabara Adiperdana Tbk',
-    'BUMI.JK': 'Bumi Resources Tbk'
-}
-
-@app.route('/')
+# Batas atas max_points untuk API chart (chart hanya ~1000 px lebar)
+MAX_CHART_POINTS = 5000
+DOWNSAMPLE_METHODS = {'ohlc', 'lttb'}
+
+def get_downsample_args():
+    """Baca parameter max_points dan downsample dari query string"""
+    max_points = request.args.get('max_points', type=int)
+    if max_points is not None:
+        max_points = max(3, min(max_points, MAX_CHART_POINTS))
+    method = request.args.get('downsample', 'ohlc')
+    if method not in DOWNSAMPLE_METHODS:
+        method = 'ohlc'
+    return max_points, method
+
+@main.route('/')
 def landing():
     """Landing page untuk pengunjung belum login"""
     return render_template('landing.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@main.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
         username = request.form['username']
@@ -214,11 +352,11 @@ def register():
         db.session.commit()
         
         flash('Registrasi berhasil! Silakan login.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('register.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@main.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
@@ -230,18 +368,18 @@ def login():
             login_user(user)
             next_page = request.args.get('next')
             flash(f'Login berhasil! Selamat datang {username}.', 'success')
-            return redirect(next_page or url_for('dashboard'))
+            return redirect(next_page or url_for('main.dashboard'))
         else:
             flash('Username atau password salah!', 'error')
     
     return render_template('login.html')
 
-@app.route('/logout')
+@main.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('Anda telah logout.', 'info')
-    return redirect(url_for('landing'))
+    return redirect(url_for('main.landing'))
 
 def get_stock_data_real_time(stock_code, period='1mo'):
     """Mendapatkan data saham real-time dengan update candlestick terakhir"""
@@ -268,6 +406,10 @@ def get_stock_data_real_time(stock_code, period='1mo'):
                 'error': f'Tidak ada data untuk {stock_code}'
             }
         
+        # Umur data dari cache stale-while-revalidate
+        data_age = stock_data.attrs.get('cache_age_s', 0)
+        data_stale = stock_data.attrs.get('stale', False)
+        
         if not stock_data.empty and current_price > 0:
             today = datetime.now().date()
             last_date = stock_data['Date'].iloc[-1].date() if hasattr(stock_data['Date'].iloc[-1], 'date') else stock_data['Date'].iloc[-1]
@@ -319,7 +461,9 @@ def get_stock_data_real_time(stock_code, period='1mo'):
             'volume': current_volume,
             'stock_data': chart_data,
             'success': True,
-            'stock_name': stock_name
+            'stock_name': stock_name,
+            'data_age_seconds': max(data_age, realtime_info.get('age_seconds', 0)),
+            'stale': data_stale or realtime_info.get('stale', False)
         }
     
     except Exception as e:
@@ -512,156 +656,242 @@ def get_technical_signals_real_time(stock_data):
         }
 
 def is_market_open():
-    """Cek apakah pasar sedang buka"""
-    now = datetime.now(pytz_timezone('Asia/Jakarta'))
-    day = now.weekday()
-    hour = now.hour
-    minute = now.minute
-    
-    is_weekday = 0 <= day <= 4
-    is_market_hours = (9 <= hour < 16) or (hour == 9 and minute >= 0)
-    
-    return is_weekday and is_market_hours
+    """Cek apakah pasar sedang buka (sesi perdagangan kontinu menurut kalender IDX)"""
+    return get_calendar().is_market_open()
 
-@app.route('/dashboard')
+@main.route('/api/market/status')
 @login_required
-def dashboard():
-    """Dashboard halaman utama"""
-    global data_collector, anomaly_detector
-    
-    page = request.args.get('page', 1, type=int)
-    per_page = 10  # Number of anomalies per page
-    
-    selected_stock = request.args.get('stock', 'ADRO.JK')  # Ambil dari query parameter atau default ADRO.JK
-    selected_period = request.args.get('period', '1mo')  # Ambil dari query parameter atau default 1mo
-    
-    print(f"📊 Loading dashboard untuk {selected_stock}, periode {selected_period}")
-    
-    template_data = {
-        'stock_code': selected_stock,
-        'current_price': 0,
-        'price_change': 0,
-        'price_change_pct': 0,
-        'volume': 0,
-        'stock_data': [],
-        'success': False,
-        'stock_name': ''
-    }
-    
-    if data_collector:
-        template_data = get_stock_data_real_time(selected_stock, selected_period)
-    
-    if not template_data:
-        template_data = {
-            'success': False,
-            'stock_code': selected_stock,
-            'stock_data': [],
-            'stock_name': 'Unknown'
-        }
-    
-    if 'stock_data' not in template_data:
-        template_data['stock_data'] = []
-    if 'success' not in template_data:
-        template_data['success'] = False
-    
-    if data_collector is None:
-        print(f"❌ DataCollector tidak tersedia")
-        return render_template('dashboard.html', error="Data collector tidak tersedia")
+def get_market_status():
+    """API endpoint fase pasar IDX dan kapan harga bisa berubah lagi"""
+    return jsonify({
+        'status': 'success',
+        'market': get_calendar().status()
+    })
+
+# Anomali per halaman di panel dashboard
+DASHBOARD_PER_PAGE = 10
+# Panel alert dashboard: event tersimpan untuk saham yang dibuka dalam jendela ini
+DASHBOARD_ALERT_HOURS = 24
+DASHBOARD_ALERT_LIMIT = 10
+# Rule alert selalu dievaluasi pada periode ini, apa pun periode yang dipilih user
+ALERT_PERIOD = '1mo'
+
+# Panel yang di-render ulang dari /api/dashboard (templates/partials/dashboard/<panel>.html)
+DASHBOARD_PANELS = ('quote', 'signals', 'recommendation', 'alerts', 'anomalies')
+
+# Fetch quote/histori, broker summary dan candle chart berjalan paralel. Pool diukur dari jumlah thread
+# server (samakan ANOPUS_SERVER_THREADS dengan --threads gunicorn) agar request tidak saling antre
+DASHBOARD_FETCHES = 3
+SERVER_THREADS = int(os.environ.get('ANOPUS_SERVER_THREADS', 32))
+_dashboard_pool = ThreadPoolExecutor(max_workers=SERVER_THREADS * DASHBOARD_FETCHES, thread_name_prefix='dashboard')
+
+def chart_points(data):
+    """Konversi DataFrame OHLCV ke format candle chart {x, o, h, l, c, v}"""
+    chart_data = []
+    for _, row in data.iterrows():
+        # Handle both Datetime and Date columns
+        timestamp = row.get('Datetime', row.get('Date'))
+        
+        # Convert to ISO string
+        if hasattr(timestamp, 'isoformat'):
+            iso_str = timestamp.isoformat()
+        else:
+            iso_str = str(timestamp)
+        
+        chart_data.append({
+            'x': iso_str,
+            'o': float(row['Open']),
+            'h': float(row['High']),
+            'l': float(row['Low']),
+            'c': float(row['Close']),
+            'v': int(row.get('Volume', 0))
+        })
+    return chart_data
+
+def get_chart_candles(stock_code, max_points=None, method='ohlc'):
+    """Candle chart (intraday jika ada) untuk panel grafik dashboard"""
+    data = data_collector.get_tradingview_like_data(stock_code)
+    if data is None or data.empty:
+        return []
+    if max_points:
+        data = downsample_ohlcv(data, max_points, method)
+    return chart_points(data)
+
+def alert_data_version(stock_data, broker_data):
+    """Versi data untuk engine alert: berubah hanya jika quote, bar terakhir atau broker summary berubah"""
+    bars = stock_data.get('stock_data') or []
+    last_bar = bars[-1] if bars else {}
+    last_broker = None
+    if broker_data is not None and not broker_data.empty and 'date' in broker_data.columns:
+        last_broker = str(broker_data['date'].iloc[-1])
+    return (stock_data.get('current_price'), stock_data.get('volume'), last_bar.get('time'), last_broker)
+
+def evaluate_ticker_alerts(stock_code):
+    """Hitung sinyal dan anomali satu ticker (periode ALERT_PERIOD) lalu serahkan ke engine alert"""
+    stock_data = get_stock_data_real_time(stock_code, ALERT_PERIOD)
+    technical_signals = get_technical_signals_real_time(stock_data)
+    broker_data = data_collector.get_broker_summary(stock_code, ALERT_PERIOD)
+    anomalies = []
+    if anomaly_detector is not None and anomaly_detector.is_trained and not broker_data.empty:
+        anomalies = anomaly_detector.detect_broker_anomalies(broker_data, stock_code, drift_monitor)
+        update_online_detector(stock_code, broker_data)
+    return alert_engine.process(stock_code, technical_signals, anomalies, alert_data_version(stock_data, broker_data))
+
+def build_dashboard_payload(stock_code, period='1mo', page=1, max_points=None, method='ohlc', user_id=None):
+    """Susun semua panel dashboard (quote, candle, sinyal, anomali, alert, rekomendasi)"""
+    stock_future = _dashboard_pool.submit(get_stock_data_real_time, stock_code, period)
+    broker_future = _dashboard_pool.submit(data_collector.get_broker_summary, stock_code, period)
+    candles_future = _dashboard_pool.submit(get_chart_candles, stock_code, max_points, method)
     
-    stock_code = template_data.get('stock_code', selected_stock)
-    stock_data = template_data.get('stock_data', [])
-    current_price = template_data.get('current_price', 0)
-    volume = template_data.get('volume', 0)
+    stock_data = stock_future.result()
     
     try:
-        if data_collector is None:
-            broker_data = pd.DataFrame()
-        else:
-            broker_data = data_collector.get_broker_summary(stock_code, selected_period)
+        broker_data = broker_future.result()
     except Exception as e:
         print(f"❌ Error mengambil broker data: {e}")
         broker_data = pd.DataFrame()
     
     anomalies = []
+    all_anomalies = []
     total_anomalies = 0
     total_pages = 1
     if anomaly_detector is not None and anomaly_detector.is_trained:
         try:
-            all_anomalies = anomaly_detector.detect_broker_anomalies(broker_data)
+            all_anomalies = anomaly_detector.detect_broker_anomalies(broker_data, stock_code, drift_monitor)
+            update_online_detector(stock_code, broker_data)
             
             total_anomalies = len(all_anomalies)
-            total_pages = (total_anomalies + per_page - 1) // per_page  # Ceiling division
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
+            total_pages = max(1, (total_anomalies + DASHBOARD_PER_PAGE - 1) // DASHBOARD_PER_PAGE)  # Ceiling division
+            page = min(max(page, 1), total_pages)
+            start_idx = (page - 1) * DASHBOARD_PER_PAGE
+            anomalies = all_anomalies[start_idx:start_idx + DASHBOARD_PER_PAGE]
             
-            anomalies = all_anomalies[start_idx:end_idx]
-            
-            print(f"[v0] Total anomalies detected: {len(all_anomalies)}")
-            print(f"[v0] Broker data shape: {broker_data.shape if not broker_data.empty else 'Empty'}")
-            
-            print(f"[v0] Page {page}/{total_pages}, showing {len(anomalies)} anomalies (from index {start_idx} to {end_idx})")
+            print(f"[v0] Page {page}/{total_pages}, showing {len(anomalies)} of {total_anomalies} anomalies")
         except Exception as e:
             print(f"⚠️ Error mendeteksi anomalies: {e}")
             import traceback
             traceback.print_exc()
-    else:
-        total_anomalies = 0
-        total_pages = 1
+    page = min(max(page, 1), total_pages)
+    
+    technical_signals = get_technical_signals_real_time(stock_data)
+    
+    # State rule (transisi, data_version) per ticker hanya konsisten jika selalu dari periode yang sama;
+    # periode lain dievaluasi worker background
+    if period == ALERT_PERIOD:
+        try:
+            alert_engine.process(stock_code, technical_signals, all_anomalies, alert_data_version(stock_data, broker_data))
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Error menyimpan alert {stock_code}: {e}")
     
-    technical_signals = get_technical_signals_real_time(template_data)
+    # Panel alert memakai event tersimpan (dedup/cool-down sama dengan notifikasi), bukan evaluasi ulang rule
+    alerts = []
+    if user_id is not None:
+        since = datetime.now() - timedelta(hours=DASHBOARD_ALERT_HOURS)
+        alerts = [dict(event.to_dict(), timestamp=event.created_at.strftime('%d %b %Y %H:%M'))
+                  for event in alert_engine.events_for_user(user_id, since=since, limit=DASHBOARD_ALERT_LIMIT,
+                                                            stock_code=stock_code)]
     
-    alert_system = AlertSystem()
-    alerts = alert_system.generate_alerts(technical_signals, anomalies, 
-                                         pd.DataFrame(template_data.get('stock_data', [])) if template_data.get('stock_data') else pd.DataFrame())
+    try:
+        candles = candles_future.result()
+    except Exception as e:
+        print(f"❌ Error mengambil candle chart: {e}")
+        candles = []
     
-    template_data['technical_signals'] = technical_signals
-    template_data['anomalies'] = anomalies
-    template_data['pagination'] = {
-        'page': page,
-        'per_page': per_page,
-        'total_pages': total_pages,
-        'total_anomalies': total_anomalies,
-        'has_prev': page > 1,
-        'has_next': page < total_pages
+    return {
+        'stock_code': stock_code,
+        'stock_name': stock_data.get('stock_name') or ENERGY_STOCKS.get(stock_code, stock_code),
+        'period': period,
+        'quote': {
+            'current_price': stock_data.get('current_price', 0),
+            'price_change': stock_data.get('price_change', 0),
+            'volume': stock_data.get('volume', 0),
+            'data_age_seconds': stock_data.get('data_age_seconds', 0),
+            'stale': stock_data.get('stale', False),
+            'success': stock_data.get('success', False)
+        },
+        'candles': candles,
+        'technical_signals': technical_signals,
+        'anomalies': anomalies,
+        'pagination': {
+            'page': page,
+            'per_page': DASHBOARD_PER_PAGE,
+            'total_pages': total_pages,
+            'total_anomalies': total_anomalies,
+            'has_prev': page > 1,
+            'has_next': page < total_pages
+        },
+        'alerts': alerts,
+        'trading_alert': generate_trading_recommendation(technical_signals),
+        'market': get_calendar().status()
     }
-    template_data['alerts'] = alerts
-    template_data['energy_stocks'] = ENERGY_STOCKS
-    template_data['stock_code'] = selected_stock
-    template_data['period'] = selected_period
-    template_data['current_time'] = datetime.now(pytz_timezone('Asia/Jakarta')).strftime('%Y-%m-%d %H:%M:%S')
-    template_data['market_open'] = is_market_open()
-    template_data['total_anomalies'] = total_anomalies
-    template_data['total_pages'] = total_pages
-    template_data['current_page'] = page
+
+@main.route('/dashboard')
+@login_required
+def dashboard():
+    """Dashboard halaman utama: shell HTML tanpa fetch upstream, panel diisi lewat /api/dashboard"""
+    page = request.args.get('page', 1, type=int)
+    selected_stock = request.args.get('stock', DEFAULT_STOCK)  # Ambil dari query parameter atau default ADRO.JK
+    selected_period = request.args.get('period', '1mo')  # Ambil dari query parameter atau default 1mo
     
-    stock_data = template_data.get('stock_data')
-    if stock_data is not None and len(stock_data) > 0:
-        template_data['realtime_info'] = {
-            'price': template_data['current_price'],
-            'volume': template_data['volume'],
-            'timestamp': datetime.now(pytz_timezone('Asia/Jakarta')).strftime('%Y-%m-%d %H:%M:%S')
-        }
-    else:
-        template_data['realtime_info'] = {
-            'price': 0,
-            'volume': 0,
-            'timestamp': datetime.now(pytz_timezone('Asia/Jakarta')).strftime('%Y-%m-%d %H:%M:%S')
-        }
+    return render_template('dashboard.html',
+                           stock_code=selected_stock,
+                           stock_name=ENERGY_STOCKS.get(selected_stock, selected_stock),
+                           period=selected_period,
+                           page=max(page, 1),
+                           energy_stocks=ENERGY_STOCKS,
+                           current_time=datetime.now(pytz_timezone('Asia/Jakarta')).strftime('%Y-%m-%d %H:%M:%S'),
+                           market_status=get_calendar().status())
+
+@main.route('/api/dashboard/<stock_code>')
+@login_required
+def get_dashboard_data(stock_code):
+    """API endpoint semua panel dashboard dalam satu response (data + HTML panel)"""
+    if data_collector is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Data collector tidak tersedia'
+        }), 500
     
-    trading_alert = generate_trading_recommendation(technical_signals)
+    period = request.args.get('period', '1mo')
+    page = request.args.get('page', 1, type=int)
+    max_points, method = get_downsample_args()
     
-    return render_template('dashboard.html', 
-                         **template_data,
-                         trading_alert=trading_alert)
+    print(f"📊 Loading dashboard untuk {stock_code}, periode {period}")
+    start = time.perf_counter()
+    payload = build_dashboard_payload(stock_code, period, page, max_points, method, current_user.id)
+    html = {panel: render_template(f'partials/dashboard/{panel}.html', **payload)
+            for panel in DASHBOARD_PANELS}
+    print(f"✅ Dashboard {stock_code} disusun dalam {time.perf_counter() - start:.2f}s")
+    
+    return jsonify({
+        'status': 'success',
+        'stock_code': payload['stock_code'],
+        'stock_name': payload['stock_name'],
+        'period': period,
+        'quote': payload['quote'],
+        'candles': payload['candles'],
+        'signals': payload['technical_signals'],
+        'anomalies': payload['anomalies'],
+        'pagination': payload['pagination'],
+        'alerts': payload['alerts'],
+        'recommendation': payload['trading_alert'],
+        'market': payload['market'],
+        'html': html
+    })
 
-@app.route('/watchlist')
+@main.route('/watchlist')
 @login_required
 def watchlist():
     """Halaman watchlist user"""
     user_watchlist = Watchlist.query.filter_by(user_id=current_user.id).all()
-    return render_template('watchlist.html', watchlist=user_watchlist, energy_stocks=ENERGY_STOCKS)
+    triggers = {}
+    for trigger in AlertTrigger.query.filter_by(user_id=current_user.id, active=True).order_by(AlertTrigger.threshold):
+        triggers.setdefault(trigger.stock_code, []).append(trigger)
+    return render_template('watchlist.html', watchlist=user_watchlist, energy_stocks=ENERGY_STOCKS,
+                           triggers=triggers, trigger_metrics=TRIGGER_METRICS, trigger_directions=TRIGGER_DIRECTIONS)
 
-@app.route('/add_to_watchlist', methods=['POST'])
+@main.route('/add_to_watchlist', methods=['POST'])
 @login_required
 def add_to_watchlist():
     stock_code = request.form['stock_code']
@@ -682,26 +912,35 @@ def add_to_watchlist():
         )
         db.session.add(watchlist_item)
         db.session.commit()
+        alert_engine.watchers.add(current_user.id, stock_code)
         flash(f'{stock_name} berhasil ditambahkan ke watchlist!', 'success')
     else:
         flash(f'{stock_name} sudah ada di watchlist!', 'info')
     
-    return redirect(request.referrer or url_for('dashboard'))
+    return redirect(request.referrer or url_for('main.dashboard'))
 
-@app.route('/remove_from_watchlist/<int:watchlist_id>')
+@main.route('/remove_from_watchlist/<int:watchlist_id>')
 @login_required
 def remove_from_watchlist(watchlist_id):
     watchlist_item = Watchlist.query.get_or_404(watchlist_id)
     
     # Pastikan user hanya bisa menghapus watchlist miliknya sendiri
     if watchlist_item.user_id == current_user.id:
+        # Trigger hanya dievaluasi untuk saham di watchlist, jadi ikut dihapus
+        triggers = AlertTrigger.query.filter_by(user_id=current_user.id, stock_code=watchlist_item.stock_code,
+                                                active=True).all()
+        for trigger in triggers:
+            alert_engine.triggers.remove(trigger)
+            db.session.delete(trigger)
+        stock_code = watchlist_item.stock_code
         db.session.delete(watchlist_item)
         db.session.commit()
+        alert_engine.watchers.remove(current_user.id, stock_code)
         flash('Saham berhasil dihapus dari watchlist!', 'success')
     
-    return redirect(url_for('watchlist'))
+    return redirect(url_for('main.watchlist'))
 
-@app.route('/api/anomalies/<stock_code>')
+@main.route('/api/anomalies/<stock_code>')
 @login_required
 def get_anomalies(stock_code):
     """API endpoint untuk mendapatkan anomalies realtime"""
@@ -709,12 +948,14 @@ def get_anomalies(stock_code):
         broker_data = data_collector.get_broker_summary(stock_code, '6mo')
         
         if anomaly_detector is not None and anomaly_detector.is_trained:
-            anomalies = anomaly_detector.detect_broker_anomalies(broker_data)
+            anomalies = anomaly_detector.detect_broker_anomalies(broker_data, stock_code, drift_monitor)
+            online_results = update_online_detector(stock_code, broker_data)
             return jsonify({
                 'status': 'success',
                 'stock_code': stock_code,
                 'anomalies': anomalies,
-                'count': len(anomalies)
+                'count': len(anomalies),
+                'online': online_results
             })
         else:
             return jsonify({
@@ -727,7 +968,67 @@ def get_anomalies(stock_code):
             'message': str(e)
         }), 500
 
-@app.route('/api/chart_data/<stock_code>')
+@main.route('/api/model/drift')
+@login_required
+def get_model_drift():
+    """API endpoint untuk membandingkan distribusi live dengan distribusi training"""
+    if anomaly_detector is None or not anomaly_detector.is_trained:
+        return jsonify({
+            'status': 'error',
+            'message': 'Model tidak tersedia atau belum di-train'
+        }), 500
+    
+    training_sketches = getattr(anomaly_detector, 'training_sketches', None)
+    if not training_sketches:
+        return jsonify({
+            'status': 'error',
+            'message': 'Model tidak menyimpan distribusi training, silakan train ulang'
+        }), 409
+    
+    stock_code = request.args.get('stock')
+    report = drift_monitor.report(training_sketches, stock_code)
+    return jsonify({
+        'status': 'success',
+        'model_version': getattr(anomaly_detector, 'model_version', None),
+        'training_count': len(training_sketches['anomaly_score']),
+        'drift': report
+    })
+
+@main.route('/api/model/online')
+@login_required
+def get_online_model_status():
+    """API endpoint status detector online (jumlah observasi, window, threshold)"""
+    if online_detector is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Detector online belum diinisialisasi'
+        }), 500
+    return jsonify({
+        'status': 'success',
+        'online': online_detector.status()
+    })
+
+@main.route('/api/upstream/status')
+@login_required
+def get_upstream_status():
+    """API endpoint status governor upstream (circuit breaker, backoff, token bucket)"""
+    governors = governor_status()
+    cache = data_collector.cache.status() if data_collector is not None else None
+    states = [g['state'] for g in governors.values()]
+    if 'open' in states:
+        overall = 'degraded'
+    elif 'half_open' in states or any(g['backoff_seconds'] > 0 for g in governors.values()):
+        overall = 'recovering'
+    else:
+        overall = 'ok'
+    return jsonify({
+        'status': 'success',
+        'upstream': overall,
+        'sources': governors,
+        'cache': cache
+    })
+
+@main.route('/api/chart_data/<stock_code>')
 @login_required
 def get_chart_data(stock_code):
     """API endpoint untuk chart data dengan stock_code dari URL path"""
@@ -759,32 +1060,23 @@ def get_chart_data(stock_code):
                 'data': []
             }), 404
         print(f"[v0] Mendapatkan {len(data)} baris data")
+        data_age = data.attrs.get('cache_age_s', 0)
+        data_stale = data.attrs.get('stale', False)
         
-        chart_data = []
-        for _, row in data.iterrows():
-            # Handle both Datetime and Date columns
-            timestamp = row.get('Datetime', row.get('Date'))
-            
-            # Convert to ISO string
-            if hasattr(timestamp, 'isoformat'):
-                iso_str = timestamp.isoformat()
-            else:
-                iso_str = str(timestamp)
-            
-            chart_data.append({
-                'x': iso_str,
-                'o': float(row['Open']),
-                'h': float(row['High']),
-                'l': float(row['Low']),
-                'c': float(row['Close']),
-                'v': int(row.get('Volume', 0))
-            })
+        max_points, method = get_downsample_args()
+        if max_points:
+            data = downsample_ohlcv(data, max_points, method)
+            print(f"[v0] Downsampled ({method}) ke {len(data)} titik")
+        
+        chart_data = chart_points(data)
         
         print(f"[v0] Mengembalikan {len(chart_data)} candele")
         return jsonify({
             'status': 'success',
             'stock_code': stock_code,
-            'data': chart_data
+            'data': chart_data,
+            'data_age_seconds': data_age,
+            'stale': data_stale
         })
         
     except Exception as e:
@@ -797,18 +1089,111 @@ def get_chart_data(stock_code):
             'data': []
         }), 500
 
-@app.route('/api/alerts')
+@main.route('/watchlist/<int:watchlist_id>/triggers', methods=['POST'])
+@login_required
+def add_alert_trigger(watchlist_id):
+    """Tambah trigger harga/RSI untuk saham di watchlist user"""
+    watchlist_item = Watchlist.query.get_or_404(watchlist_id)
+    if watchlist_item.user_id != current_user.id:
+        return redirect(url_for('main.watchlist'))
+    
+    metric = request.form.get('metric', 'price')
+    direction = request.form.get('direction', 'above')
+    try:
+        threshold = float(request.form.get('threshold', '').replace(',', ''))
+    except ValueError:
+        threshold = None
+    
+    if metric not in TRIGGER_METRICS or direction not in TRIGGER_DIRECTIONS:
+        flash('Jenis trigger tidak dikenal', 'error')
+    elif threshold is None or threshold <= 0 or (metric == 'rsi' and threshold >= 100):
+        flash('Nilai trigger tidak valid', 'error')
+    elif AlertTrigger.query.filter_by(user_id=current_user.id, active=True).count() >= MAX_TRIGGERS_PER_USER:
+        flash(f'Maksimal {MAX_TRIGGERS_PER_USER} trigger aktif', 'error')
+    else:
+        trigger = AlertTrigger(user_id=current_user.id, stock_code=watchlist_item.stock_code,
+                               metric=metric, direction=direction, threshold=threshold)
+        db.session.add(trigger)
+        db.session.commit()
+        alert_engine.triggers.add(trigger)
+        flash(f'Trigger "{trigger.description}" ditambahkan', 'success')
+    
+    return redirect(url_for('main.watchlist'))
+
+@main.route('/watchlist/triggers/<int:trigger_id>/delete')
+@login_required
+def remove_alert_trigger(trigger_id):
+    trigger = AlertTrigger.query.get_or_404(trigger_id)
+    
+    if trigger.user_id == current_user.id:
+        alert_engine.triggers.remove(trigger)
+        db.session.delete(trigger)
+        db.session.commit()
+        flash('Trigger berhasil dihapus!', 'success')
+    
+    return redirect(url_for('main.watchlist'))
+
+@main.route('/api/triggers')
+@login_required
+def get_alert_triggers():
+    """API endpoint trigger milik user (aktif dan yang sudah kena)"""
+    triggers = (AlertTrigger.query.filter_by(user_id=current_user.id)
+                .order_by(AlertTrigger.active.desc(), AlertTrigger.created_at.desc()).all())
+    
+    return jsonify({
+        'status': 'success',
+        'data': [trigger.to_dict() for trigger in triggers]
+    })
+
+@main.route('/api/alerts')
 @login_required
 def get_all_alerts():
-    alert_system = AlertSystem()
-    all_alerts = alert_system.get_daily_alerts()
+    """API endpoint alert hari ini untuk semua saham di watchlist user"""
+    all_alerts = alert_engine.get_daily_alerts(current_user.id)
     
     return jsonify({
         'status': 'success',
         'data': all_alerts
     })
 
-@app.route('/api/intraday_data/<stock_code>')
+@main.route('/api/alerts/stream')
+@login_required
+def stream_alerts():
+    """Push channel SSE event alert baru untuk watchlist user, resume lewat Last-Event-ID"""
+    user_id = current_user.id
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    subscriber = alert_stream.subscribe(user_id)
+    if subscriber is None:
+        return jsonify({'status': 'error', 'message': 'Terlalu banyak koneksi alert terbuka'}), 429
+    
+    # Subscribe dulu baru baca backlog, supaya event di antara keduanya tidak hilang
+    backlog = []
+    latest_id = None
+    truncated = False
+    if last_event_id is not None:
+        events = alert_engine.events_for_user(user_id, after_id=last_event_id, limit=BACKLOG_LIMIT + 1,
+                                              oldest_first=True)
+        # Lebih dari BACKLOG_LIMIT event terlewat: jangan kirim sebagian, minta browser memuat ulang data
+        truncated = len(events) > BACKLOG_LIMIT
+        if not truncated:
+            backlog = [(event.id, event.to_dict()) for event in events]
+    if last_event_id is None or truncated:
+        latest_id = db.session.query(db.func.max(AlertEvent.id)).scalar() or 0
+    # Koneksi stream bisa terbuka lama; jangan tahan koneksi database
+    db.session.remove()
+    
+    response = Response(alert_stream.stream(subscriber, backlog, latest_id, reload=truncated), mimetype='text/event-stream')
+    response.call_on_close(lambda: alert_stream.unsubscribe(subscriber))
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@main.route('/api/intraday_data/<stock_code>')
 @login_required
 def api_intraday_data(stock_code):
     """API endpoint khusus untuk data intraday"""
@@ -819,6 +1204,10 @@ def api_intraday_data(stock_code):
         intraday_data = data_collector.get_intraday_data(stock_code, interval, period)
         
         if intraday_data is not None and not intraday_data.empty:
+            max_points, method = get_downsample_args()
+            if max_points:
+                intraday_data = downsample_ohlcv(intraday_data, max_points, method)
+            
             chart_data = []
             for index, row in intraday_data.iterrows():
                 timestamp = row['Datetime'] if 'Datetime' in row else row['Date']
@@ -849,6 +1238,33 @@ def api_intraday_data(stock_code):
             'message': str(e)
         }), 500
 
+@main.route('/api/intraday_anomalies/<stock_code>')
+@login_required
+def api_intraday_anomalies(stock_code):
+    """API endpoint untuk skor anomali bar intraday terbaru yang sudah close"""
+    try:
+        # Hasil scan worker dipakai selama belum ada bar baru; skor ulang hanya untuk bar baru
+        result = intraday_detector.latest(stock_code)
+        if result is None:
+            intraday_data = data_collector.get_intraday_data(stock_code, '5m', '5d')
+            if intraday_data is None or intraday_data.empty:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Tidak ada data intraday tersedia'
+                }), 404
+            # Tidak ada bar baru (di luar jam bursa): pakai hasil bar terbaru yang sudah diskor
+            result = intraday_detector.score_latest(stock_code, intraday_data) or intraday_detector.last_result(stock_code)
+        return jsonify({
+            'status': 'success',
+            'stock_code': stock_code,
+            'data': result
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 # Function to generate trading recommendation based on technical signals
 def generate_trading_recommendation(technical_signals):
     """Generate BUY/SELL/HOLD recommendation with explanation"""
@@ -975,14 +1391,18 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # Profile route
-@app.route('/profile')
+@main.route('/profile')
 @login_required
 def profile():
+    photo_status = photo_store.status(current_user.id)
+    # Upload lama (sebelum ada thumbnail) di session baru dibuang setelah thumbnail berhasil diproses
+    if photo_status == 'ready':
+        session.pop('profile_photo', None)
     profile_photo = session.get('profile_photo', 'images/default-avatar.jpg')
-    return render_template('profile.html', profile_photo=profile_photo)
+    return render_template('profile.html', profile_photo=profile_photo, photo_status=photo_status)
 
 # Profile update route
-@app.route('/profile/update', methods=['POST'])
+@main.route('/profile/update', methods=['POST'])
 @login_required
 def update_profile():
     try:
@@ -992,7 +1412,7 @@ def update_profile():
             existing_user = User.query.filter(User.username == request.form['username'], User.id != current_user.id).first()
             if existing_user:
                 flash('Username sudah digunakan', 'error')
-                return redirect(url_for('profile'))
+                return redirect(url_for('main.profile'))
             current_user.username = request.form['username']
         
         if request.form.get('email'):
@@ -1000,7 +1420,7 @@ def update_profile():
             existing_user = User.query.filter(User.email == request.form['email'], User.id != current_user.id).first()
             if existing_user:
                 flash('Email sudah digunakan', 'error')
-                return redirect(url_for('profile'))
+                return redirect(url_for('main.profile'))
             current_user.email = request.form['email']
         
         # Phone and profile photo features disabled until database migration is complete
@@ -1011,10 +1431,10 @@ def update_profile():
         db.session.rollback()
         flash(f'Error: {str(e)}', 'error')
     
-    return redirect(url_for('profile'))
+    return redirect(url_for('main.profile'))
 
 # Change password route
-@app.route('/profile/change-password', methods=['POST'])
+@main.route('/profile/change-password', methods=['POST'])
 @login_required
 def change_password():
     try:
@@ -1025,16 +1445,16 @@ def change_password():
         # Validate current password
         if not current_user.check_password(current_password):
             flash('Password lama tidak sesuai', 'error')
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
         
         # Validate new password
         if new_password != confirm_password:
             flash('Password baru tidak cocok', 'error')
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
         
         if len(new_password) < 6:
             flash('Password minimal 6 karakter', 'error')
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
         
         # Update password
         current_user.set_password(new_password)
@@ -1044,59 +1464,247 @@ def change_password():
         db.session.rollback()
         flash(f'Error: {str(e)}', 'error')
     
-    return redirect(url_for('profile'))
+    return redirect(url_for('main.profile'))
 
 # Profile photo upload route
-@app.route('/profile/upload-photo', methods=['POST'])
+@main.route('/profile/upload-photo', methods=['POST'])
 @login_required
 def upload_profile_photo():
     try:
         if 'photo' not in request.files:
             flash('Tidak ada file yang dipilih', 'error')
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
         
         file = request.files['photo']
         
         if file.filename == '':
             flash('Tidak ada file yang dipilih', 'error')
-            return redirect(url_for('profile'))
+            return redirect(url_for('main.profile'))
         
         if file and allowed_file(file.filename):
-            # Create uploads directory if it doesn't exist
-            upload_folder = os.path.join(app.root_path, 'static', 'uploads', 'profiles')
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            # Generate unique filename
-            filename = secure_filename(f"user_{current_user.id}_{int(time.time())}_{file.filename}")
-            filepath = os.path.join(upload_folder, filename)
+            # File asli tidak disimpan; worker membuat thumbnail tanpa metadata
+            photo_store.submit(current_user.id, file.read())
             
-            # Save file
-            file.save(filepath)
-            
-            # Store relative path in session for now (until database is migrated)
-            session['profile_photo'] = f'uploads/profiles/{filename}'
-            
-            flash('Foto profil berhasil diupload', 'success')
+            flash('Foto profil berhasil diupload dan sedang diproses', 'success')
         else:
             flash('File tidak diizinkan', 'error')
+    except ValueError as e:
+        flash(str(e), 'error')
     except Exception as e:
         flash(f'Error: {str(e)}', 'error')
     
-    return redirect(url_for('profile'))
+    return redirect(url_for('main.profile'))
+
+@main.app_context_processor
+def inject_avatar():
+    """URL thumbnail foto profil user yang login untuk navbar dan halaman profil"""
+    if current_user.is_authenticated:
+        return {'avatar': photo_store.urls(current_user.id)}
+    return {'avatar': None}
 
 # Error handlers
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template('404.html'), 404
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
+# Jumlah ticker populer yang datanya dipanaskan saat warmup
+WARMUP_TICKERS = 5
+DEFAULT_STOCK = 'ADRO.JK'
+
+# Status warmup untuk /readyz
+warmup_state = {'status': 'pending', 'steps': {}, 'started_at': None, 'finished_at': None}
+
+def most_viewed_tickers(limit=WARMUP_TICKERS):
+    """Ticker yang paling banyak ada di watchlist user, diawali ticker default dashboard"""
+    rows = (db.session.query(Watchlist.stock_code, db.func.count(Watchlist.id).label('users'))
+            .group_by(Watchlist.stock_code)
+            .order_by(db.desc('users'))
+            .limit(limit)
+            .all())
+    tickers = [DEFAULT_STOCK] + [row.stock_code for row in rows]
+    return list(dict.fromkeys(tickers))[:limit]
+
+def prime_ticker(stock_code):
+    """Isi cache histori harga dan cache feature matrix untuk satu ticker"""
+    data_collector.get_stock_data(stock_code, '1mo')
+    broker_data = data_collector.get_broker_summary(stock_code, '1mo')
+    if anomaly_detector is not None and not broker_data.empty:
+        if anomaly_detector.is_trained:
+            anomaly_detector.scaled_matrix(broker_data)
+        else:
+            anomaly_detector.feature_matrix(broker_data)
+
+def _warmup_step(name, func, *args):
+    start = time.perf_counter()
+    try:
+        func(*args)
+        warmup_state['steps'][name] = {'status': 'ok', 'seconds': round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        warmup_state['steps'][name] = {'status': 'error', 'error': str(e),
+                                       'seconds': round(time.perf_counter() - start, 3)}
+        print(f"⚠️ Warmup {name} gagal: {e}")
+
+def compile_templates(app):
+    """Compile semua template Jinja sekali agar request pertama tidak membayar parsing"""
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+
+def run_warmup(app):
+    """Load model, panaskan cache ticker populer dan compile template sebelum worker siap"""
+    warmup_state['status'] = 'warming'
+    warmup_state['started_at'] = datetime.now().isoformat()
+    start = time.perf_counter()
+    with app.app_context():
+        _warmup_step('components', init_components)
+        _warmup_step('templates', compile_templates, app)
+        tickers = []
+        _warmup_step('tickers', lambda: tickers.extend(most_viewed_tickers()))
+        for stock_code in tickers:
+            _warmup_step(f'prime:{stock_code}', prime_ticker, stock_code)
+    warmup_state['finished_at'] = datetime.now().isoformat()
+    warmup_state['status'] = 'ready'
+    print(f"✅ Warmup selesai dalam {time.perf_counter() - start:.2f}s")
+
+# Interval evaluasi alert background selama harga bergerak (detik)
+ALERT_INTERVAL_SECONDS = 60
+# Saat pasar tidak bergerak worker tidur sampai sesi berikutnya, dibatasi agar tetap cek berkala
+ALERT_IDLE_MAX_SECONDS = 3600
+# Hanya satu proses (pemegang file lock di instance/) yang menjalankan worker alert dan meng-update
+# detector online; proses lain mencoba mengambil alih dengan interval ini jika leader mati
+ALERT_LEADER_LOCK = 'alert_worker.lock'
+ALERT_LEADER_RETRY_SECONDS = 60
+leader_state = {'leader': False}
+
+def ensure_alert_tables():
+    """Buat tabel alert, kolom baru alert_event dan index (termasuk unique dedup_key) di database yang sudah ada"""
+    db.create_all()
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('alert_event')}
+    if 'user_id' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(db.text('ALTER TABLE alert_event ADD COLUMN user_id INTEGER REFERENCES user (id)'))
+    if 'dedup_key' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(db.text('ALTER TABLE alert_event ADD COLUMN dedup_key VARCHAR(40)'))
+    for index in list(Watchlist.__table__.indexes) + list(AlertEvent.__table__.indexes):
+        index.create(db.engine, checkfirst=True)
+
+def scan_intraday():
+    """Skor bar 5m yang baru close untuk semua ENERGY_STOCKS dan simpan anomalinya sebagai event alert"""
+    frames = {}
+    for stock_code in ENERGY_STOCKS:
+        try:
+            frames[stock_code] = data_collector.get_intraday_data(stock_code, '5m', '5d')
+        except Exception as e:
+            print(f"⚠️ Data intraday {stock_code} gagal: {e}")
+    try:
+        alert_engine.process_intraday(intraday_detector.scan(frames))
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Error menyimpan anomali intraday: {e}")
+
+def try_become_leader(app):
+    """Coba ambil lock leader (non-blocking); fd sengaja tidak ditutup agar lock dipegang sampai proses berhenti"""
+    if leader_state['leader']:
+        return True
+    if acquire_lock(os.path.join(app.instance_path, ALERT_LEADER_LOCK), blocking=False) is None:
+        return False
+    leader_state['leader'] = True
+    print(f"👑 Proses {os.getpid()} menjadi leader (worker alert + detector online)")
+    return True
+
+def run_leader(app, alerts=True):
+    """Tunggu sampai proses ini memegang lock leader, lalu jalankan worker alert"""
+    while not try_become_leader(app):
+        time.sleep(ALERT_LEADER_RETRY_SECONDS)
+    if alerts:
+        run_alert_worker(app)
+
+def run_alert_worker(app):
+    """Evaluasi alert dan scan bar intraday untuk semua ticker di watchlist, tanpa menunggu user membuka dashboard"""
+    print(f"🔔 Worker alert berjalan di proses {os.getpid()}")
+    calendar = get_calendar()
+    while True:
+        if calendar.prices_moving():
+            with app.app_context():
+                init_components()
+                for stock_code in alert_engine.watchers.tickers():
+                    try:
+                        evaluate_ticker_alerts(stock_code)
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"⚠️ Evaluasi alert {stock_code} gagal: {e}")
+                if intraday_detector.bar_closed():
+                    scan_intraday()
+                db.session.remove()
+            time.sleep(ALERT_INTERVAL_SECONDS)
+        else:
+            time.sleep(min(max(calendar.seconds_until_change(), ALERT_INTERVAL_SECONDS), ALERT_IDLE_MAX_SECONDS))
+
+@main.route('/healthz')
+def healthz():
+    """Liveness: proses hidup"""
+    return jsonify({'status': 'ok'})
+
+@main.route('/readyz')
+def readyz():
+    """Readiness: 200 setelah warmup selesai (atau komponen siap jika warmup dimatikan)"""
+    if warmup_state['status'] == 'skipped':
+        ready = data_collector is not None and anomaly_detector is not None
+    else:
+        ready = warmup_state['status'] == 'ready'
+    return jsonify(dict(warmup_state, ready=ready)), 200 if ready else 503
+
+def create_app(config=None, warmup=None):
+    """Application factory: config, extension, blueprint, lalu warmup
+
+    warmup: 'sync' (blok sampai siap), 'background' (default) atau 'off';
+    default bisa diatur lewat env ANOPUS_WARMUP.
+    """
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'anopus-secret-key-2024'
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///anopus.db'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['UPLOAD_FOLDER'] = 'static/uploads/profiles'
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+    app.config.update(config or {})
+    
+    # Create upload folder if not exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    
+    db.init_app(app)
+    login_manager.init_app(app)
+    assets.init_app(app)
+    photo_store.init_app(app)
+    alert_stream.init_app(app)
+    assets.add_folder(photo_store.url_path, photo_store.folder)
+    app.register_blueprint(main)
+    
+    with app.app_context():
+        ensure_alert_tables()
+    
+    # Pemilihan leader dicoba langsung agar warmup tahu apakah proses ini boleh bootstrap detector online.
+    # Worker alert (hanya di leader): 'background' (default) atau 'off', lewat env ANOPUS_ALERTS
+    alerts = os.environ.get('ANOPUS_ALERTS', 'background') == 'background'
+    if not try_become_leader(app) or alerts:
+        threading.Thread(target=run_leader, args=(app, alerts), name='anopus-leader', daemon=True).start()
+    
+    mode = warmup or os.environ.get('ANOPUS_WARMUP', 'background')
+    if mode == 'sync':
+        run_warmup(app)
+    elif mode == 'background':
+        threading.Thread(target=run_warmup, args=(app,), name='anopus-warmup', daemon=True).start()
+    else:
+        warmup_state['status'] = 'skipped'
+    return app
+
 if __name__ == '__main__':
+    # Import modul ini tidak membuat app; server WSGI memakai wsgi.py atau factory create_app
+    app = create_app()
     with app.app_context():
         db.create_all()
-        init_anomaly_detector()
-        init_data_collector()
     app.run(debug=True)
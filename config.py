@@ -0,0 +1,51 @@
+import os
+
+# Daftar saham energi dengan nama lengkap
+ENERGY_STOCKS = {
+    'ADRO.JK': 'Adaro Energy Indonesia Tbk',
+    'PTBA.JK': 'Bukit Asam Tbk',
+    'BYAN.JK': 'Bayan Resources Tbk',
+    'ITMG.JK': 'Indo Tambangraya Megah Tbk',
+    'GEMS.JK': 'Golden Energy Mines Tbk',
+    'MCOL.JK': 'Prima Andalan Mandiri Tbk',
+    'SMMT.JK': 'Golden Eagle Energy Tbk',
+    'RMKE.JK': 'RMK Energy Tbk',
+    'KKGI.JK': 'Resource Alam Indonesia Tbk',
+    'TOBA.JK': 'TBS Energi Utama Tbk',
+    'ARII.JK': 'Atlas Resources Tbk',
+    'DEWA.JK': 'Darma Henwa Tbk',
+    'MYOH.JK': 'Samindo Resources Tbk',
+    'TEBE.JK': 'Dana Brata Luhur Tbk',
+    'DOID.JK': 'Delta Dunia Makmur Tbk',
+    'RATU.JK': 'Mustika Ratu Tbk',
+    'MEDC.JK': 'Medco Energi Internasional Tbk',
+    'PGAS.JK': 'Perusahaan Gas Negara Tbk',
+    'ENRG.JK': 'Energi Mega Persada Tbk',
+    'INDY.JK': 'Indika Energy Tbk',
+    'RAJA.JK': 'Rukun Raharja Tbk',
+    'ESSA.JK': 'Surya Esa Perkasa Tbk',
+    'BIPI.JK': 'Astrindo Nusantara Infrastruktur Tbk',
+    'PGEO.JK': 'Pertamina Geothermal Energy Tbk',
+    'BREN.JK': 'Barito Renewables Energy Tbk',
+    'OASA.JK': 'Maharaksa Biru Energi Tbk',
+    'SEMA.JK': 'Semacom Integrated Tbk',
+    'JSKY.JK': 'Sky Energy Indonesia Tbk',
+    'BRPT.JK': 'Barito Pacific Tbk',
+    'CUAN.JK': 'Petrindo Jaya Kreasi Tbk',
+    'CDIA.JK': 'Chandra Daya Investasi Tbk',
+    'AKRA.JK': 'AKR Corporindo Tbk',
+    'PTRO.JK': 'Petrosea Tbk',
+    'MBAP.JK': 'Mitrabara Adiperdana Tbk',
+    'BUMI.JK': 'Bumi Resources Tbk'
+}
+
+# Saham yang dipakai auto-training saat model belum tersedia
+AUTO_TRAIN_STOCKS = ['ADRO.JK', 'PTBA.JK', 'BYAN.JK', 'ITMG.JK', 'GEMS.JK']
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+MODEL_FILENAME = 'anomaly_detector.pkl'
+# State detector online (Half-Space Trees) disimpan di sebelah batch model
+ONLINE_MODEL_FILENAME = 'online_detector.pkl'
+
+# Close real terakhir per ticker (anchor data fallback), disimpan agar tetap ada setelah restart
+LAST_CLOSE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'last_close.json')
@@ -0,0 +1,161 @@
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+# Heartbeat komentar SSE agar proxy tidak menutup koneksi idle dan koneksi putus cepat terdeteksi
+HEARTBEAT_SECONDS = 15
+# Jeda reconnect EventSource di browser (ms)
+RETRY_MILLISECONDS = 5000
+# Event antre per koneksi; jika penuh koneksi ditutup dan browser resume lewat Last-Event-ID
+SUBSCRIBER_QUEUE_SIZE = 100
+MAX_STREAMS_PER_USER = 5
+# Maksimal event yang dikirim ulang saat resume
+BACKLOG_LIMIT = 200
+# Event yang dibuat proses worker lain diambil dari database dengan interval ini (hanya jika ada koneksi)
+POLL_SECONDS = 5
+# Jumlah id event terakhir yang diingat agar event tidak dipublish dua kali (listener + polling)
+PUBLISHED_MEMORY = 1000
+
+
+def format_event(event_id, payload):
+    return f"id: {event_id}\nevent: alert\ndata: {json.dumps(payload)}\n\n"
+
+
+class Subscriber:
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflow = False
+
+
+class AlertStream:
+    """Push channel SSE per user untuk event alert baru di watchlist-nya
+
+    Event dari proses ini diterima langsung lewat listener AlertEngine; event yang
+    disimpan proses worker lain diambil dengan satu query berkala per proses (bukan per koneksi).
+    """
+
+    def __init__(self, engine, queue_size=SUBSCRIBER_QUEUE_SIZE, poll_seconds=POLL_SECONDS):
+        self.engine = engine
+        self.queue_size = queue_size
+        self.poll_seconds = poll_seconds
+        self.app = None
+        self._subscribers = {}
+        self._published = deque(maxlen=PUBLISHED_MEMORY)
+        self._published_ids = set()
+        self._last_id = None
+        self._poller = None
+        self._lock = threading.Lock()
+        engine.add_listener(self.publish)
+
+    def init_app(self, app):
+        self.app = app
+
+    def subscribe(self, user_id):
+        """Daftarkan koneksi baru; None jika user sudah mencapai batas koneksi"""
+        with self._lock:
+            subscribers = self._subscribers.setdefault(user_id, set())
+            if len(subscribers) >= MAX_STREAMS_PER_USER:
+                return None
+            subscriber = Subscriber(user_id, self.queue_size)
+            subscribers.add(subscriber)
+            if self.app is not None and (self._poller is None or not self._poller.is_alive()):
+                self._poller = threading.Thread(target=self._poll, name='alert-stream-poll', daemon=True)
+                self._poller.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+
+    def _remember(self, event_id):
+        """True jika event belum pernah dipublish oleh proses ini"""
+        if event_id in self._published_ids:
+            return False
+        if len(self._published) == self._published.maxlen:
+            self._published_ids.discard(self._published[0])
+        self._published.append(event_id)
+        self._published_ids.add(event_id)
+        return True
+
+    def publish(self, events, user_ids):
+        """Listener AlertEngine: kirim event ke semua koneksi milik user_ids"""
+        with self._lock:
+            targets = [subscriber for user_id in user_ids for subscriber in self._subscribers.get(user_id, ())]
+            events = [event for event in events if self._remember(event.id)]
+        if not targets or not events:
+            return
+        payloads = [(event.id, event.to_dict()) for event in events]
+        for subscriber in targets:
+            for payload in payloads:
+                try:
+                    subscriber.queue.put_nowait(payload)
+                except queue.Full:
+                    subscriber.overflow = True
+                    break
+
+    def _poll(self):
+        """Ambil event baru dari database selama masih ada koneksi terbuka"""
+        Event = self.engine.event_model
+        db = self.engine.db
+        with self.app.app_context():
+            self._last_id = db.session.query(db.func.max(Event.id)).scalar() or 0
+            db.session.remove()
+        while True:
+            time.sleep(self.poll_seconds)
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            with self.app.app_context():
+                try:
+                    events = Event.query.filter(Event.id > self._last_id).order_by(Event.id).limit(BACKLOG_LIMIT).all()
+                    for event in events:
+                        self._last_id = event.id
+                        user_ids = {event.user_id} if event.user_id else self.engine.watchers.subscribers(event.stock_code)
+                        self.publish([event], user_ids)
+                except Exception as e:
+                    print(f"⚠️ Polling alert stream gagal: {e}")
+                finally:
+                    db.session.remove()
+
+    def stream(self, subscriber, backlog=(), last_id=None, reload=False):
+        """Generator text/event-stream: backlog resume, lalu event live dan heartbeat
+
+        reload=True: backlog resume terpotong, browser diminta memuat ulang data alih-alih menerima sebagian.
+        """
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if reload:
+                yield f"id: {last_id}\nevent: reload\ndata: {json.dumps({'missed_more_than': BACKLOG_LIMIT})}\n\n"
+            elif last_id is not None:
+                # Tanpa data: browser hanya mencatat id untuk Last-Event-ID saat reconnect
+                yield f"id: {last_id}\n\n"
+            sent = set()
+            for event_id, payload in backlog:
+                sent.add(event_id)
+                yield format_event(event_id, payload)
+            while not subscriber.overflow:
+                try:
+                    event_id, payload = subscriber.queue.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if event_id not in sent:
+                    yield format_event(event_id, payload)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def status(self):
+        with self._lock:
+            return {
+                'users': len(self._subscribers),
+                'connections': sum(len(subscribers) for subscribers in self._subscribers.values()),
+                'polling': self._poller is not None,
+            }
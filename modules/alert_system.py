@@ -1,18 +1,54 @@
-from datetime import datetime
+import time
+import hashlib
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from modules.alert_triggers import TriggerIndex, describe_trigger, format_trigger_value, trigger_values
+
+# Cool-down per severity (menit): rule yang sama untuk ticker yang sama tidak dikirim ulang
+# sebelum lewat jendela ini, walaupun kondisinya hilang lalu muncul lagi (flapping)
+ALERT_COOLDOWN_MINUTES = {
+    'HIGH': 60,
+    'MEDIUM': 120,
+    'LOW': 240,
+}
+
+# Anomali broker hanya di-alert jika tanggalnya masih baru; event yang sama tidak pernah diulang
+ANOMALY_ALERT_DAYS = 5
+DEDUP_WINDOW_DAYS = 7
+
+# Index watchlist dimuat ulang berkala agar perubahan dari proses worker lain ikut terbaca
+WATCHLIST_RELOAD_SECONDS = 60
+
+ANOMALY_ALERT_SEVERITIES = {'high', 'critical'}
+# Severity anomali bar intraday -> severity alert
+INTRADAY_ALERT_SEVERITIES = {'critical': 'HIGH', 'high': 'HIGH', 'medium': 'MEDIUM'}
+HIGH_VOLUME_SIGNALS = {'HIGH', 'TINGGI', 'SANGAT TINGGI'}
+
+
+def _upper(value):
+    return str(value or '').upper()
+
 
 class AlertSystem:
     """Sistem untuk generate alerts berdasarkan technical signals dan anomalies"""
-    
+
     @staticmethod
-    def generate_alerts(technical_analysis, anomalies=None, stock_data=None):
-        """Generate alerts dari technical analysis dan anomalies"""
+    def evaluate_rules(technical_analysis, anomalies=None):
+        """Evaluasi semua rule; tiap alert membawa 'rule' dan 'key' untuk deduplikasi"""
         alerts = []
-        
+
         timestamp = datetime.now()
-        
+        rsi_signal = _upper(technical_analysis.get('rsi_signal'))
+        ma_signal = _upper(technical_analysis.get('ma_signal'))
+
         # Alert dari technical signals
-        if technical_analysis.get('rsi_signal') == 'OVERBOUGHT':
+        if rsi_signal == 'OVERBOUGHT':
             alerts.append({
+                'rule': 'RSI_OVERBOUGHT',
                 'type': 'HIGH',
                 'severity': 'HIGH',
                 'title': 'RSI_OVERBOUGHT',
@@ -20,9 +56,10 @@ class AlertSystem:
                 'action': 'SELL',
                 'timestamp': timestamp
             })
-        
-        if technical_analysis.get('rsi_signal') == 'OVERSOLD':
+
+        if rsi_signal == 'OVERSOLD':
             alerts.append({
+                'rule': 'RSI_OVERSOLD',
                 'type': 'HIGH',
                 'severity': 'HIGH',
                 'title': 'RSI_OVERSOLD',
@@ -30,49 +67,315 @@ class AlertSystem:
                 'action': 'BUY',
                 'timestamp': timestamp
             })
-        
-        if technical_analysis.get('ma_signal') == 'BULLISH':
+
+        if ma_signal == 'BULLISH':
             alerts.append({
+                'rule': 'MA_BULLISH',
                 'type': 'MA_BULLISH',
                 'severity': 'LOW',
                 'message': 'Moving Average menunjukkan trend bullish',
                 'action': 'BUY',
                 'timestamp': timestamp
             })
-        
-        if technical_analysis.get('ma_signal') == 'BEARISH':
+
+        if ma_signal == 'BEARISH':
             alerts.append({
+                'rule': 'MA_BEARISH',
                 'type': 'MA_BEARISH',
                 'severity': 'MEDIUM',
                 'message': 'Moving Average menunjukkan trend bearish',
                 'action': 'SELL',
                 'timestamp': timestamp
             })
-        
-        if technical_analysis.get('volume_signal') == 'HIGH':
+
+        if _upper(technical_analysis.get('volume_signal')) in HIGH_VOLUME_SIGNALS:
             alerts.append({
+                'rule': 'VOLUME_HIGH',
                 'type': 'VOLUME_HIGH',
                 'severity': 'MEDIUM',
                 'message': 'Volume trading lebih tinggi dari rata-rata',
                 'action': 'MONITOR',
                 'timestamp': timestamp
             })
-        
-        # Alert dari anomalies
+
+        # Alert dari anomalies (satu per tanggal anomali)
         if anomalies:
             for anomaly in anomalies:
-                if anomaly.get('anomaly_confidence', 0) > 0.8:
+                if (anomaly.get('anomaly_confidence', 0) > 0.8
+                        or anomaly.get('severity') in ANOMALY_ALERT_SEVERITIES):
                     alerts.append({
+                        'rule': 'ANOMALY_DETECTED',
+                        'key': str(anomaly.get('date', ''))[:10],
                         'type': 'ANOMALY_DETECTED',
                         'severity': 'HIGH',
-                        'message': f"Anomali terdeteksi dengan confidence {anomaly.get('anomaly_confidence', 0):.2%}",
+                        'message': anomaly.get('explanation') or
+                                   f"Anomali terdeteksi dengan confidence {anomaly.get('anomaly_confidence', 0):.2%}",
                         'action': 'INVESTIGATE',
                         'timestamp': timestamp
                     })
-        
+
         return alerts
-    
+
+    @staticmethod
+    def generate_alerts(technical_analysis, anomalies=None, stock_data=None):
+        """Generate alerts dari technical analysis dan anomalies"""
+        return AlertSystem.evaluate_rules(technical_analysis, anomalies)
+
     @staticmethod
     def get_daily_alerts():
-        """Get daily alerts (placeholder untuk future implementation)"""
+        """Tanpa penyimpanan tidak ada riwayat; lihat AlertEngine.get_daily_alerts"""
         return []
+
+
+class WatchlistIndex:
+    """Mapping ticker -> user yang memantau, untuk fan-out event tanpa scan semua user"""
+
+    def __init__(self, watchlist_model, reload_seconds=WATCHLIST_RELOAD_SECONDS):
+        self.watchlist_model = watchlist_model
+        self.reload_seconds = reload_seconds
+        self._subscribers = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        subscribers = defaultdict(set)
+        for user_id, stock_code in self.watchlist_model.query.with_entities(
+                self.watchlist_model.user_id, self.watchlist_model.stock_code):
+            subscribers[stock_code].add(user_id)
+        return subscribers
+
+    def _ensure_loaded(self):
+        if self._subscribers is None or time.time() - self._loaded_at > self.reload_seconds:
+            self._subscribers = self._load()
+            self._loaded_at = time.time()
+
+    def subscribers(self, stock_code):
+        with self._lock:
+            self._ensure_loaded()
+            return set(self._subscribers.get(stock_code, ()))
+
+    def tickers(self):
+        """Ticker yang dipantau minimal satu user"""
+        with self._lock:
+            self._ensure_loaded()
+            return [code for code, users in self._subscribers.items() if users]
+
+    def add(self, user_id, stock_code):
+        with self._lock:
+            if self._subscribers is not None:
+                self._subscribers[stock_code].add(user_id)
+
+    def remove(self, user_id, stock_code):
+        with self._lock:
+            if self._subscribers is not None:
+                self._subscribers[stock_code].discard(user_id)
+
+
+class AlertEngine(AlertSystem):
+    """Evaluasi rule sekali per ticker per update data, simpan event dengan dedup/cool-down
+
+    Event rule disimpan sekali per ticker (bukan per user); user membaca lewat join watchlist,
+    dan listener (mis. push channel) menerima event beserta user yang memantau ticker itu.
+    Trigger harga/indikator milik user menghasilkan event dengan user_id pemiliknya.
+    """
+
+    def __init__(self, db, event_model, watchlist_model, trigger_model=None, cooldown_minutes=None):
+        self.db = db
+        self.event_model = event_model
+        self.watchers = WatchlistIndex(watchlist_model)
+        self.watchlist_model = watchlist_model
+        self.trigger_model = trigger_model
+        self.triggers = TriggerIndex(trigger_model) if trigger_model is not None else None
+        self.cooldowns = dict(ALERT_COOLDOWN_MINUTES, **(cooldown_minutes or {}))
+        self._versions = {}
+        self._active = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """listener(events, user_ids) dipanggil setelah event baru tersimpan"""
+        self._listeners.append(listener)
+
+    @staticmethod
+    def fingerprint(stock_code, rule, key=''):
+        return hashlib.sha1(f"{stock_code}|{rule}|{key}".encode()).hexdigest()
+
+    def _is_recent_anomaly(self, alert, now):
+        try:
+            return datetime.fromisoformat(alert['key']) >= now - timedelta(days=ANOMALY_ALERT_DAYS)
+        except (KeyError, ValueError):
+            return False
+
+    def _insert_unique(self, event):
+        """Simpan event ber-dedup_key di savepoint; False jika worker lain sudah menyimpan event yang sama"""
+        try:
+            with self.db.session.begin_nested():
+                self.db.session.add(event)
+        except IntegrityError:
+            return False
+        return True
+
+    def _notify(self, events, user_ids):
+        for listener in self._listeners:
+            try:
+                listener(events, user_ids)
+            except Exception as e:
+                print(f"⚠️ Listener alert gagal: {e}")
+
+    def process(self, stock_code, technical_analysis, anomalies=None, data_version=None):
+        """Evaluasi rule dan trigger user untuk satu ticker; return event baru yang tersimpan
+
+        data_version yang sama dengan evaluasi sebelumnya di-skip (tidak ada data baru).
+        Rule kondisi (RSI, MA, volume) hanya menghasilkan event saat kondisinya baru muncul.
+        """
+        with self._lock:
+            if data_version is not None and self._versions.get(stock_code) == data_version:
+                return []
+            self._versions[stock_code] = data_version
+
+        now = datetime.now()
+        events = self._rule_events(stock_code, technical_analysis, anomalies, now)
+        trigger_events = self._trigger_events(stock_code, technical_analysis, now) if self.triggers else []
+        if not events and not trigger_events:
+            return []
+        self.db.session.commit()
+        print(f"🔔 {len(events) + len(trigger_events)} alert baru untuk {stock_code}: "
+              f"{', '.join(e.rule for e in events + trigger_events)}")
+
+        if events:
+            self._notify(events, self.watchers.subscribers(stock_code))
+        for event in trigger_events:
+            self._notify([event], {event.user_id})
+        return events + trigger_events
+
+    def _rule_events(self, stock_code, technical_analysis, anomalies, now):
+        """Event rule teknikal/anomali setelah filter transisi, dedup dan cool-down (belum di-commit)"""
+        candidates = []
+        for alert in self.evaluate_rules(technical_analysis, anomalies):
+            if alert['rule'] == 'ANOMALY_DETECTED' and not self._is_recent_anomaly(alert, now):
+                continue
+            candidates.append(alert)
+
+        with self._lock:
+            previous = self._active.get(stock_code)
+            self._active[stock_code] = {alert['rule'] for alert in candidates if 'key' not in alert}
+        if previous is not None:
+            # Kondisi yang sudah aktif di evaluasi sebelumnya bukan event baru
+            candidates = [alert for alert in candidates if 'key' in alert or alert['rule'] not in previous]
+        if not candidates:
+            return []
+
+        Event = self.event_model
+        window = max(timedelta(days=DEDUP_WINDOW_DAYS), timedelta(minutes=max(self.cooldowns.values())))
+        recent = Event.query.filter(Event.stock_code == stock_code, Event.user_id.is_(None),
+                                    Event.created_at >= now - window).all()
+        seen = {event.fingerprint for event in recent}
+        last_by_rule = {}
+        for event in recent:
+            if event.rule not in last_by_rule or event.created_at > last_by_rule[event.rule]:
+                last_by_rule[event.rule] = event.created_at
+
+        events = []
+        for alert in candidates:
+            fingerprint = self.fingerprint(stock_code, alert['rule'], alert.get('key', ''))
+            if fingerprint in seen and 'key' in alert:
+                continue
+            cooldown = timedelta(minutes=self.cooldowns.get(alert['severity'], 60))
+            last = last_by_rule.get(alert['rule'])
+            if last is not None and now - last < cooldown:
+                continue
+            # Event ber-key (anomali per tanggal) hanya boleh ada sekali: dijaga unique index dedup_key
+            event = Event(stock_code=stock_code, rule=alert['rule'], severity=alert['severity'],
+                          message=alert['message'], action=alert['action'], fingerprint=fingerprint,
+                          dedup_key=fingerprint if 'key' in alert else None, created_at=now)
+            if 'key' in alert:
+                if not self._insert_unique(event):
+                    continue
+            else:
+                self.db.session.add(event)
+            events.append(event)
+            seen.add(fingerprint)
+            last_by_rule[alert['rule']] = now
+        return events
+
+    def process_intraday(self, results):
+        """Simpan anomali bar intraday (hasil IntradayAnomalyDetector.scan) sekali per ticker per bar"""
+        Event = self.event_model
+        now = datetime.now()
+        events = []
+        for result in results:
+            severity = INTRADAY_ALERT_SEVERITIES.get(result['severity'])
+            if not result['is_anomaly'] or severity is None:
+                continue
+            fingerprint = self.fingerprint(result['stock_code'], 'INTRADAY_ANOMALY', result['time'])
+            bar_time = datetime.fromisoformat(result['time']).strftime('%d %b %H:%M')
+            event = Event(stock_code=result['stock_code'], rule='INTRADAY_ANOMALY', severity=severity,
+                          message=f"Bar {bar_time}: {', '.join(result['reasons'])}"[:500], action='MONITOR',
+                          fingerprint=fingerprint, dedup_key=fingerprint, created_at=now)
+            if self._insert_unique(event):
+                events.append(event)
+        if not events:
+            return []
+        self.db.session.commit()
+        print(f"🔔 {len(events)} alert anomali intraday: {', '.join(e.stock_code for e in events)}")
+        for event in events:
+            self._notify([event], self.watchers.subscribers(event.stock_code))
+        return events
+
+    def _trigger_events(self, stock_code, technical_analysis, now):
+        """Trigger user yang terlewati nilai terbaru; tiap trigger hanya kena sekali"""
+        values = trigger_values(technical_analysis)
+        fired = self.triggers.update(stock_code, values)
+        if not fired:
+            return []
+
+        Event = self.event_model
+        Trigger = self.trigger_model
+        events = []
+        for trigger in Trigger.query.filter(Trigger.id.in_(fired), Trigger.active.is_(True)).all():
+            # UPDATE bersyarat: jika beberapa worker melihat trigger yang sama, hanya satu yang menang
+            claimed = (Trigger.query.filter_by(id=trigger.id, active=True)
+                       .update({'active': False, 'triggered_at': now}, synchronize_session=False))
+            if not claimed:
+                continue
+            value = values[trigger.metric]
+            description = describe_trigger(stock_code, trigger.metric, trigger.direction, trigger.threshold)
+            fingerprint = self.fingerprint(stock_code, 'TRIGGER', trigger.id)
+            event = Event(user_id=trigger.user_id, stock_code=stock_code,
+                          rule=f"TRIGGER_{trigger.metric.upper()}_{trigger.direction.upper()}",
+                          severity='HIGH', message=f"{description} (sekarang {format_trigger_value(trigger.metric, value)})", action='MONITOR',
+                          fingerprint=fingerprint, dedup_key=fingerprint, created_at=now)
+            if self._insert_unique(event):
+                events.append(event)
+        return events
+
+    def events_for_user(self, user_id, since=None, after_id=None, limit=100, stock_code=None, oldest_first=False):
+        """Event rule untuk ticker di watchlist user plus event trigger milik user (terbaru dulu)
+
+        Dengan stock_code (panel dashboard satu saham) event rule saham itu ikut walau belum di watchlist.
+        oldest_first dipakai resume stream: limit memotong event terbaru, bukan event tertua yang terlewat.
+        """
+        Event = self.event_model
+        Watchlist = self.watchlist_model
+        db = self.db
+        if stock_code is not None:
+            query = Event.query.filter(Event.stock_code == stock_code,
+                                       db.or_(Event.user_id == user_id, Event.user_id.is_(None)))
+        else:
+            query = (Event.query
+                     .outerjoin(Watchlist, db.and_(Watchlist.stock_code == Event.stock_code,
+                                                   Watchlist.user_id == user_id))
+                     .filter(db.or_(Event.user_id == user_id,
+                                    db.and_(Event.user_id.is_(None), Watchlist.id.isnot(None)))))
+        if since is not None:
+            query = query.filter(Event.created_at >= since)
+        if after_id is not None:
+            query = query.filter(Event.id > after_id)
+        return query.order_by(Event.id if oldest_first else Event.id.desc()).limit(limit).all()
+
+    def get_daily_alerts(self, user_id=None):
+        """Alert hari ini untuk watchlist user"""
+        if user_id is None:
+            return []
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return [event.to_dict() for event in self.events_for_user(user_id, since=today)]
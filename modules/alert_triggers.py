@@ -0,0 +1,189 @@
+import math
+import time
+import threading
+
+import numpy as np
+
+# Metrik yang bisa dipakai trigger user: nama -> label
+TRIGGER_METRICS = {
+    'price': 'Harga',
+    'rsi': 'RSI',
+}
+TRIGGER_DIRECTIONS = {
+    'above': 'naik melewati',
+    'below': 'turun melewati',
+}
+
+# Batas trigger aktif per user
+MAX_TRIGGERS_PER_USER = 50
+
+# Index dimuat ulang dari database berkala agar trigger yang dibuat di worker lain ikut terbaca
+TRIGGER_RELOAD_SECONDS = 60
+
+
+def format_trigger_value(metric, value):
+    return f"{value:,.0f}" if metric == 'price' else f"{value:.4g}"
+
+
+def describe_trigger(stock_code, metric, direction, threshold):
+    """'Harga ADRO.JK naik melewati 2,800'"""
+    label = TRIGGER_METRICS[metric]
+    return f"{label} {stock_code} {TRIGGER_DIRECTIONS[direction]} {format_trigger_value(metric, threshold)}"
+
+
+def trigger_values(technical_analysis):
+    """Nilai metrik dari hasil analisis teknikal; nilai placeholder (N/A, 0, NaN) dilewati"""
+    values = {}
+    price = technical_analysis.get('current_price')
+    if price and math.isfinite(price) and price > 0:
+        values['price'] = float(price)
+    rsi = technical_analysis.get('rsi')
+    if (str(technical_analysis.get('rsi_signal', 'N/A')).upper() != 'N/A'
+            and rsi is not None and math.isfinite(rsi)):
+        values['rsi'] = float(rsi)
+    return values
+
+
+class ThresholdBook:
+    """Threshold satu ticker+metrik dalam array terurut, dipisah sisi above dan below
+
+    Perpindahan nilai dari v0 ke v1 mencari trigger yang terlewati dengan binary search,
+    O(log n + k) untuk k trigger yang kena, bukan cek satu per satu.
+    """
+
+    def __init__(self):
+        self.levels = {side: np.empty(0, dtype=float) for side in TRIGGER_DIRECTIONS}
+        self.ids = {side: np.empty(0, dtype=np.int64) for side in TRIGGER_DIRECTIONS}
+        # Trigger yang ditambah setelah ada nilai terakhir: dicek sebagai kondisi di update berikutnya
+        self.pending = {}
+        self.last = None
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.ids.values()) + len(self.pending)
+
+    def _insert(self, trigger_id, direction, threshold):
+        levels = self.levels[direction]
+        position = np.searchsorted(levels, threshold, side='right')
+        self.levels[direction] = np.insert(levels, position, threshold)
+        self.ids[direction] = np.insert(self.ids[direction], position, trigger_id)
+
+    def add(self, trigger_id, direction, threshold):
+        if self.last is None:
+            self._insert(trigger_id, direction, threshold)
+        else:
+            self.pending[trigger_id] = (direction, threshold)
+
+    def remove(self, trigger_id, direction, threshold):
+        if self.pending.pop(trigger_id, None) is not None:
+            return
+        levels = self.levels[direction]
+        lo = np.searchsorted(levels, threshold, side='left')
+        hi = np.searchsorted(levels, threshold, side='right')
+        matches = lo + np.flatnonzero(self.ids[direction][lo:hi] == trigger_id)
+        self.levels[direction] = np.delete(levels, matches)
+        self.ids[direction] = np.delete(self.ids[direction], matches)
+
+    def _take(self, direction, lo, hi):
+        """Keluarkan trigger di posisi [lo, hi) karena sekali kena trigger tidak aktif lagi"""
+        if hi <= lo:
+            return []
+        taken = self.ids[direction][lo:hi].tolist()
+        self.levels[direction] = np.delete(self.levels[direction], np.s_[lo:hi])
+        self.ids[direction] = np.delete(self.ids[direction], np.s_[lo:hi])
+        return taken
+
+    def update(self, value):
+        """Catat nilai baru, return id trigger yang terlewati sejak nilai sebelumnya"""
+        previous, self.last = self.last, value
+        above, below = self.levels['above'], self.levels['below']
+        if previous is None:
+            # Belum ada nilai sebelumnya: semua trigger yang kondisinya sudah terpenuhi
+            fired = self._take('above', 0, np.searchsorted(above, value, side='right'))
+            fired += self._take('below', np.searchsorted(below, value, side='left'), len(below))
+        elif value > previous:
+            # Naik: threshold above di (previous, value]
+            fired = self._take('above', np.searchsorted(above, previous, side='right'),
+                               np.searchsorted(above, value, side='right'))
+        elif value < previous:
+            # Turun: threshold below di [value, previous)
+            fired = self._take('below', np.searchsorted(below, value, side='left'),
+                               np.searchsorted(below, previous, side='left'))
+        else:
+            fired = []
+
+        for trigger_id, (direction, threshold) in list(self.pending.items()):
+            del self.pending[trigger_id]
+            if (value >= threshold) if direction == 'above' else (value <= threshold):
+                fired.append(trigger_id)
+            else:
+                self._insert(trigger_id, direction, threshold)
+        return fired
+
+
+class TriggerIndex:
+    """Semua trigger aktif per (ticker, metrik), dimuat dari database dan di-refresh berkala"""
+
+    def __init__(self, trigger_model, reload_seconds=TRIGGER_RELOAD_SECONDS):
+        self.trigger_model = trigger_model
+        self.reload_seconds = reload_seconds
+        self._books = None
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def _load(self, previous):
+        """Bangun ulang semua book; nilai terakhir dipertahankan, trigger yang belum dikenal jadi pending"""
+        known = set()
+        books = {}
+        for key, book in previous.items():
+            known.update(book.pending)
+            for ids in book.ids.values():
+                known.update(ids.tolist())
+            books[key] = ThresholdBook()
+            books[key].last = book.last
+
+        Trigger = self.trigger_model
+        rows = Trigger.query.filter_by(active=True).with_entities(
+            Trigger.id, Trigger.stock_code, Trigger.metric, Trigger.direction, Trigger.threshold)
+        for trigger_id, stock_code, metric, direction, threshold in rows:
+            book = books.setdefault((stock_code, metric), ThresholdBook())
+            if trigger_id in known:
+                book._insert(trigger_id, direction, threshold)
+            else:
+                book.add(trigger_id, direction, threshold)
+        return books
+
+    def _ensure_loaded(self):
+        if self._books is None or time.time() - self._loaded_at > self.reload_seconds:
+            self._books = self._load(self._books or {})
+            self._loaded_at = time.time()
+
+    def add(self, trigger):
+        with self._lock:
+            if self._books is not None:
+                key = (trigger.stock_code, trigger.metric)
+                self._books.setdefault(key, ThresholdBook()).add(trigger.id, trigger.direction, trigger.threshold)
+
+    def remove(self, trigger):
+        with self._lock:
+            if self._books is not None:
+                book = self._books.get((trigger.stock_code, trigger.metric))
+                if book is not None:
+                    book.remove(trigger.id, trigger.direction, trigger.threshold)
+
+    def update(self, stock_code, values):
+        """Teruskan nilai terbaru ke setiap metrik ticker, return id trigger yang kena"""
+        fired = []
+        with self._lock:
+            self._ensure_loaded()
+            for metric, value in values.items():
+                book = self._books.get((stock_code, metric))
+                if book is None:
+                    # Simpan nilai terakhir agar trigger baru dicek terhadap nilai ini
+                    book = self._books[(stock_code, metric)] = ThresholdBook()
+                fired.extend(book.update(value))
+        return fired
+
+    def status(self):
+        with self._lock:
+            self._ensure_loaded()
+            return {f"{stock_code}:{metric}": len(book) for (stock_code, metric), book in self._books.items() if len(book)}
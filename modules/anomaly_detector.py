@@ -1,19 +1,74 @@
+import time
 import pickle
+import threading
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import os
 from datetime import datetime
+from modules.drift_monitor import build_sketches
+
+try:
+    # Rolling median jauh lebih cepat dengan bottleneck; tanpa itu pakai pandas
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+# Persentil skor training untuk threshold anomali dan tiap level severity
+# (skor lebih rendah = lebih anomali). Default untuk model tanpa contamination numerik;
+# model dengan contamination memakai contamination sebagai persentil 'anomaly' dan
+# level severity diskalakan dengan rasio yang sama.
+THRESHOLD_PERCENTILES = {
+    'anomaly': 20,
+    'medium': 15,
+    'high': 10,
+    'critical': 5,
+}
+
+# Robust z-score minimal agar sebuah feature dianggap pendorong anomali
+ATTRIBUTION_Z = 2.0
+# Jumlah feature teratas yang dikembalikan per anomali
+TOP_ATTRIBUTIONS = 3
+# Faktor konsistensi MAD terhadap standar deviasi distribusi normal
+MAD_SCALE = 1.4826
+
+# Window rolling median/MAD untuk prefilter dan target recall default kalibrasinya
+PREFILTER_WINDOW = 20
+PREFILTER_TARGET_RECALL = 0.99
+# Prefilter hanya diaktifkan jika benar-benar menyaring; di atas ini full scoring lebih murah
+PREFILTER_MAX_PASS_RATE = 0.5
+# ...dan jika cascade terukur lebih cepat dari full scoring minimal sebesar ini
+PREFILTER_MIN_SPEEDUP = 1.5
+# Pengukuran waktu kalibrasi: ambil waktu tercepat dari beberapa ulangan
+PREFILTER_TIMING_REPEATS = 3
+
+# Jumlah feature matrix (per ticker & versi data) yang disimpan di cache
+FEATURE_CACHE_SIZE = 256
+
+FEATURE_LABELS = {
+    'foreign_buy': 'Pembelian asing',
+    'foreign_sell': 'Penjualan asing',
+    'local_buy': 'Pembelian domestik',
+    'local_sell': 'Penjualan domestik',
+    'net_foreign': 'Net asing',
+    'net_local': 'Net domestik',
+    'buy_sell_ratio': 'Rasio beli/jual',
+    'foreign_ratio': 'Porsi asing',
+    'volume_ratio': 'Rasio volume beli/jual',
+}
 
 class SimpleAnomalyDetector:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, contamination=0.15, n_estimators=100,
+                 max_samples='auto', max_features=1.0, n_jobs=-1):
         self.isolation_forest = IsolationForest(
-            contamination=0.15,  # Increased from 0.1 to detect more anomalies
+            contamination=contamination,  # Increased from 0.1 to detect more anomalies
             random_state=42,
-            n_estimators=100,
-            max_samples='auto',
-            n_jobs=-1  # Use all CPU cores
+            n_estimators=n_estimators,
+            max_samples=max_samples,
+            max_features=max_features,
+            n_jobs=n_jobs  # Use all CPU cores
         )
         self.scaler = StandardScaler()
         self.feature_columns = [
@@ -21,6 +76,20 @@ class SimpleAnomalyDetector:
             'net_foreign', 'net_local', 'buy_sell_ratio', 'foreign_ratio', 'volume_ratio'
         ]
         self.is_trained = False
+        # Metadata artifact (versi, parameter dan hasil evaluasi training)
+        self.model_version = None
+        self.training_info = {}
+        # Threshold skor yang dikalibrasi sekali saat training
+        self.score_thresholds = None
+        # Sketch distribusi training untuk monitoring drift
+        self.training_sketches = None
+        # Median dan MAD tiap feature dari data training untuk atribusi anomali
+        self.feature_medians = None
+        self.feature_mads = None
+        # Prefilter robust z-score di depan IsolationForest (aktif setelah dikalibrasi)
+        self.prefilter_z = None
+        self.prefilter_window = PREFILTER_WINDOW
+        self.prefilter_report = None
 
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
@@ -36,43 +105,159 @@ class SimpleAnomalyDetector:
             self.scaler = loaded_model.scaler
             self.feature_columns = loaded_model.feature_columns
             self.is_trained = loaded_model.is_trained
+            self.model_version = getattr(loaded_model, 'model_version', None)
+            self.training_info = getattr(loaded_model, 'training_info', {})
+            self.score_thresholds = getattr(loaded_model, 'score_thresholds', None)
+            self.training_sketches = getattr(loaded_model, 'training_sketches', None)
+            self.feature_medians = getattr(loaded_model, 'feature_medians', None)
+            self.feature_mads = getattr(loaded_model, 'feature_mads', None)
+            self.prefilter_z = getattr(loaded_model, 'prefilter_z', None)
+            self.prefilter_window = getattr(loaded_model, 'prefilter_window', PREFILTER_WINDOW)
+            self.prefilter_report = getattr(loaded_model, 'prefilter_report', None)
             
             print(f"✅ Model berhasil dimuat dari {model_path}")
         except Exception as e:
             print(f"❌ Error loading model: {e}")
             self.is_trained = False
 
-    def prepare_features(self, df):
-        """Prepare features untuk model"""
-        required_features = ['foreign_buy', 'foreign_sell', 'local_buy', 'local_sell']
-        for col in required_features:
-            if col not in df.columns:
-                df[col] = 0
-        
-        # Hitung derived features
-        if 'net_foreign' not in df.columns:
-            df['net_foreign'] = df['foreign_buy'] - df['foreign_sell']
-        if 'net_local' not in df.columns:
-            df['net_local'] = df['local_buy'] - df['local_sell']
-        if 'buy_sell_ratio' not in df.columns:
-            total_buy = df['foreign_buy'] + df['local_buy']
-            total_sell = df['foreign_sell'] + df['local_sell']
-            df['buy_sell_ratio'] = total_buy / (total_sell + 1)  # Avoid division by zero
-        if 'foreign_ratio' not in df.columns:
-            total_buy = df['foreign_buy'] + df['local_buy']
-            df['foreign_ratio'] = df['foreign_buy'] / (total_buy + 1)  # Avoid division by zero
-        
-        if 'volume_ratio' not in df.columns:
-            df['volume_ratio'] = df['buy_sell_ratio']
-        
-        X = df[self.feature_columns].copy()
+    def __getstate__(self):
+        # Cache feature tidak ikut disimpan ke file model
+        state = self.__dict__.copy()
+        state.pop('_feature_cache', None)
+        state.pop('_feature_cache_lock', None)
+        return state
+
+    def _cache(self):
+        if getattr(self, '_feature_cache', None) is None:
+            self._feature_cache = OrderedDict()
+            self._feature_cache_lock = threading.Lock()
+        return self._feature_cache, self._feature_cache_lock
+
+    def clear_feature_cache(self):
+        cache, lock = self._cache()
+        with lock:
+            cache.clear()
+
+    @staticmethod
+    def _feature_cache_key(df):
+        """Key cache dari df.attrs (stock_code & data_version, di-set oleh DataCollector)"""
+        stock_code = df.attrs.get('stock_code')
+        data_version = df.attrs.get('data_version')
+        if stock_code is None or data_version is None or df.empty:
+            return None
+        # attrs ikut terbawa saat DataFrame di-slice, jadi bentuk data ikut jadi bagian key
+        return (stock_code, data_version, len(df), df.index[0], df.index[-1])
+
+    @staticmethod
+    def _fill_missing(column):
+        """bfill lalu ffill lalu 0 untuk satu kolom (in-place)"""
+        missing = ~np.isfinite(column)
+        if not missing.any():
+            return
+        n = len(column)
+        positions = np.arange(n)
+        next_valid = np.minimum.accumulate(np.where(missing, n, positions)[::-1])[::-1]
+        has_next = next_valid < n
+        column[missing & has_next] = column[next_valid[missing & has_next]]
+        prev_valid = np.maximum.accumulate(np.where(missing, -1, positions))
+        still_missing = missing & ~has_next & (prev_valid >= 0)
+        column[still_missing] = column[prev_valid[still_missing]]
+        column[~np.isfinite(column)] = 0
+
+    def _compute_feature_matrix(self, df):
+        n = len(df)
+        zeros = np.zeros(n)
+
+        def column(name):
+            return df[name].to_numpy(dtype=np.float64) if name in df.columns else None
 
-        # Handle missing values dan infinite values
-        X = X.replace([np.inf, -np.inf], np.nan)
-        X = X.bfill().ffill().fillna(0)
+        foreign_buy = column('foreign_buy')
+        foreign_sell = column('foreign_sell')
+        local_buy = column('local_buy')
+        local_sell = column('local_sell')
+        foreign_buy = zeros if foreign_buy is None else foreign_buy
+        foreign_sell = zeros if foreign_sell is None else foreign_sell
+        local_buy = zeros if local_buy is None else local_buy
+        local_sell = zeros if local_sell is None else local_sell
 
+        # Derived features hanya dihitung jika tidak ada di data
+        derived = {
+            'foreign_buy': lambda: foreign_buy,
+            'foreign_sell': lambda: foreign_sell,
+            'local_buy': lambda: local_buy,
+            'local_sell': lambda: local_sell,
+            'net_foreign': lambda: foreign_buy - foreign_sell,
+            'net_local': lambda: local_buy - local_sell,
+            'buy_sell_ratio': lambda: (foreign_buy + local_buy) / (foreign_sell + local_sell + 1),  # Avoid division by zero
+            'foreign_ratio': lambda: foreign_buy / (foreign_buy + local_buy + 1),  # Avoid division by zero
+        }
+        derived['volume_ratio'] = lambda: column('buy_sell_ratio') if 'buy_sell_ratio' in df.columns else derived['buy_sell_ratio']()
+
+        X = np.empty((n, len(self.feature_columns)), dtype=np.float32)
+        for j, name in enumerate(self.feature_columns):
+            values = column(name)
+            if values is None:
+                values = derived[name]() if name in derived else zeros
+            X[:, j] = values
+            # Handle missing values dan infinite values
+            self._fill_missing(X[:, j])
+        return X
+
+    def feature_matrix(self, df):
+        """Feature matrix float32 contiguous (n_rows, n_features), tanpa mengubah df
+
+        Hasil di-cache per (ticker, versi data) sehingga scoring, training dan atribusi
+        memakai matrix yang sama.
+        """
+        key = self._feature_cache_key(df)
+        if key is not None:
+            cache, lock = self._cache()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None:
+                    cache.move_to_end(key)
+                    return entry['X']
+
+        X = self._compute_feature_matrix(df)
+        X.setflags(write=False)
+
+        if key is not None:
+            with lock:
+                cache[key] = {'X': X}
+                while len(cache) > FEATURE_CACHE_SIZE:
+                    cache.popitem(last=False)
         return X
 
+    def _scale(self, X):
+        # Model lama di-fit dengan DataFrame; beri nama kolom agar scaler tidak memberi warning
+        if hasattr(self.scaler, 'feature_names_in_'):
+            X = pd.DataFrame(X, columns=self.scaler.feature_names_in_, copy=False)
+        return self.scaler.transform(X)
+
+    def scaled_matrix(self, df, X=None):
+        """Feature yang sudah di-scale (float32), di-cache bersama feature matrix"""
+        X = self.feature_matrix(df) if X is None else X
+        key = self._feature_cache_key(df)
+        if key is not None:
+            cache, lock = self._cache()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and 'X_scaled' in entry:
+                    return entry['X_scaled']
+
+        X_scaled = np.ascontiguousarray(self._scale(X), dtype=np.float32)
+        X_scaled.setflags(write=False)
+
+        if key is not None:
+            with lock:
+                if key in cache:
+                    cache[key]['X_scaled'] = X_scaled
+        return X_scaled
+
+    def prepare_features(self, df):
+        """Prepare features untuk model (DataFrame view di atas feature_matrix)"""
+        return pd.DataFrame(self.feature_matrix(df), columns=self.feature_columns, index=df.index, copy=False)
+
     def train(self, broker_data_list):
         """Train model dengan multiple stocks data"""
         if not broker_data_list:
@@ -82,8 +267,8 @@ class SimpleAnomalyDetector:
         all_features = []
 
         for broker_df in broker_data_list:
-            X = self.prepare_features(broker_df)
-            if not X.empty:
+            X = self.feature_matrix(broker_df)
+            if len(X):
                 all_features.append(X)
 
         if not all_features:
@@ -91,72 +276,258 @@ class SimpleAnomalyDetector:
             return self
 
         # Combine all data
-        X_combined = pd.concat(all_features, ignore_index=True)
+        X_combined = np.concatenate(all_features)
 
         # Scale features
         X_scaled = self.scaler.fit_transform(X_combined)
+        # Scaler berubah, cache hasil scaling lama tidak valid lagi
+        self.clear_feature_cache()
 
         # Train model
         self.isolation_forest.fit(X_scaled)
         self.is_trained = True
 
+        # Kalibrasi threshold dari distribusi skor training
+        training_scores = self.isolation_forest.decision_function(X_scaled)
+        self.score_thresholds = self.calibrate_thresholds(training_scores, self.isolation_forest.contamination)
+        self.training_sketches = build_sketches(training_scores, pd.DataFrame(X_combined, columns=self.feature_columns))
+        self.feature_medians, self.feature_mads = self.robust_stats(X_combined.astype(np.float64))
+
         print(f"✅ Model trained dengan {len(X_combined)} samples")
         return self
 
-    def detect_anomalies(self, broker_df):
-        """Detect anomalies dalam broker data"""
+    def detect_anomalies(self, broker_df, stock_code=None, drift_monitor=None, prefilter=None):
+        """Detect anomalies dalam broker data
+
+        prefilter=None memakai prefilter jika sudah dikalibrasi; True/False untuk memaksa.
+        Baris yang lolos screening sebagai normal tidak diskor forest (anomaly_score NaN).
+        """
         if not self.is_trained:
             print("❌ Model belum di-training")
             return broker_df
 
-        X = self.prepare_features(broker_df)
-        if X.empty:
+        X = self.feature_matrix(broker_df)
+        if len(X) == 0:
             print("❌ Tidak ada features untuk detection")
             return broker_df
 
-        X_scaled = self.scaler.transform(X)
-
-        # Predict anomalies
-        predictions = self.isolation_forest.predict(X_scaled)
-        anomaly_scores = self.isolation_forest.decision_function(X_scaled)
+        prefilter_z = getattr(self, 'prefilter_z', None)
+        use_prefilter = prefilter_z is not None if prefilter is None else (prefilter and prefilter_z is not None)
 
-        # Convert to binary (1 = normal, -1 = anomaly) -> (0 = normal, 1 = anomaly)
-        anomalies_binary = [1 if x == -1 else 0 for x in predictions]
+        if use_prefilter:
+            anomaly_scores = np.full(len(X), np.nan)
+            candidates = self.prefilter_screen(X, broker_df.get('stock_code')) >= prefilter_z
+            if candidates.any():
+                X_scaled = self._scale(X[candidates])
+                anomaly_scores[candidates] = self.isolation_forest.decision_function(X_scaled)
+        else:
+            anomaly_scores = self.isolation_forest.decision_function(self.scaled_matrix(broker_df, X))
 
         results = broker_df.copy()
-        results['ml_anomaly'] = anomalies_binary
+        # Convert ke binary (0 = normal, 1 = anomaly) dengan threshold kalibrasi yang sama dengan serving
+        results['ml_anomaly'] = self.classify_scores(anomaly_scores)[0].astype(int)
         results['anomaly_score'] = anomaly_scores
-        results['anomaly_confidence'] = 1 - (1 / (1 + np.exp(-np.abs(anomaly_scores))))
+        results['anomaly_confidence'] = np.nan_to_num(1 - (1 / (1 + np.exp(-np.abs(anomaly_scores)))))
+        if use_prefilter:
+            results['prefilter_candidate'] = candidates
+
+        if drift_monitor is not None and stock_code:
+            drift_scores = anomaly_scores
+            if use_prefilter:
+                # Drift skor butuh distribusi penuh: baris baru yang lolos screening tetap diskor forest
+                # (hanya baris yang belum pernah masuk drift monitor, biasanya satu hari per ticker)
+                missing = drift_monitor.pending_rows(stock_code, results) & ~candidates
+                if missing.any():
+                    drift_scores = anomaly_scores.copy()
+                    drift_scores[missing] = self.isolation_forest.decision_function(self._scale(X[missing]))
+            features = pd.DataFrame(X, columns=self.feature_columns, copy=False)
+            drift_monitor.observe(stock_code, results, features, scores=drift_scores)
 
         return results
 
-    def detect_broker_anomalies(self, broker_data):
+    def rolling_robust_z(self, X, window=None, groups=None):
+        """Robust z-score tiap baris terhadap median/MAD rolling dari window baris sebelumnya
+
+        groups (misalnya kolom stock_code) memastikan window tidak melewati batas ticker;
+        data per ticker diasumsikan berurutan seperti output simulate_broker_flow.
+        """
+        window = window or getattr(self, 'prefilter_window', PREFILTER_WINDOW)
+        values = np.asarray(X, dtype=np.float64)
+
+        # Baris tanpa histori cukup memakai statistik training (atau statistik batch)
+        medians = getattr(self, 'feature_medians', None)
+        mads = getattr(self, 'feature_mads', None)
+        if medians is None or mads is None:
+            medians, mads = self.robust_stats(values)
+
+        rolling_median = self._shifted_rolling_median(values, window)
+        deviation = np.abs(values - rolling_median)
+        rolling_mad = self._shifted_rolling_median(deviation, window) * MAD_SCALE
+
+        if groups is not None:
+            # Posisi baris di dalam ticker-nya; window yang melewati batas ticker dibuang
+            position = pd.Series(np.asarray(groups)).groupby(np.asarray(groups)).cumcount().to_numpy()
+            rolling_median[position < window] = np.nan
+            rolling_mad[position < 2 * window] = np.nan
+
+        center = np.where(np.isnan(rolling_median), medians, rolling_median)
+        scale = np.where(np.isnan(rolling_mad) | (rolling_mad <= 0), mads, rolling_mad)
+        return (values - center) / scale
+
+    @staticmethod
+    def _shifted_rolling_median(values, window):
+        """Median rolling dari window baris sebelumnya (baris awal = NaN)"""
+        if bn is not None:
+            rolling = bn.move_median(values, window, min_count=window, axis=0)
+        else:
+            rolling = pd.DataFrame(values).rolling(window, min_periods=window).median().to_numpy()
+        shifted = np.full(values.shape, np.nan)
+        shifted[1:] = rolling[:-1]
+        return shifted
+
+    def prefilter_screen(self, X, groups=None):
+        """Skor screening = |robust z| maksimum antar feature"""
+        return np.abs(self.rolling_robust_z(X, groups=groups)).max(axis=1)
+
+    def calibrate_prefilter(self, labeled_df, target_recall=PREFILTER_TARGET_RECALL):
+        """Pilih ambang prefilter agar recall terhadap full scoring >= target_recall
+
+        labeled_df sebaiknya data simulasi berlabel (kolom anomaly_label) agar recall
+        terhadap ground truth juga dilaporkan.
+        """
+        if not self.is_trained:
+            print("❌ Model belum di-training")
+            return None
+
+        full = self.detect_anomalies(labeled_df, prefilter=False)
+        is_anomaly, _ = self.classify_scores(full['anomaly_score'].to_numpy())
+        screen = self.prefilter_screen(self.feature_matrix(labeled_df), labeled_df.get('stock_code'))
+
+        if not is_anomaly.any():
+            print("⚠️ Tidak ada anomali pada data kalibrasi, prefilter tidak diaktifkan")
+            return None
+
+        # Ambang = kuantil (1 - target) dari skor screening anomali hasil full scoring
+        threshold = float(np.quantile(screen[is_anomaly], 1 - target_recall, method='lower'))
+        candidates = screen >= threshold
+        report = {
+            'threshold_z': threshold,
+            'window': self.prefilter_window,
+            'target_recall': target_recall,
+            'recall_vs_full_scoring': float(candidates[is_anomaly].mean()),
+            'pass_rate': float(candidates.mean()),
+            'rows': int(len(labeled_df)),
+        }
+        keeps_recall = report['recall_vs_full_scoring'] >= target_recall
+        if 'anomaly_label' in labeled_df.columns:
+            labels = labeled_df['anomaly_label'].to_numpy().astype(bool)
+            if labels.any():
+                report['recall_vs_labels_full'] = float(is_anomaly[labels].mean())
+                report['recall_vs_labels_cascade'] = float((is_anomaly & candidates)[labels].mean())
+                keeps_recall = keeps_recall and (report['recall_vs_labels_cascade']
+                                                 >= target_recall * report['recall_vs_labels_full'])
+
+        # Waktu full scoring vs cascade pada data yang sama (cache feature dikosongkan tiap ulangan)
+        previous_z = self.prefilter_z
+        self.prefilter_z = threshold
+        timings = {}
+        for name, use in (('full', False), ('cascade', True)):
+            best = float('inf')
+            for _ in range(PREFILTER_TIMING_REPEATS):
+                self.clear_feature_cache()
+                start = time.perf_counter()
+                self.detect_anomalies(labeled_df, prefilter=use)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+        self.prefilter_z = previous_z
+        report['full_seconds'] = timings['full']
+        report['cascade_seconds'] = timings['cascade']
+        report['speedup'] = timings['full'] / timings['cascade'] if timings['cascade'] > 0 else 0.0
+        report['keeps_recall'] = bool(keeps_recall)
+
+        report['enabled'] = bool(report['pass_rate'] <= PREFILTER_MAX_PASS_RATE
+                                 and report['speedup'] >= PREFILTER_MIN_SPEEDUP and keeps_recall)
+        self.prefilter_z = threshold if report['enabled'] else None
+        self.prefilter_report = report
+        print(f"{'✅' if report['enabled'] else '⚠️'} Prefilter z >= {threshold:.2f}: {report['pass_rate']:.1%} baris ke forest, "
+              f"recall {report['recall_vs_full_scoring']:.1%} vs full scoring, speedup {report['speedup']:.2f}x"
+              f"{'' if report['enabled'] else ' - tidak diaktifkan'}")
+        return report
+
+    @staticmethod
+    def calibrate_thresholds(scores, contamination=None):
+        """Hitung threshold anomali dan severity dari distribusi skor
+
+        contamination menentukan fraksi skor training yang dianggap anomali, sehingga
+        parameter yang dipilih sweep benar-benar mengubah label yang disajikan.
+        """
+        if isinstance(contamination, (int, float)) and 0 < contamination < 0.5:
+            scale = contamination * 100 / THRESHOLD_PERCENTILES['anomaly']
+        else:
+            scale = 1.0
+        return {name: float(np.percentile(scores, pct * scale)) for name, pct in THRESHOLD_PERCENTILES.items()}
+
+    def get_thresholds(self, scores=None):
+        """Threshold tersimpan di model; model lama tanpa kalibrasi memakai persentil skor request"""
+        thresholds = getattr(self, 'score_thresholds', None)
+        if thresholds:
+            return thresholds
+        if scores is None or len(scores) == 0:
+            return None
+        return self.calibrate_thresholds(scores, self.isolation_forest.contamination)
+
+    def classify_score(self, score):
+        """Klasifikasi satu skor: (is_anomaly, severity) - cukup perbandingan O(1)"""
+        thresholds = self.get_thresholds()
+        if thresholds is None:
+            return False, 'low'
+        if score < thresholds['critical']:
+            return True, 'critical'
+        if score < thresholds['high']:
+            return True, 'high'
+        if score < thresholds['medium']:
+            return True, 'medium'
+        return score < thresholds['anomaly'], 'low'
+
+    def classify_scores(self, scores, thresholds=None):
+        """Versi vectorized classify_score untuk array skor"""
+        scores = np.asarray(scores, dtype=np.float64)
+        thresholds = thresholds or self.get_thresholds(scores)
+        is_anomaly = scores < thresholds['anomaly']
+        severity = np.select(
+            [scores < thresholds['critical'], scores < thresholds['high'], scores < thresholds['medium']],
+            ['critical', 'high', 'medium'],
+            default='low'
+        )
+        return is_anomaly, severity
+
+    def detect_broker_anomalies(self, broker_data, stock_code=None, drift_monitor=None):
         """Detect anomalies dan return list of anomaly records"""
         if not self.is_trained:
             print("❌ Model belum di-training")
             return []
         
         try:
-            results = self.detect_anomalies(broker_data)
-            anomaly_threshold = np.percentile(results['anomaly_score'], 20)  # Bottom 20% are anomalies
-            results['ml_anomaly'] = results['anomaly_score'] < anomaly_threshold
+            results = self.detect_anomalies(broker_data, stock_code, drift_monitor)
+            is_anomaly, severities = self.classify_scores(results['anomaly_score'].to_numpy())
+            results['ml_anomaly'] = is_anomaly
+            results['severity'] = severities
             
             anomalies = results[results['ml_anomaly'] == True]
+            attributions = self.attribute_features(self.feature_matrix(broker_data)[results['ml_anomaly'].to_numpy()])
             
             anomaly_records = []
-            for _, row in anomalies.iterrows():
-                # Hitung severity berdasarkan anomaly score
-                score = row.get('anomaly_score', 0)
-                confidence = row.get('anomaly_confidence', 0)
-                
-                severity = 'low'
-                if score < np.percentile(results['anomaly_score'], 5):
-                    severity = 'critical'
-                elif score < np.percentile(results['anomaly_score'], 10):
-                    severity = 'high'
-                elif score < np.percentile(results['anomaly_score'], 15):
-                    severity = 'medium'
-                
+            for i, (_, row) in enumerate(anomalies.iterrows()):
+                z_scores = attributions['z_scores'][i]
+                top = [
+                    {
+                        'feature': self.feature_columns[j],
+                        'label': FEATURE_LABELS.get(self.feature_columns[j], self.feature_columns[j]),
+                        'z_score': round(float(z_scores[j]), 2),
+                        'direction': 'high' if z_scores[j] > 0 else 'low',
+                    }
+                    for j in attributions['top_indices'][i]
+                ]
                 anomaly_records.append({
                     'date': row.get('date', datetime.now()).isoformat() if hasattr(row.get('date'), 'isoformat') else str(row.get('date', datetime.now())),
                     'foreign_buy': float(row.get('foreign_buy', 0)),
@@ -168,8 +539,10 @@ class SimpleAnomalyDetector:
                     'volume_ratio': float(row.get('volume_ratio', row.get('buy_sell_ratio', 0))),
                     'anomaly_score': float(row.get('anomaly_score', 0)),
                     'anomaly_confidence': float(row.get('anomaly_confidence', 0)),
-                    'severity': severity,
-                    'explanation': self._generate_anomaly_explanation(row),
+                    'severity': row['severity'],
+                    'top_feature': top[0]['feature'] if top else None,
+                    'attributions': top,
+                    'explanation': self._generate_anomaly_explanation(row, dict(zip(self.feature_columns, z_scores))),
                     'is_anomaly': True  # Added explicit anomaly flag
                 })
             
@@ -181,40 +554,70 @@ class SimpleAnomalyDetector:
             traceback.print_exc()
             return []
     
-    def _generate_anomaly_explanation(self, row):
-        """Generate penjelasan untuk anomali yang terdeteksi"""
+    @staticmethod
+    def robust_stats(X):
+        """Median dan MAD (diskalakan ke standar deviasi) tiap kolom"""
+        medians = np.median(X, axis=0)
+        mads = np.median(np.abs(X - medians), axis=0) * MAD_SCALE
+        # Feature konstan: pakai standar deviasi agar tidak membagi dengan nol
+        stds = X.std(axis=0)
+        mads = np.where(mads > 0, mads, np.where(stds > 0, stds, 1.0))
+        return medians, mads
+
+    def attribute_features(self, X):
+        """Robust z-score tiap feature untuk seluruh batch anomali sekaligus"""
+        values = np.asarray(X, dtype=np.float64)
+        if len(values) == 0:
+            return {'z_scores': np.empty((0, len(self.feature_columns))), 'top_indices': np.empty((0, 0), dtype=int)}
+
+        medians = getattr(self, 'feature_medians', None)
+        mads = getattr(self, 'feature_mads', None)
+        if medians is None or mads is None:
+            # Model lama tanpa statistik training: pakai batch ini sebagai referensi
+            medians, mads = self.robust_stats(values)
+
+        z_scores = (values - medians) / mads
+        k = min(TOP_ATTRIBUTIONS, z_scores.shape[1])
+        top_indices = np.argsort(-np.abs(z_scores), axis=1)[:, :k]
+        return {'z_scores': z_scores, 'top_indices': top_indices}
+
+    def _generate_anomaly_explanation(self, row, z_scores):
+        """Generate penjelasan untuk anomali yang terdeteksi berdasarkan robust z-score"""
         explanations = []
         
         net_foreign = row.get('net_foreign', 0)
         net_local = row.get('net_local', 0)
-        buy_sell_ratio = row.get('buy_sell_ratio', 1)
-        volume_ratio = row.get('volume_ratio', buy_sell_ratio)
+        z_foreign = z_scores.get('net_foreign', 0)
+        z_local = z_scores.get('net_local', 0)
+        z_volume = z_scores.get('volume_ratio', z_scores.get('buy_sell_ratio', 0))
+        volume_ratio = row.get('volume_ratio', row.get('buy_sell_ratio', 1))
         
-        if abs(net_foreign) > 30000:
-            if net_foreign > 0:
-                explanations.append(f"Asing net buy tinggi: Rp {abs(net_foreign):,.0f}M")
-            else:
-                explanations.append(f"Asing net sell tinggi: Rp {abs(net_foreign):,.0f}M")
+        if abs(z_foreign) > ATTRIBUTION_Z:
+            side = 'buy' if net_foreign > 0 else 'sell'
+            explanations.append(f"Asing net {side} tidak biasa: Rp {abs(net_foreign):,.0f}M ({z_foreign:+.1f}σ)")
         
-        if abs(net_local) > 50000:
-            if net_local > 0:
-                explanations.append(f"Domestik net buy tinggi: Rp {abs(net_local):,.0f}M")
-            else:
-                explanations.append(f"Domestik net sell tinggi: Rp {abs(net_local):,.0f}M")
+        if abs(z_local) > ATTRIBUTION_Z:
+            side = 'buy' if net_local > 0 else 'sell'
+            explanations.append(f"Domestik net {side} tidak biasa: Rp {abs(net_local):,.0f}M ({z_local:+.1f}σ)")
         
         # Check for potential bandar manipulation
-        if net_foreign < -30000 and net_local > 50000:
+        if z_foreign < -ATTRIBUTION_Z and z_local > ATTRIBUTION_Z:
             explanations.append("⚠️ Potensi akumulasi bandar: Asing jual, domestik beli kuat")
-        elif net_foreign > 30000 and net_local < -50000:
+        elif z_foreign > ATTRIBUTION_Z and z_local < -ATTRIBUTION_Z:
             explanations.append("⚠️ Potensi distribusi bandar: Asing beli, domestik jual")
         
-        if volume_ratio > 1.8:
-            explanations.append(f"Tekanan beli berlebihan: {volume_ratio:.2f}x")
-        elif volume_ratio < 0.6:
-            explanations.append(f"Tekanan jual berlebihan: {volume_ratio:.2f}x")
+        if z_volume > ATTRIBUTION_Z:
+            explanations.append(f"Tekanan beli berlebihan: {volume_ratio:.2f}x ({z_volume:+.1f}σ)")
+        elif z_volume < -ATTRIBUTION_Z:
+            explanations.append(f"Tekanan jual berlebihan: {volume_ratio:.2f}x ({z_volume:+.1f}σ)")
         
         if not explanations:
-            explanations.append("Pola trading tidak normal terdeteksi oleh AI")
+            # Tidak ada feature utama yang ekstrem: sebutkan pendorong terbesar
+            feature, z = max(z_scores.items(), key=lambda item: abs(item[1]), default=(None, 0))
+            if feature is not None and abs(z) > 1:
+                explanations.append(f"{FEATURE_LABELS.get(feature, feature)} menyimpang {z:+.1f}σ dari normal")
+            else:
+                explanations.append("Pola trading tidak normal terdeteksi oleh AI")
         
         return " | ".join(explanations)
 
@@ -0,0 +1,234 @@
+import os
+import gzip
+import json
+import hashlib
+import mimetypes
+
+from flask import request, url_for
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+from werkzeug.wrappers import Request
+
+from modules.file_lock import file_lock, write_atomic
+
+try:
+    # Varian .br hanya dibuat jika paket brotli terpasang; tanpa itu cukup .gz
+    import brotli
+except ImportError:
+    brotli = None
+
+# Folder di dalam static/ yang di-fingerprint
+ASSET_DIRS = ('css', 'js')
+# Output build: static/dist/<nama>.<hash>.<ext> (+ .br/.gz) dan manifest.json
+DIST_DIR = 'dist'
+MANIFEST_FILENAME = 'manifest.json'
+# Lock antar worker selama build; file tersembunyi di dist/ tidak pernah dihapus cleanup
+BUILD_LOCK_FILENAME = '.build.lock'
+HASH_LENGTH = 12
+
+# Content-Encoding dan suffix file precompressed, urut preferensi
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Prefix URL asset ber-hash
+ASSET_URL_PATH = '/assets'
+
+# Nama file berubah setiap isinya berubah, jadi browser boleh menyimpan selamanya
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(logical, digest):
+    """'css/style.css' -> 'css/style.<hash>.css'"""
+    root, ext = os.path.splitext(logical)
+    return f"{root}.{digest}{ext}"
+
+
+def source_files(static_folder):
+    """Path logis (relatif ke static/) semua file CSS/JS sumber"""
+    files = []
+    for directory in ASSET_DIRS:
+        base = os.path.join(static_folder, directory)
+        for root, _, names in os.walk(base):
+            for name in names:
+                if name.endswith(('.css', '.js')):
+                    path = os.path.relpath(os.path.join(root, name), static_folder)
+                    files.append(path.replace(os.sep, '/'))
+    return sorted(files)
+
+
+def _read_manifest(dist):
+    try:
+        with open(os.path.join(dist, MANIFEST_FILENAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _compress(data):
+    """Varian precompressed per Content-Encoding (gzip deterministik, mtime=0)"""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+
+def build_assets(static_folder):
+    """Tulis file ber-hash dan varian .br/.gz ke static/dist, return manifest {logis: hashed}
+
+    Build dijalankan di bawah file lock agar worker lain tidak membangun bersamaan. Generasi
+    sebelumnya (manifest lama) dipertahankan supaya worker yang belum reload tetap bisa menyajikannya.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    with file_lock(os.path.join(dist, BUILD_LOCK_FILENAME)):
+        return _build_locked(static_folder, dist)
+
+
+def _build_locked(static_folder, dist):
+    previous = set(_read_manifest(dist).values())
+    manifest = {}
+    written = set()
+    for logical in source_files(static_folder):
+        with open(os.path.join(static_folder, logical), 'rb') as f:
+            data = f.read()
+        name = hashed_name(logical, content_hash(data))
+        manifest[logical] = name
+        target = os.path.join(dist, name)
+        if not os.path.exists(target):
+            write_atomic(target, data)
+        written.add(name)
+        missing = [suffix for _, suffix in ENCODINGS if not os.path.exists(target + suffix)]
+        variants = _compress(data) if missing else {}
+        for encoding, suffix in ENCODINGS:
+            if suffix in missing and encoding in variants:
+                write_atomic(target + suffix, variants[encoding])
+            if os.path.exists(target + suffix):
+                written.add(name + suffix)
+
+    # Hapus hasil build yang tidak direferensikan manifest baru maupun generasi sebelumnya
+    suffixes = [''] + [suffix for _, suffix in ENCODINGS]
+    keep = written | {name + suffix for name in previous for suffix in suffixes}
+    for root, _, names in os.walk(dist):
+        for file_name in names:
+            relative = os.path.relpath(os.path.join(root, file_name), dist).replace(os.sep, '/')
+            if file_name.startswith('.') or relative == MANIFEST_FILENAME or relative in keep:
+                continue
+            try:
+                os.remove(os.path.join(root, file_name))
+            except OSError:
+                pass
+
+    write_atomic(os.path.join(dist, MANIFEST_FILENAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+class StaticAssets:
+    """Asset CSS/JS dengan nama ber-hash, Cache-Control immutable dan varian precompressed
+
+    Dilayani sebagai middleware WSGI di depan Flask: request asset tidak menyentuh session
+    (tidak ada Vary: Cookie) dan tidak memicu inisialisasi komponen di before_request.
+    """
+
+    def __init__(self, app=None, url_path=ASSET_URL_PATH):
+        self.url_path = url_path
+        self.manifest = {}
+        self.static_folder = None
+        self.auto_rebuild = False
+        self._files = {}
+        self._mtime = None
+        self._wsgi_app = None
+        self._folders = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.auto_rebuild = app.config.get('ASSETS_AUTO_REBUILD', app.debug)
+        self.load()
+        self._wsgi_app = app.wsgi_app
+        app.wsgi_app = self
+        app.jinja_env.globals['asset_url'] = self.url
+
+    def add_folder(self, url_path, folder):
+        """Layani folder berisi file bernama hash isi (mis. thumbnail avatar) dengan cache immutable"""
+        self._folders[url_path] = folder
+
+    def _source_mtime(self):
+        return max((os.path.getmtime(os.path.join(self.static_folder, logical))
+                    for logical in source_files(self.static_folder)), default=0)
+
+    def load(self):
+        """Pakai manifest hasil scripts/build_assets.py; build ulang jika tidak ada atau basi"""
+        manifest = _read_manifest(os.path.join(self.static_folder, DIST_DIR))
+
+        current = {}
+        for logical in source_files(self.static_folder):
+            with open(os.path.join(self.static_folder, logical), 'rb') as f:
+                current[logical] = hashed_name(logical, content_hash(f.read()))
+        dist = os.path.join(self.static_folder, DIST_DIR)
+        if manifest != current or not all(os.path.exists(os.path.join(dist, name)) for name in current.values()):
+            manifest = build_assets(self.static_folder)
+            print(f"📦 Build {len(manifest)} asset statis ke static/{DIST_DIR}")
+
+        self.manifest = manifest
+        self._files = {name: logical for logical, name in manifest.items()}
+        self._mtime = self._source_mtime()
+
+    def url(self, logical):
+        """URL ber-hash untuk template; file di luar css/ dan js/ tetap lewat route static"""
+        if self.auto_rebuild and self._source_mtime() != self._mtime:
+            self.load()
+        name = self.manifest.get(logical)
+        if name is None:
+            return url_for('static', filename=logical)
+        return f"{request.script_root}{self.url_path}/{name}"
+
+    def serve_file(self, environ, folder, filename):
+        path = safe_join(folder, filename)
+        if path is None or not os.path.isfile(path):
+            return NotFound()
+        response = send_file(path, environ, mimetype=mimetypes.guess_type(filename)[0])
+        response.headers.pop('Content-Disposition', None)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def serve(self, environ, filename):
+        if filename not in self._files:
+            return NotFound()
+        dist = os.path.join(self.static_folder, DIST_DIR)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accept = Request(environ).accept_encodings
+
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if accept[candidate] and os.path.exists(os.path.join(dist, filename + suffix)):
+                encoding = candidate
+                break
+
+        path = os.path.join(dist, filename + (dict(ENCODINGS)[encoding] if encoding else ''))
+        response = send_file(path, environ, mimetype=mimetype)
+        # Nama file di header akan ber-suffix .gz/.br; asset tidak untuk di-download
+        response.headers.pop('Content-Disposition', None)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(self.url_path + '/'):
+            response = self.serve(environ, path[len(self.url_path) + 1:])
+        else:
+            for url_path, folder in self._folders.items():
+                if path.startswith(url_path + '/'):
+                    response = self.serve_file(environ, folder, path[len(url_path) + 1:])
+                    break
+            else:
+                return self._wsgi_app(environ, start_response)
+        if environ.get('REQUEST_METHOD') not in ('GET', 'HEAD'):
+            response = MethodNotAllowed(valid_methods=['GET', 'HEAD'])
+        return response(environ, start_response)
@@ -0,0 +1,309 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from modules.simulator import simulate_price_path
+
+# Horizon forward return (hari bursa) untuk event study
+DEFAULT_HORIZONS = (1, 5, 10, 20)
+SEVERITY_ORDER = ['critical', 'high', 'medium', 'low']
+
+# Harga awal path simulasi; tidak berpengaruh ke return
+SIMULATED_ANCHOR_PRICE = 2500
+# Label output mode simulasi: random walk tanpa sinyal, hanya untuk uji plumbing
+SIMULATED_LABEL = 'SIMULASI (smoke test plumbing, bukan hasil backtest)'
+
+# Kode rekomendasi vectorized -> label generate_trading_recommendation
+RECOMMENDATION_LABELS = {2: 'STRONG BUY', 1: 'BUY', 0: 'HOLD', -1: 'SELL', -2: 'STRONG SELL'}
+VOLUME_SIGNAL_CODES = {'Sangat Tinggi': 2, 'Tinggi': 1, 'Normal': 0, 'Rendah': -1}
+TRADING_DAYS_PER_YEAR = 252
+
+
+def load_ohlcv_panels(stock_codes, start, end, data_collector=None, period='5y', fields=('Close', 'Volume'),
+                      simulated=False):
+    """Panel per field (tanggal x ticker) dari histori harian real data_collector
+
+    simulated=True memakai path harga acak dan hanya untuk smoke test plumbing: return-nya noise,
+    jadi angka backtest/event study dari mode ini tidak bermakna.
+    """
+    if data_collector is None and not simulated:
+        raise ValueError("Butuh data_collector untuk histori harian real (simulated=True hanya untuk smoke test)")
+    if simulated:
+        print(f"⚠️ Harga {SIMULATED_LABEL}")
+    columns = {field: {} for field in fields}
+    for stock_code in stock_codes:
+        if not simulated:
+            hist = data_collector.get_daily_data(stock_code, period)
+            if hist is None or hist.empty:
+                print(f"  → {stock_code}: ⚠️ No price data")
+                continue
+            index = pd.DatetimeIndex(pd.to_datetime(hist['Date']))
+        else:
+            hist = simulate_price_path(stock_code, start, end, SIMULATED_ANCHOR_PRICE,
+                                       freq='D', volatility=0.015, wick=0.01)
+            index = pd.DatetimeIndex(hist['Date'])
+        keep = ~index.duplicated(keep='last')
+        for field in fields:
+            columns[field][stock_code] = pd.Series(hist[field].to_numpy(dtype=np.float64)[keep], index=index[keep])
+
+    if not any(columns.values()):
+        raise ValueError("Tidak ada histori harga harian untuk ticker yang diminta")
+
+    panels = {}
+    for field, series in columns.items():
+        panel = pd.DataFrame(series).sort_index()
+        # Hari tanpa transaksi: harga dianggap tetap (return 0), volume 0
+        panels[field] = panel.fillna(0) if field == 'Volume' else panel.ffill()
+    return panels
+
+
+def load_price_panel(stock_codes, start, end, data_collector=None, period='5y', simulated=False):
+    """Panel close (tanggal x ticker)"""
+    return load_ohlcv_panels(stock_codes, start, end, data_collector, period, fields=('Close',),
+                             simulated=simulated)['Close']
+
+
+def forward_returns(close, horizons=DEFAULT_HORIZONS):
+    """Return sederhana close[t+h] / close[t] - 1 untuk array (T, N); NaN di luar data"""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full((len(horizons),) + close.shape, np.nan)
+    for i, h in enumerate(horizons):
+        if h < len(close):
+            out[i, :-h] = close[h:] / close[:-h] - 1
+    return out
+
+
+def events_from_records(records_by_ticker):
+    """Gabungkan output detect_broker_anomalies semua ticker menjadi satu DataFrame event"""
+    frames = []
+    for stock_code, records in records_by_ticker.items():
+        if not records:
+            continue
+        df = pd.DataFrame(records, columns=['date', 'severity', 'anomaly_score', 'net_foreign'])
+        df.insert(0, 'stock_code', stock_code)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=['stock_code', 'date', 'severity', 'anomaly_score', 'net_foreign'])
+    events = pd.concat(frames, ignore_index=True)
+    events['date'] = pd.to_datetime(events['date']).dt.tz_localize(None).dt.normalize()
+    return events
+
+
+def event_study(events, prices, horizons=DEFAULT_HORIZONS):
+    """Join event ke forward return per horizon; return (per-event DataFrame, ringkasan per severity)
+
+    Excess return diukur terhadap rata-rata sama-bobot semua ticker di panel pada tanggal yang
+    sama. Arah sinyal mengikuti net foreign (akumulasi asing = naik), hit jika excess searah.
+    """
+    horizons = tuple(horizons)
+    fwd = forward_returns(prices.to_numpy(), horizons)
+    with warnings.catch_warnings():
+        # Tanggal tanpa return sama sekali (ujung panel) menghasilkan NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        benchmark = np.nanmean(fwd, axis=2, keepdims=True)
+    excess = fwd - benchmark
+
+    # Entry di close hari event, atau hari bursa pertama setelahnya
+    dates = prices.index.to_numpy(dtype='datetime64[ns]')
+    row = np.searchsorted(dates, events['date'].to_numpy(dtype='datetime64[ns]'), side='left')
+    col = prices.columns.get_indexer(events['stock_code'])
+    valid = (row < len(dates)) & (col >= 0)
+    row, col = np.where(valid, row, 0), np.where(valid, col, 0)
+
+    event_returns = np.where(valid, fwd[:, row, col], np.nan)
+    event_excess = np.where(valid, excess[:, row, col], np.nan)
+    direction = np.where(events['net_foreign'].to_numpy(dtype=np.float64) < 0, -1.0, 1.0)
+
+    detail = events.reset_index(drop=True).copy()
+    detail['direction'] = direction.astype(int)
+    for i, h in enumerate(horizons):
+        detail[f'ret_{h}d'] = event_returns[i]
+        detail[f'excess_{h}d'] = event_excess[i]
+
+    # Ringkasan long-format: satu baris per (severity, horizon), termasuk 'all'
+    n_events = len(detail)
+    severity = np.concatenate((detail['severity'].to_numpy(dtype=object), np.full(n_events, 'all', dtype=object)))
+    summary = []
+    for i, h in enumerate(horizons):
+        ret = np.tile(event_returns[i], 2)
+        exc = np.tile(event_excess[i], 2)
+        signed = exc * np.tile(direction, 2)
+        frame = pd.DataFrame({
+            'severity': severity,
+            'return': ret,
+            'excess': exc,
+            'signed_excess': signed,
+            'hit': np.where(np.isfinite(signed), signed > 0, np.nan),
+        }).dropna(subset=['excess'])
+        grouped = frame.groupby('severity')
+        stats = pd.DataFrame({
+            'events': grouped.size(),
+            'hit_rate': grouped['hit'].mean(),
+            'mean_return': grouped['return'].mean(),
+            'mean_excess': grouped['excess'].mean(),
+            'mean_signed_excess': grouped['signed_excess'].mean(),
+            't_stat': grouped['signed_excess'].mean() / (grouped['signed_excess'].std() / np.sqrt(grouped.size())),
+        })
+        stats.insert(0, 'horizon', h)
+        summary.append(stats)
+
+    summary = pd.concat(summary).reset_index()
+    order = {name: i for i, name in enumerate(SEVERITY_ORDER + ['all'])}
+    summary = summary.sort_values(['horizon', 'severity'], key=lambda s: s.map(order) if s.name == 'severity' else s)
+    return detail, summary.reset_index(drop=True)
+
+
+def _rolling_mean(values, window, min_periods=None):
+    """Rolling mean per kolom untuk array (T, N) lewat cumsum; NaN jika data < min_periods"""
+    min_periods = window if min_periods is None else min_periods
+    valid = np.isfinite(values)
+    csum = np.vstack((np.zeros((1, values.shape[1])), np.cumsum(np.where(valid, values, 0), axis=0)))
+    ccount = np.vstack((np.zeros((1, values.shape[1])), np.cumsum(valid, axis=0)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    total = csum[end] - csum[start]
+    count = ccount[end] - ccount[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count >= min_periods, total / count, np.nan)
+
+
+def _ema(values, span):
+    return pd.DataFrame(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def technical_signal_arrays(close, volume, macd=False):
+    """Sinyal RSI/MA/MACD/volume untuk seluruh panel (T, N), aturan sama dengan get_technical_signals_real_time
+
+    Dashboard belum menghitung MACD (selalu Neutral); macd=True memakai crossover MACD 12/26/9.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+
+    # RSI 14 (rata-rata sederhana gain/loss, dibulatkan 2 desimal seperti di dashboard)
+    delta = np.vstack((np.full((1, close.shape[1]), np.nan), np.diff(close, axis=0)))
+    gain = _rolling_mean(np.where(delta > 0, delta, 0), 14)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0), 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = np.round(100 - 100 / (1 + gain / loss), 2)
+
+    # Harga di atas MA20 = bullish, selain itu (termasuk MA belum tersedia) bearish
+    ma_20 = _rolling_mean(close, 20)
+    ma_signal = np.where(close > ma_20, 1, -1)
+
+    # MACD 12/26/9: bullish jika MACD di atas signal line
+    if macd:
+        macd_line = _ema(close, 12) - _ema(close, 26)
+        macd_signal = np.sign(macd_line - _ema(macd_line, 9)).astype(int)
+        macd_signal[:26] = 0
+    else:
+        macd_signal = np.zeros_like(ma_signal)
+
+    # Volume dibanding rata-rata 20 candle terakhir (termasuk candle ini)
+    avg_volume = _rolling_mean(volume, 20, min_periods=1)
+    volume_signal = np.select(
+        [volume > avg_volume * 2.0, volume > avg_volume * 1.5, volume < avg_volume * 0.5],
+        [2, 1, -1], default=0
+    )
+
+    # Kurang dari 14 candle: semua sinyal neutral
+    rsi[:13] = 50
+    ma_signal[:13] = 0
+    macd_signal[:13] = 0
+    volume_signal[:13] = 0
+    return {'rsi': rsi, 'ma_signal': ma_signal, 'macd_signal': macd_signal, 'volume_signal': volume_signal}
+
+
+def recommendation_arrays(rsi, ma_signal, macd_signal, volume_signal):
+    """Versi vectorized skor generate_trading_recommendation: return (code, score, confidence)
+
+    ma_signal/macd_signal: 1 bullish, -1 bearish, 0 neutral. volume_signal: kode VOLUME_SIGNAL_CODES.
+    """
+    rsi = np.asarray(rsi, dtype=np.float64)
+    ma_signal = np.asarray(ma_signal)
+    macd_signal = np.asarray(macd_signal)
+    volume_signal = np.asarray(volume_signal)
+
+    with np.errstate(invalid='ignore'):
+        rsi_zones = [rsi < 30, rsi < 40, rsi > 70, rsi > 60]
+    score = np.select(rsi_zones, [3, 2, -3, -2], default=0)
+    confidence = np.select(rsi_zones, [25, 15, 25, 15], default=0)
+
+    score = score + 2 * ma_signal + 2 * macd_signal
+    confidence = confidence + 20 * (ma_signal != 0) + 20 * (macd_signal != 0)
+
+    # Volume tinggi mengonfirmasi arah skor, volume rendah mengurangi confidence
+    high_volume = volume_signal >= 1
+    score = score + np.where(high_volume, np.sign(score), 0)
+    confidence = confidence + np.where(high_volume & (score != 0), 15, 0) - np.where(volume_signal == -1, 10, 0)
+
+    code = np.select([score >= 3, score >= 1, score <= -3, score <= -1], [2, 1, -2, -1], default=0)
+    confidence = np.select(
+        [np.abs(code) == 2, np.abs(code) == 1],
+        [np.minimum(confidence, 95), np.minimum(confidence, 75)],
+        default=np.maximum(confidence, 30)
+    )
+    return code, score, confidence
+
+
+def _ffill_positions(target):
+    """Forward-fill NaN (HOLD) sepanjang waktu per kolom; awal tanpa posisi = 0"""
+    rows = np.where(np.isnan(target), 0, np.arange(len(target))[:, None])
+    rows = np.maximum.accumulate(rows, axis=0)
+    filled = target[rows, np.arange(target.shape[1])]
+    return np.nan_to_num(filled)
+
+
+def max_drawdown(equity):
+    """Drawdown maksimum per kolom dari kurva equity (T, N)"""
+    peak = np.maximum.accumulate(equity, axis=0)
+    return (equity / peak - 1).min(axis=0)
+
+
+def backtest_signals(close, recommendation, cost_bps=15, allow_short=False,
+                     periods_per_year=TRADING_DAYS_PER_YEAR):
+    """Backtest BUY/SELL/HOLD: BUY = long, SELL = keluar (atau short), HOLD = pertahankan posisi
+
+    Sinyal di close hari t dieksekusi untuk return t -> t+1. Biaya dikenakan per perubahan posisi.
+    Return (dict array per ticker, dict metrik portfolio sama-bobot).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    recommendation = np.asarray(recommendation)
+    target = np.where(recommendation > 0, 1.0,
+                      np.where(recommendation < 0, -1.0 if allow_short else 0.0, np.nan))
+    position = _ffill_positions(target)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        asset_returns = np.nan_to_num(close[1:] / close[:-1] - 1)
+    held = position[:-1]
+    trades = np.abs(np.diff(np.vstack((np.zeros((1, close.shape[1])), position)), axis=0))
+    # Perubahan posisi di close t dibayar pada return t -> t+1 yang pertama memakai posisi baru
+    costs = trades[:-1] * cost_bps / 10000
+    strategy_returns = held * asset_returns - costs
+
+    years = max(len(strategy_returns) / periods_per_year, 1e-9)
+    equity = np.cumprod(1 + strategy_returns, axis=0)
+    per_ticker = {
+        'total_return': equity[-1] - 1 if len(equity) else np.zeros(close.shape[1]),
+        'max_drawdown': max_drawdown(equity) if len(equity) else np.zeros(close.shape[1]),
+        'turnover': trades.sum(axis=0) / years,
+        'trades': (trades > 0).sum(axis=0),
+        'exposure': np.abs(held).mean(axis=0) if len(held) else np.zeros(close.shape[1]),
+        'buy_hold_return': np.nanprod(1 + asset_returns, axis=0) - 1,
+    }
+
+    portfolio_returns = strategy_returns.mean(axis=1)
+    portfolio_equity = np.cumprod(1 + portfolio_returns)
+    volatility = portfolio_returns.std() * np.sqrt(periods_per_year)
+    annual_return = portfolio_equity[-1] ** (1 / years) - 1 if len(portfolio_equity) else 0.0
+    portfolio = {
+        'total_return': float(portfolio_equity[-1] - 1) if len(portfolio_equity) else 0.0,
+        'annual_return': float(annual_return),
+        'annual_volatility': float(volatility),
+        'sharpe': float(portfolio_returns.mean() / portfolio_returns.std() * np.sqrt(periods_per_year))
+        if portfolio_returns.std() > 0 else 0.0,
+        'max_drawdown': float(max_drawdown(portfolio_equity[:, None])[0]) if len(portfolio_equity) else 0.0,
+        'turnover': float(trades.mean(axis=1).sum() / years),
+        'trades': int((trades > 0).sum()),
+    }
+    return per_ticker, portfolio
@@ -1,30 +1,138 @@
-import yfinance as yf
 import pandas as pd
-import requests
 from datetime import datetime, timedelta
 import numpy as np
+import os
 import time
 import json
+import atexit
+import tempfile
+import threading
+from config import LAST_CLOSE_FILE
+from modules.simulator import simulate_broker_flow, simulate_price_path
+from modules.sources import build_sources_from_env
+from modules.market_cache import MarketDataCache
+from modules.trading_calendar import get_calendar
+
+# Harga awal fallback jika belum pernah ada harga real untuk ticker tersebut
+DEFAULT_FALLBACK_PRICE = 25000
+# Data fallback berlaku satu bar; bar berikutnya path dibuat ulang sampai waktu sekarang
+FALLBACK_BAR = '5min'
+# Close terakhir ditulis ke file berkala oleh thread background (dan saat proses berhenti)
+CLOSE_FLUSH_SECONDS = 30
 
 class DataCollector:
-    def __init__(self):
-        self.idx_base_url = "https://www.idx.co.id"
+    def __init__(self, yahoo_source=None, idx_source=None, cache=None, close_store=LAST_CLOSE_FILE):
+        # Sumber upstream bisa diganti (record/replay) untuk load test dan CI tanpa jaringan
+        if yahoo_source is None or idx_source is None:
+            env_yahoo, env_idx = build_sources_from_env()
+            yahoo_source = yahoo_source or env_yahoo
+            idx_source = idx_source or env_idx
+        self.yahoo = yahoo_source
+        self.idx = idx_source
+        # Harga close real terakhir per ticker, dipakai sebagai anchor data fallback.
+        # Disimpan ke file JSON (None = hanya di memori) supaya anchor tidak hilang saat restart
+        self.close_store = close_store
+        self._close_lock = threading.Lock()
+        self._closes_dirty = False
+        self._close_flusher = None
+        self.last_known_close = self._load_closes()
+        # Data fallback per ticker: (bar terakhir, DataFrame), dipakai ulang selama bar yang sama
+        self._fallback_cache = {}
+        # Cache stale-while-revalidate untuk quote, bar intraday/harian dan broker summary
+        self.cache = cache or MarketDataCache(calendar=get_calendar())
+    
+    @staticmethod
+    def _with_age(df, age, stale):
+        """Salinan DataFrame cache dengan umur data di df.attrs"""
+        df = df.copy()
+        df.attrs['cache_age_s'] = round(age, 1)
+        df.attrs['stale'] = stale
+        return df
+    
+    def _history(self, stock_code, period, interval):
+        """Histori Yahoo lewat cache; data lama langsung disajikan sambil di-refresh di background"""
+        kind = 'daily' if interval == '1d' else 'intraday'
+        hist, age, stale = self.cache.get(kind, (stock_code, period, interval),
+                                          lambda: self.yahoo.history(stock_code, period, interval))
+        if hist is None:
+            return pd.DataFrame()
+        return self._with_age(hist, age, stale)
+    
+    def _load_closes(self):
+        if not self.close_store:
+            return {}
+        try:
+            with open(self.close_store) as f:
+                return {code: float(close) for code, close in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+    
+    def _save_closes(self):
+        """Gabung dengan isi file (bisa ditulis proses lain) lalu tulis atomik"""
+        with self._close_lock:
+            if not self._closes_dirty:
+                return
+            self._closes_dirty = False
+            pending = dict(self.last_known_close)
+        directory = os.path.dirname(self.close_store) or '.'
+        os.makedirs(directory, exist_ok=True)
+        closes = self._load_closes()
+        closes.update(pending)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(closes, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.close_store)
+        except OSError as e:
+            print(f"⚠️ Gagal menyimpan close terakhir: {e}")
+            with self._close_lock:
+                self._closes_dirty = True
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def _remember_close(self, stock_code, close):
+        """Simpan close real terakhir dan buang cache fallback karena upstream sudah pulih"""
+        try:
+            close = float(close)
+        except (TypeError, ValueError):
+            return
+        if close > 0 and np.isfinite(close):
+            self._fallback_cache.pop(stock_code, None)
+            with self._close_lock:
+                if self.last_known_close.get(stock_code) == close:
+                    return
+                self.last_known_close[stock_code] = close
+                if not self.close_store:
+                    return
+                # Tidak menulis file di jalur request: ditandai dirty, di-flush berkala
+                self._closes_dirty = True
+                if self._close_flusher is None:
+                    self._close_flusher = threading.Thread(target=self._flush_closes_loop,
+                                                           name='close-store-flush', daemon=True)
+                    self._close_flusher.start()
+                    atexit.register(self._save_closes)
+    
+    def _flush_closes_loop(self):
+        while True:
+            time.sleep(CLOSE_FLUSH_SECONDS)
+            self._save_closes()
     
     def get_intraday_data(self, stock_code, interval='5m', period='1d'):
         """Mendapatkan data intraday dari Yahoo Finance"""
         try:
             print(f"📊 Mengambil data intraday {stock_code} interval {interval}")
             
-            stock = yf.Ticker(stock_code)
-            
             # Untuk intraday, period maksimal 60 hari
-            hist = stock.history(period=period, interval=interval)
+            hist = self._history(stock_code, period, interval)
             
             if hist.empty:
                 print(f"❌ Tidak ada data intraday untuk {stock_code}")
                 return None
             
             hist = hist.reset_index()
+            self._remember_close(stock_code, hist['Close'].iloc[-1])
             print(f"✅ Data intraday: {len(hist)} candlestick")
             return hist
             
@@ -51,13 +159,13 @@ class DataCollector:
     def get_daily_data(self, stock_code, period='1mo'):
         """Mengambil data harian dari Yahoo Finance"""
         try:
-            stock = yf.Ticker(stock_code)
-            hist = stock.history(period=period)
+            hist = self._history(stock_code, period, '1d')
             
             if not hist.empty:
                 hist = hist.reset_index()
                 # Convert to date for consistency
                 hist['Date'] = pd.to_datetime(hist['Date']).dt.date
+                self._remember_close(stock_code, hist['Close'].iloc[-1])
                 print(f"📅 Data harian - Period: {period}, Records: {len(hist)}")
                 return hist
                 
@@ -103,25 +211,34 @@ class DataCollector:
             return self.get_fallback_data(stock_code, '1mo')
     
     def get_realtime_price(self, stock_code):
-        """Mendapatkan harga real-time terbaru"""
+        """Mendapatkan harga real-time terbaru (dengan umur data & flag stale)"""
+        quote, age, stale = self.cache.get('quote', stock_code, lambda: self._fetch_realtime_price(stock_code))
+        if quote is None:
+            return {'close': 0, 'volume': 0, 'timestamp': datetime.now(), 'age_seconds': 0.0, 'stale': False}
+        return dict(quote, age_seconds=round(age, 1), stale=stale)
+    
+    def _fetch_realtime_price(self, stock_code):
+        """Quote dari IDX, fallback ke Yahoo; None jika keduanya gagal"""
         try:
             # Coba dari IDX terlebih dahulu
             idx_data = self.get_idx_realtime_data(stock_code)
-            if idx_data is not None:
+            if idx_data is not None and not idx_data.empty:
                 return {
-                    'close': idx_data['Close'].iloc[0] if not idx_data.empty else 0,
-                    'volume': idx_data['Volume'].iloc[0] if not idx_data.empty else 0,
+                    'close': idx_data['Close'].iloc[0],
+                    'volume': idx_data['Volume'].iloc[0],
                     'timestamp': datetime.now()
                 }
             
             # Fallback ke Yahoo Finance real-time
-            stock = yf.Ticker(stock_code)
-            info = stock.info
+            info = self.yahoo.info(stock_code)
             
             current_price = info.get('currentPrice', 
                                    info.get('regularMarketPrice', 
                                            info.get('previousClose', 0)))
             volume = info.get('volume', info.get('regularMarketVolume', 0))
+            if not current_price:
+                return None
+            self._remember_close(stock_code, current_price)
             
             return {
                 'close': current_price,
@@ -131,36 +248,33 @@ class DataCollector:
             
         except Exception as e:
             print(f"Error getting realtime price: {e}")
-            return {'close': 0, 'volume': 0, 'timestamp': datetime.now()}
+            return None
     
     def get_idx_realtime_data(self, stock_code):
         """Mengambil data real-time dari IDX"""
         try:
             # Hapus .JK dari kode saham
             code = stock_code.replace('.JK', '')
-            url = f"https://www.idx.co.id/primary/ListedCompany/GetTradingInfoSS?code={code}&length=100"
+            data = self.idx.trading_info(code, 100)
             
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            if data and 'data' in data and len(data['data']) > 0:
+                trading_data = data['data'][0]
                 
-                if data and 'data' in data and len(data['data']) > 0:
-                    trading_data = data['data'][0]
-                    
-                    # Format data untuk consistency
-                    today = datetime.now().date()
-                    price_data = {
-                        'Date': [pd.Timestamp(today)],
-                        'Open': [trading_data.get('Open', 0)],
-                        'High': [trading_data.get('High', 0)],
-                        'Low': [trading_data.get('Low', 0)],
-                        'Close': [trading_data.get('Close', 0)],
-                        'Volume': [trading_data.get('Volume', 0)]
-                    }
-                    
-                    df = pd.DataFrame(price_data)
-                    print(f"���️ Data IDX - Close: Rp {df['Close'].iloc[0]:.2f}")
-                    return df
+                # Format data untuk consistency
+                today = datetime.now().date()
+                price_data = {
+                    'Date': [pd.Timestamp(today)],
+                    'Open': [trading_data.get('Open', 0)],
+                    'High': [trading_data.get('High', 0)],
+                    'Low': [trading_data.get('Low', 0)],
+                    'Close': [trading_data.get('Close', 0)],
+                    'Volume': [trading_data.get('Volume', 0)]
+                }
+                
+                df = pd.DataFrame(price_data)
+                self._remember_close(stock_code, df['Close'].iloc[0])
+                print(f"���️ Data IDX - Close: Rp {df['Close'].iloc[0]:.2f}")
+                return df
                     
         except Exception as e:
             print(f"Error fetching IDX data: {e}")
@@ -176,96 +290,52 @@ class DataCollector:
             }
             
             days = period_days.get(period, 180)
-            start_date = datetime.now() - timedelta(days=days)
-            end_date = datetime.now()
             
-            return self.get_simulated_broker_data(stock_code, start_date, end_date)
+            def load():
+                end_date = datetime.now()
+                start_date = end_date - timedelta(days=days)
+                return self.get_simulated_broker_data(stock_code, start_date, end_date)
+            
+            broker_data, age, stale = self.cache.get('broker', (stock_code, days), load)
+            if broker_data is None:
+                return pd.DataFrame()
+            return self._with_age(broker_data, age, stale)
             
         except Exception as e:
             print(f"Error in get_broker_summary: {e}")
             return pd.DataFrame()
     
-    def get_simulated_broker_data(self, stock_code, start_date, end_date):
-        """Generate simulated broker data with realistic market patterns"""
+    def get_simulated_broker_data(self, stock_code, start_date, end_date, include_labels=False):
+        """Generate simulated broker data with realistic market patterns (seeded per ticker & tanggal)"""
         try:
-            dates = pd.date_range(start=start_date, end=end_date, freq='D')
-            
-            broker_data = []
-            for i, date in enumerate(dates):
-                trend = np.sin(date.timetuple().tm_yday / 365 * 2 * np.pi) * 0.3 + 1
-                volatility = np.random.uniform(0.8, 1.2)
-                
-                foreign_buy = abs(np.random.normal(80000 * trend * volatility, 30000))
-                foreign_sell = abs(np.random.normal(75000 * trend * volatility, 28000))
-                local_buy = abs(np.random.normal(120000 * trend * volatility, 50000)) 
-                local_sell = abs(np.random.normal(115000 * trend * volatility, 48000))
-                
-                if np.random.random() < 0.15:  # 15% chance of anomaly
-                    anomaly_type = np.random.choice(['accumulation', 'distribution', 'panic_sell'])
-                    
-                    if anomaly_type == 'accumulation':
-                        # Bandar accumulation: foreign sell, domestic buy heavily
-                        foreign_sell *= 2.5
-                        local_buy *= 1.8
-                    elif anomaly_type == 'distribution':
-                        # Bandar distribution: foreign buy, domestic sell
-                        foreign_buy *= 2.2
-                        local_sell *= 1.7
-                    elif anomaly_type == 'panic_sell':
-                        # Panic selling across the board
-                        foreign_sell *= 3
-                        local_sell *= 2.5
-                
-                broker_data.append({
-                    'date': date,
-                    'foreign_buy': foreign_buy,
-                    'foreign_sell': foreign_sell,
-                    'local_buy': local_buy,
-                    'local_sell': local_sell,
-                    'net_foreign': foreign_buy - foreign_sell,
-                    'net_local': local_buy - local_sell,  # Added net_local
-                    'volume_ratio': (foreign_buy + local_buy) / (foreign_sell + local_sell + 1)
-                })
-            
-            return pd.DataFrame(broker_data)
+            df = simulate_broker_flow([stock_code], start_date, end_date,
+                                      return_labels=include_labels)
+            if df.empty:
+                return df
+            df = df.drop(columns=['stock_code'])
+            # Data simulasi deterministik per ticker & rentang tanggal -> dipakai sebagai key cache feature
+            df.attrs['stock_code'] = stock_code
+            df.attrs['data_version'] = f"sim:{pd.Timestamp(start_date).date()}:{pd.Timestamp(end_date).date()}:{int(include_labels)}"
+            return df
             
         except Exception as e:
             print(f"Error in get_simulated_broker_data: {e}")
             return pd.DataFrame()
     
     def get_fallback_data(self, stock_code, period):
-        """Fallback data dengan harga yang lebih realistis"""
+        """Fallback data intraday (random walk) yang di-anchor ke close real terakhir"""
         try:
-            # Generate data intraday untuk fallback
-            dates = pd.date_range(start=datetime.now() - timedelta(days=7), 
-                                 end=datetime.now(), freq='5min')
+            end = pd.Timestamp.now().floor(FALLBACK_BAR)
+            cached = self._fallback_cache.get(stock_code)
+            if cached is not None and cached[0] == end:
+                return cached[1].copy()
             
-            base_price = 25000
-            prices = []
+            anchor_price = self.last_known_close.get(stock_code, DEFAULT_FALLBACK_PRICE)
+            df = simulate_price_path(stock_code, end - pd.Timedelta(days=7), end, anchor_price)
             
-            for i in range(len(dates)):
-                # Simulasi pergerakan harga intraday
-                change = np.random.normal(0, 0.001)  # Volatility kecil untuk intraday
-                base_price *= (1 + change)
-                
-                # Simulasi OHLC untuk setiap interval
-                open_price = base_price
-                high_price = base_price * (1 + abs(np.random.normal(0, 0.005)))
-                low_price = base_price * (1 - abs(np.random.normal(0, 0.005)))
-                close_price = base_price
-                
-                prices.append({
-                    'Date': dates[i],
-                    'Open': max(1, open_price),
-                    'High': max(1, high_price),
-                    'Low': max(1, low_price),
-                    'Close': max(1, close_price),
-                    'Volume': np.random.randint(10000, 100000)
-                })
-            
-            df = pd.DataFrame(prices)
-            print(f"🔄 Fallback intraday data - Records: {len(df)}")
-            return df
+            self._fallback_cache[stock_code] = (end, df)
+            print(f"🔄 Fallback intraday data - Records: {len(df)}, anchor Rp {anchor_price:,.0f}")
+            return df.copy()
             
         except Exception as e:
             print(f"Error in get_fallback_data: {e}")
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x, y, max_points):
+    """Pilih index titik dengan algoritma Largest-Triangle-Three-Buckets"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+
+    if max_points is None or max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # Titik pertama dan terakhir selalu dipertahankan, sisanya dibagi rata ke bucket
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Rata-rata tiap bucket dihitung sekaligus dengan cumsum
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.maximum(ends - starts, 1)
+    avg_x = (cx[ends] - cx[starts]) / counts
+    avg_y = (cy[ends] - cy[starts]) / counts
+    # Bucket "berikutnya" untuk bucket terakhir adalah titik terakhir
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(len(starts)):
+        s, e = starts[i], ends[i]
+        if e <= s:
+            selected[i + 1] = s
+            a = s
+            continue
+        bx = x[s:e]
+        by = y[s:e]
+        area = np.abs((x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a]))
+        a = s + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return np.unique(selected)
+
+
+def _time_column(df):
+    for col in ('Datetime', 'Date', 'date'):
+        if col in df.columns:
+            return col
+    return None
+
+
+def _time_values(df, time_col):
+    """Konversi kolom waktu ke float agar bisa dipakai sebagai sumbu x"""
+    if time_col is None:
+        return np.arange(len(df), dtype=np.float64)
+    times = pd.to_datetime(df[time_col], errors='coerce')
+    # NaT harus dicek sebelum konversi: sebagai int64 NaT menjadi iNaT (bukan NaN)
+    if len(times) == 0 or times.isna().any():
+        return np.arange(len(df), dtype=np.float64)
+    return times.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+
+
+def ohlc_bucket(df, max_points):
+    """Agregasi candle ke bucket OHLCV (open pertama, high max, low min, close terakhir, volume total)"""
+    n = len(df)
+    if max_points is None or max_points <= 0 or n <= max_points:
+        return df
+
+    starts = np.linspace(0, n, max_points + 1).astype(np.int64)[:-1]
+    starts = np.unique(starts)
+    ends = np.append(starts[1:], n) - 1
+
+    result = df.iloc[starts].reset_index(drop=True)
+    if 'Open' in df.columns:
+        result['Open'] = df['Open'].to_numpy()[starts]
+    if 'High' in df.columns:
+        result['High'] = np.maximum.reduceat(df['High'].to_numpy(dtype=np.float64), starts)
+    if 'Low' in df.columns:
+        result['Low'] = np.minimum.reduceat(df['Low'].to_numpy(dtype=np.float64), starts)
+    if 'Close' in df.columns:
+        result['Close'] = df['Close'].to_numpy()[ends]
+    if 'Volume' in df.columns:
+        result['Volume'] = np.add.reduceat(df['Volume'].fillna(0).to_numpy(dtype=np.float64), starts)
+
+    return result
+
+
+def downsample_ohlcv(df, max_points, method='ohlc'):
+    """Downsample data OHLCV supaya jumlah titik chart tidak melebihi max_points"""
+    if df is None or df.empty or not max_points or len(df) <= max_points:
+        return df
+
+    if method == 'lttb':
+        time_col = _time_column(df)
+        x = _time_values(df, time_col)
+        y = df['Close'].to_numpy(dtype=np.float64)
+        idx = lttb_indices(x, y, max_points)
+        return df.iloc[idx].reset_index(drop=True)
+
+    return ohlc_bucket(df, max_points)
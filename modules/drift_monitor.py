@@ -0,0 +1,208 @@
+import threading
+import numpy as np
+import pandas as pd
+
+# Ambang statistik KS untuk status drift
+DRIFT_WARNING_KS = 0.1
+DRIFT_ALERT_KS = 0.2
+
+
+class KLLSketch:
+    """Sketch kuantil streaming KLL: memori terbatas (~O(k)), bisa di-merge antar ticker/proses"""
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        compacted = True
+        while compacted:
+            compacted = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if len(items) <= self._capacity(level):
+                    continue
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Jika ganjil, satu item tetap di level ini
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+                self.levels[level] = keep
+                compacted = True
+
+    def update(self, values):
+        """Tambah satu nilai atau array nilai"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Gabungkan sketch lain ke sketch ini"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='mergesort')
+        return values[order], weights[order]
+
+    def quantiles(self, qs):
+        """Estimasi kuantil untuk array q dalam [0, 1]"""
+        values, weights = self._weighted_items()
+        if len(values) == 0:
+            return np.full(len(np.atleast_1d(qs)), np.nan)
+        cum = np.cumsum(weights) / weights.sum()
+        idx = np.searchsorted(cum, np.clip(np.atleast_1d(qs), 0, 1), side='left')
+        return values[np.minimum(idx, len(values) - 1)]
+
+    def cdf(self, points):
+        """Estimasi fraksi nilai <= tiap titik"""
+        values, weights = self._weighted_items()
+        if len(values) == 0:
+            return np.full(len(np.atleast_1d(points)), np.nan)
+        cum = np.concatenate(([0.0], np.cumsum(weights) / weights.sum()))
+        return cum[np.searchsorted(values, np.atleast_1d(points), side='right')]
+
+    def support(self):
+        return np.unique(np.concatenate(self.levels))
+
+    def __len__(self):
+        return self.n
+
+
+def build_sketches(scores, features, k=200):
+    """Sketch distribusi skor dan tiap feature (dipakai saat training)"""
+    sketches = {'anomaly_score': KLLSketch(k).update(scores)}
+    for column in features.columns:
+        sketches[column] = KLLSketch(k).update(features[column].to_numpy())
+    return sketches
+
+
+def compare_sketches(reference, live):
+    """Bandingkan dua sketch: statistik KS dan kuantil utama"""
+    if len(reference) == 0 or len(live) == 0:
+        return None
+    points = np.union1d(reference.support(), live.support())
+    ks = float(np.max(np.abs(reference.cdf(points) - live.cdf(points))))
+    qs = [0.05, 0.25, 0.5, 0.75, 0.95]
+    if ks >= DRIFT_ALERT_KS:
+        status = 'drift'
+    elif ks >= DRIFT_WARNING_KS:
+        status = 'warning'
+    else:
+        status = 'ok'
+    return {
+        'ks': round(ks, 4),
+        'status': status,
+        'live_count': int(live.n),
+        'training_quantiles': dict(zip(map(str, qs), map(float, reference.quantiles(qs)))),
+        'live_quantiles': dict(zip(map(str, qs), map(float, live.quantiles(qs)))),
+    }
+
+
+class DriftMonitor:
+    """Kumpulkan skor & feature live per ticker ke sketch dan bandingkan dengan distribusi training"""
+
+    def __init__(self, k=200):
+        self.k = k
+        self._lock = threading.Lock()
+        self._sketches = {}
+        self._last_seen = {}
+
+    def pending_rows(self, stock_code, results):
+        """Mask baris yang akan dimasukkan observe (lebih baru dari observasi terakhir ticker ini)"""
+        if 'date' not in results.columns:
+            return np.ones(len(results), dtype=bool)
+        dates = pd.to_datetime(results['date'], errors='coerce').dt.normalize()
+        with self._lock:
+            last_seen = self._last_seen.get(stock_code)
+        if last_seen is None:
+            return np.ones(len(results), dtype=bool)
+        return (dates > last_seen).to_numpy()
+
+    def observe(self, stock_code, results, features, scores=None):
+        """Masukkan hanya baris yang lebih baru dari observasi terakhir ticker ini
+
+        scores menggantikan kolom anomaly_score (mis. skor penuh saat prefilter aktif).
+        """
+        if results is None or results.empty or 'anomaly_score' not in results.columns:
+            return
+        scores = results['anomaly_score'].to_numpy() if scores is None else np.asarray(scores)
+        mask = np.ones(len(results), dtype=bool)
+        dates = None
+        if 'date' in results.columns:
+            dates = pd.to_datetime(results['date'], errors='coerce').dt.normalize()
+
+        with self._lock:
+            last_seen = self._last_seen.get(stock_code)
+            if dates is not None:
+                if last_seen is not None:
+                    mask = (dates > last_seen).to_numpy()
+                if mask.any():
+                    self._last_seen[stock_code] = dates[mask].max()
+            if not mask.any():
+                return
+
+            sketches = self._sketches.setdefault(stock_code, {})
+            new_scores = scores[mask]
+            new_scores = new_scores[~np.isnan(new_scores)]
+            if len(new_scores):
+                sketches.setdefault('anomaly_score', KLLSketch(self.k)).update(new_scores)
+            for column in features.columns:
+                sketches.setdefault(column, KLLSketch(self.k)).update(features[column].to_numpy()[mask])
+
+    def _merged(self, stock_codes):
+        merged = {}
+        for code in stock_codes:
+            for name, sketch in self._sketches.get(code, {}).items():
+                merged.setdefault(name, KLLSketch(self.k)).merge(sketch)
+        return merged
+
+    def report(self, training_sketches, stock_code=None):
+        """Laporan drift untuk satu ticker atau gabungan semua ticker"""
+        with self._lock:
+            stock_codes = [stock_code] if stock_code else list(self._sketches)
+            live = self._merged(stock_codes)
+
+        metrics = {}
+        for name, reference in (training_sketches or {}).items():
+            if name in live:
+                comparison = compare_sketches(reference, live[name])
+                if comparison:
+                    metrics[name] = comparison
+
+        statuses = [m['status'] for m in metrics.values()]
+        if 'drift' in statuses:
+            overall = 'drift'
+        elif 'warning' in statuses:
+            overall = 'warning'
+        elif statuses:
+            overall = 'ok'
+        else:
+            overall = 'no_data'
+
+        return {
+            'status': overall,
+            'stock_codes': stock_codes,
+            'metrics': metrics,
+        }
@@ -0,0 +1,59 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def acquire_lock(path, blocking=True):
+    """Ambil lock eksklusif antar proses (flock) pada file path
+
+    Return file descriptor yang memegang lock, atau None jika non-blocking dan lock
+    sedang dipegang proses lain. Lock lepas saat fd ditutup atau proses mati.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        # Platform tanpa flock (Windows): lock tidak tersedia, anggap berhasil
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def release_lock(fd):
+    if fd is not None:
+        os.close(fd)
+
+
+@contextmanager
+def file_lock(path):
+    """Context manager lock eksklusif antar proses/worker pada file path"""
+    fd = acquire_lock(path)
+    try:
+        yield
+    finally:
+        release_lock(fd)
+
+
+def write_atomic(path, data):
+    """Tulis bytes ke file temp unik di direktori tujuan lalu rename atomic"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,170 @@
+import time
+import numpy as np
+import pandas as pd
+
+# Ambang tiap feature (dalam satuan z-score atau rasio) untuk menandai bar sebagai anomali
+INTRADAY_THRESHOLDS = {
+    'return_z': 4.0,
+    'range_ratio': 3.0,
+    'volume_ratio': 4.0,
+    'gap_z': 4.0,
+}
+
+INTRADAY_REASONS = {
+    'return_z': 'Pergerakan harga ekstrem',
+    'range_ratio': 'Range candle melebar',
+    'volume_ratio': 'Lonjakan volume vs profil jam yang sama',
+    'gap_z': 'Gap harga dari close sebelumnya',
+}
+
+
+class IntradayAnomalyDetector:
+    """Deteksi anomali pada bar OHLCV intraday (5m) dengan rolling features vectorized"""
+
+    def __init__(self, interval='5m', window=60, lookback_days=5, thresholds=None):
+        self.interval = pd.Timedelta(interval.replace('m', 'min'))
+        self.window = window
+        self.lookback_days = lookback_days
+        self.thresholds = dict(INTRADAY_THRESHOLDS, **(thresholds or {}))
+        # Bar terakhir yang sudah diskor per ticker, supaya bar yang sama tidak diskor ulang
+        self._last_scored = {}
+        # Hasil skor terakhir per ticker, dibaca endpoint tanpa skor ulang
+        self._results = {}
+        # Batas bar (floor waktu ke interval) saat scan terakhir
+        self._last_scan_bar = None
+
+    @staticmethod
+    def _times(df):
+        column = 'Datetime' if 'Datetime' in df.columns else 'Date'
+        return pd.to_datetime(df[column])
+
+    def build_features(self, df):
+        """Hitung feature semua bar sekaligus: return z, range expansion, volume surge, gap"""
+        times = self._times(df)
+        open_ = df['Open'].to_numpy(dtype=np.float64)
+        high = df['High'].to_numpy(dtype=np.float64)
+        low = df['Low'].to_numpy(dtype=np.float64)
+        close = df['Close'].to_numpy(dtype=np.float64)
+        volume = df['Volume'].to_numpy(dtype=np.float64)
+
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        returns = np.log(close / prev_close)
+        # Volatilitas dan range normal diukur dari window bar sebelumnya
+        ret_std = pd.Series(returns).rolling(self.window, min_periods=10).std().shift(1).to_numpy()
+        bar_range = (high - low) / close
+        range_median = pd.Series(bar_range).rolling(self.window, min_periods=10).median().shift(1).to_numpy()
+
+        # Profil volume per slot waktu (jam:menit) dari hari-hari sebelumnya
+        day = times.dt.normalize().to_numpy()
+        slot = (times.dt.hour * 60 + times.dt.minute).to_numpy()
+        slot_volume = pd.Series(volume).groupby(slot)
+        prior_sum = slot_volume.cumsum().to_numpy() - volume
+        prior_count = slot_volume.cumcount().to_numpy()
+        volume_profile = np.where(prior_count > 0, prior_sum / np.maximum(prior_count, 1), np.nan)
+
+        is_first_bar = np.concatenate(([True], day[1:] != day[:-1]))
+        gap = np.where(is_first_bar, np.log(open_ / prev_close), 0.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            features = pd.DataFrame({
+                'return_z': returns / ret_std,
+                'range_ratio': bar_range / range_median,
+                'volume_ratio': volume / volume_profile,
+                'gap_z': gap / ret_std,
+            }, index=df.index)
+        return features.replace([np.inf, -np.inf], np.nan)
+
+    def _closed_bars(self, df, now=None):
+        """Buang bar terakhir jika belum close"""
+        if df.empty:
+            return df
+        times = self._times(df)
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz=times.dt.tz)
+        return df[(times + self.interval <= now).to_numpy()]
+
+    def score_latest(self, stock_code, df, now=None, force=False):
+        """Skor hanya bar terbaru yang sudah close; None jika belum ada bar baru"""
+        if df is None or df.empty:
+            return None
+        df = self._closed_bars(df, now)
+        if len(df) < 2:
+            return None
+
+        times = self._times(df)
+        latest_time = times.iloc[-1]
+        if not force and self._last_scored.get(stock_code) == latest_time:
+            return None
+
+        # Cukup hitung feature pada lookback terakhir (profil volume butuh beberapa hari)
+        cutoff = latest_time.normalize() - pd.Timedelta(days=self.lookback_days)
+        recent = df[(times >= cutoff).to_numpy()]
+        latest = self.build_features(recent).iloc[-1]
+
+        ratios = {}
+        for name, threshold in self.thresholds.items():
+            value = latest.get(name, np.nan)
+            if pd.notna(value):
+                # range/volume adalah rasio (>1 normal), sisanya z-score dua arah
+                ratios[name] = (value if name in ('range_ratio', 'volume_ratio') else abs(value)) / threshold
+        score = max(ratios.values()) if ratios else 0.0
+        reasons = [
+            f"{INTRADAY_REASONS[name]} ({latest[name]:+.1f})" for name, ratio in ratios.items() if ratio >= 1
+        ]
+
+        if score >= 2:
+            severity = 'critical'
+        elif score >= 1.5:
+            severity = 'high'
+        elif score >= 1:
+            severity = 'medium'
+        else:
+            severity = 'low'
+
+        self._last_scored[stock_code] = latest_time
+        result = self._results[stock_code] = {
+            'stock_code': stock_code,
+            'time': latest_time.isoformat(),
+            'is_anomaly': bool(score >= 1),
+            'score': round(float(score), 3),
+            'severity': severity,
+            'features': {k: (None if pd.isna(v) else round(float(v), 3)) for k, v in latest.items()},
+            'reasons': reasons,
+        }
+        return result
+
+    def latest(self, stock_code, now=None):
+        """Hasil skor terakhir selama belum ada bar baru yang close; None jika perlu skor ulang"""
+        result = self._results.get(stock_code)
+        if result is None:
+            return None
+        latest_time = pd.Timestamp(result['time'])
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz=latest_time.tz)
+        return result if latest_time + 2 * self.interval > now else None
+
+    def last_result(self, stock_code):
+        """Hasil skor bar terbaru yang pernah diskor, tanpa cek umur (mis. di luar jam bursa)"""
+        return self._results.get(stock_code)
+
+    def bar_closed(self, now=None):
+        """True sekali per bar: saat batas interval baru terlewati sejak scan terakhir"""
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+        bar = now.floor(self.interval)
+        if bar == self._last_scan_bar:
+            return False
+        self._last_scan_bar = bar
+        return True
+
+    def scan(self, frames, now=None):
+        """Skor bar terbaru untuk banyak ticker sekaligus (dict stock_code -> DataFrame)"""
+        start = time.perf_counter()
+        results = []
+        for stock_code, df in frames.items():
+            try:
+                result = self.score_latest(stock_code, df, now)
+                if result is not None:
+                    results.append(result)
+            except Exception as e:
+                print(f"⚠️ Error scoring intraday {stock_code}: {e}")
+        elapsed = time.perf_counter() - start
+        print(f"✅ Intraday scan {len(frames)} ticker dalam {elapsed * 1000:.1f} ms")
+        return results
@@ -0,0 +1,120 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Per jenis data: (ttl, max_stale) dalam detik.
+# < ttl: fresh. ttl..max_stale: langsung disajikan, refresh di background. > max_stale: fetch sinkron.
+# TTL dihitung hanya selama harga bisa bergerak (lihat IDXTradingCalendar.valid_until).
+CACHE_POLICIES = {
+    'quote': (15, 300),
+    'intraday': (60, 900),
+    'daily': (300, 6 * 3600),
+    'broker': (3600, 24 * 3600),
+}
+
+# Thread refresh background, dipakai bersama semua cache
+REFRESH_WORKERS = 4
+
+
+def _is_empty(value):
+    return value is None or bool(getattr(value, 'empty', False))
+
+
+class MarketDataCache:
+    """Cache stale-while-revalidate per jenis data dengan single-flight fetch"""
+
+    def __init__(self, policies=None, workers=REFRESH_WORKERS, calendar=None):
+        self.policies = dict(CACHE_POLICIES, **(policies or {}))
+        # Dengan kalender bursa, data yang diambil di luar jam perdagangan valid sampai sesi berikutnya
+        self.calendar = calendar
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._workers = workers
+        self.stats = {'fresh': 0, 'stale': 0, 'miss': 0, 'refresh': 0, 'refresh_error': 0}
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='cache-refresh')
+        return self._executor
+
+    def _run_loader(self, key, loader, future):
+        """Jalankan loader; hanya nilai yang valid yang menggantikan entry lama"""
+        try:
+            value = loader()
+            if not _is_empty(value):
+                with self._lock:
+                    self._entries[key] = (value, time.time())
+            future.set_result(value)
+        except Exception as e:
+            self.stats['refresh_error'] += 1
+            print(f"⚠️ Fetch {key[0]} {key[1:]} gagal: {e}")
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _start_fetch(self, key, loader, background):
+        """Mulai fetch jika belum ada yang berjalan untuk key ini; return (future, owner)"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+        if background:
+            self._pool().submit(self._run_loader, key, loader, future)
+        return future, True
+
+    def get(self, kind, key, loader):
+        """Return (value, age_detik, stale); value None jika tidak ada data sama sekali"""
+        ttl, max_stale = self.policies[kind]
+        key = (kind,) + (key if isinstance(key, tuple) else (key,))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            value, fetched_at = entry
+            age = now - fetched_at
+            expires = self.calendar.valid_until(fetched_at, ttl) if self.calendar else fetched_at + ttl
+            if now < expires:
+                self.stats['fresh'] += 1
+                return value, age, False
+            if now < expires + (max_stale - ttl):
+                # Sajikan nilai lama sekarang, refresh di background
+                self.stats['stale'] += 1
+                _, started = self._start_fetch(key, loader, background=True)
+                if started:
+                    self.stats['refresh'] += 1
+                return value, age, True
+
+        # Tidak ada data atau sudah melewati batas staleness: fetch sinkron (dibagi antar request)
+        self.stats['miss'] += 1
+        future, owner = self._start_fetch(key, loader, background=False)
+        if owner:
+            self._run_loader(key, loader, future)
+        try:
+            value = future.result()
+        except Exception:
+            value = None
+        return value, 0.0, False
+
+    def invalidate(self, kind=None, key=None):
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            elif key is None:
+                for k in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[k]
+            else:
+                self._entries.pop((kind,) + (key if isinstance(key, tuple) else (key,)), None)
+
+    def status(self):
+        with self._lock:
+            counts = {}
+            for key in self._entries:
+                counts[key[0]] = counts.get(key[0], 0) + 1
+            inflight = len(self._inflight)
+        return {'entries': counts, 'inflight': inflight, 'stats': dict(self.stats), 'policies': self.policies}
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import itertools
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import ENERGY_STOCKS, MODEL_DIR, MODEL_FILENAME, ONLINE_MODEL_FILENAME
+from modules.anomaly_detector import SimpleAnomalyDetector
+from modules.data_collector import DataCollector
+from modules.online_detector import OnlineAnomalyDetector
+from modules.simulator import simulate_broker_flow
+
+# Grid default untuk sweep parameter IsolationForest
+DEFAULT_PARAM_GRID = {
+    'contamination': [0.05, 0.1, 0.15, 0.2],
+    'n_estimators': [100, 200],
+    'max_samples': ['auto', 256],
+    'max_features': [1.0, 0.75],
+}
+
+# Parameter default SimpleAnomalyDetector (dipakai --quick dan auto-training)
+QUICK_PARAM_GRID = {
+    'contamination': [0.15],
+    'n_estimators': [100],
+    'max_samples': ['auto'],
+    'max_features': [1.0],
+}
+
+# Dataset yang dipakai worker sweep (di-set sekali per proses lewat initializer)
+_worker_data = {}
+
+
+def _collect_one(stock_code, period):
+    """Ambil broker summary satu ticker (dijalankan di worker process)"""
+    try:
+        return stock_code, DataCollector().get_broker_summary(stock_code, period)
+    except Exception as e:
+        print(f"✗ Error {stock_code}: {e}")
+        return stock_code, pd.DataFrame()
+
+
+def collect_training_data(stock_codes, period='6mo', workers=None):
+    """Kumpulkan data broker semua ticker secara paralel dengan process pool"""
+    if workers == 1:
+        results = [_collect_one(code, period) for code in stock_codes]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_collect_one, stock_codes, itertools.repeat(period)))
+
+    training_data = []
+    for stock_code, broker_data in results:
+        if broker_data is not None and not broker_data.empty:
+            training_data.append(broker_data)
+            print(f"  → {stock_code}: ✓ ({len(broker_data)} records)")
+        else:
+            print(f"  → {stock_code}: ⚠️ No data")
+    return training_data
+
+
+def build_evaluation_set(stock_codes, days=365, seed=1):
+    """Data simulasi berlabel untuk evaluasi precision/recall"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    return simulate_broker_flow(stock_codes, start_date, end_date, seed=seed, return_labels=True)
+
+
+def param_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def _init_worker(training_data, eval_df):
+    _worker_data['training_data'] = training_data
+    _worker_data['eval_df'] = eval_df
+
+
+def evaluate_candidate(params, training_data=None, eval_df=None):
+    """Train satu kandidat dan hitung precision/recall pada data berlabel"""
+    training_data = training_data if training_data is not None else _worker_data['training_data']
+    eval_df = eval_df if eval_df is not None else _worker_data['eval_df']
+
+    detector = SimpleAnomalyDetector(n_jobs=1, **params)
+
+    start = time.perf_counter()
+    detector.train(training_data)
+    train_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = detector.detect_anomalies(eval_df)
+    # Label dari threshold hasil kalibrasi kandidat ini, sama seperti saat serving
+    predicted = results['ml_anomaly'].to_numpy().astype(bool)
+    score_seconds = time.perf_counter() - start
+
+    actual = eval_df['anomaly_label'].to_numpy().astype(bool)
+    tp = int(np.sum(predicted & actual))
+    fp = int(np.sum(predicted & ~actual))
+    fn = int(np.sum(~predicted & actual))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return {
+        'params': params,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'train_seconds': train_seconds,
+        'score_rows_per_second': len(eval_df) / score_seconds if score_seconds > 0 else 0.0,
+    }
+
+
+def run_sweep(training_data, eval_df, grid=None, workers=None):
+    """Evaluasi semua kombinasi parameter secara paralel di semua core"""
+    candidates = param_grid(grid or DEFAULT_PARAM_GRID)
+    print(f"\n🔎 Sweep {len(candidates)} kandidat parameter...")
+
+    if workers == 1:
+        results = [evaluate_candidate(p, training_data, eval_df) for p in candidates]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(training_data, eval_df)) as executor:
+            results = list(executor.map(evaluate_candidate, candidates))
+
+    return sorted(results, key=lambda r: (r['f1'], r['recall']), reverse=True)
+
+
+def save_artifact(detector, report, model_dir=MODEL_DIR):
+    """Simpan model sebagai artifact berversi + report, lalu jadikan model aktif"""
+    os.makedirs(model_dir, exist_ok=True)
+    version = detector.model_version
+    base_name = os.path.splitext(MODEL_FILENAME)[0]
+    artifact_path = os.path.join(model_dir, f"{base_name}-{version}.pkl")
+    report_path = os.path.join(model_dir, f"{base_name}-{version}.json")
+
+    detector.save_model(artifact_path)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    active_path = os.path.join(model_dir, MODEL_FILENAME)
+    shutil.copyfile(artifact_path, active_path)
+    print(f"📄 Report disimpan ke {report_path}")
+    return artifact_path, report_path
+
+
+def bootstrap_online_detector(detector, training_data):
+    """Inisialisasi detector online dari data training batch yang sama"""
+    online = OnlineAnomalyDetector(detector.feature_columns, contamination=detector.isolation_forest.contamination)
+    online.fit(np.concatenate([detector.feature_matrix(df) for df in training_data]))
+    return online
+
+
+def train_best_model(stock_codes, period='6mo', grid=None, workers=None, eval_days=365,
+                     model_dir=MODEL_DIR):
+    """Pipeline lengkap: kumpulkan data, sweep parameter, train model terbaik, simpan artifact"""
+    pipeline_start = time.perf_counter()
+
+    print("\n📊 Collecting training data from multiple stocks...")
+    start = time.perf_counter()
+    training_data = collect_training_data(stock_codes, period, workers)
+    collect_seconds = time.perf_counter() - start
+    if not training_data:
+        print("\n❌ No training data collected!")
+        return None
+
+    eval_df = build_evaluation_set(stock_codes, eval_days)
+    results = run_sweep(training_data, eval_df, grid, workers)
+    best = results[0]
+    print(f"🏆 Best params {best['params']} - precision {best['precision']:.3f}, "
+          f"recall {best['recall']:.3f}, f1 {best['f1']:.3f}")
+
+    print("\n🤖 Training final model with Isolation Forest...")
+    detector = SimpleAnomalyDetector(**best['params'])
+    start = time.perf_counter()
+    detector.train(training_data)
+    train_seconds = time.perf_counter() - start
+
+    print("\n🧹 Calibrating robust prefilter on labeled data...")
+    prefilter_report = detector.calibrate_prefilter(eval_df)
+
+    detector.model_version = datetime.now().strftime('%Y%m%d_%H%M%S')
+    report = {
+        'model_version': detector.model_version,
+        'stock_codes': list(stock_codes),
+        'period': period,
+        'training_rows': int(sum(len(df) for df in training_data)),
+        'evaluation_rows': int(len(eval_df)),
+        'best': best,
+        'candidates': results,
+        'prefilter': prefilter_report,
+        'timing': {
+            'collect_seconds': collect_seconds,
+            'final_train_seconds': train_seconds,
+            'total_seconds': time.perf_counter() - pipeline_start,
+        },
+    }
+    detector.training_info = {k: report[k] for k in ('model_version', 'period', 'training_rows', 'best')}
+
+    artifact_path, _ = save_artifact(detector, report, model_dir)
+    print(f"✅ Model {detector.model_version} disimpan ke {artifact_path}")
+
+    online_path = os.path.join(model_dir, ONLINE_MODEL_FILENAME)
+    bootstrap_online_detector(detector, training_data).save(online_path)
+    print(f"✅ Detector online disimpan ke {online_path}")
+    return detector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Training anomaly detector AnoPus')
+    parser.add_argument('--stocks', help='Daftar ticker dipisah koma (default: semua ENERGY_STOCKS)')
+    parser.add_argument('--period', default='6mo')
+    parser.add_argument('--workers', type=int, default=None, help='Jumlah process (default: semua core)')
+    parser.add_argument('--eval-days', type=int, default=365)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--quick', action='store_true', help='Tanpa sweep, pakai parameter default')
+    args = parser.parse_args(argv)
+
+    stock_codes = args.stocks.split(',') if args.stocks else list(ENERGY_STOCKS)
+    grid = QUICK_PARAM_GRID if args.quick else None
+
+    print("=" * 60)
+    print("🚀 Starting Anomaly Detector Model Training")
+    print("=" * 60)
+    detector = train_best_model(stock_codes, args.period, grid, args.workers, args.eval_days, args.model_dir)
+    print("\n" + "=" * 60)
+    if detector is not None:
+        print("✨ Training process completed successfully!")
+    else:
+        print("⚠️ Training process failed. Please try again.")
+    print("=" * 60)
+    return 0 if detector is not None else 1
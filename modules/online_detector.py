@@ -0,0 +1,261 @@
+import pickle
+import threading
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from modules.file_lock import file_lock, write_atomic
+
+# Parameter default Half-Space Trees (Tan, Ting & Liu 2011)
+HST_TREES = 25
+HST_HEIGHT = 8
+HST_WINDOW = 250
+
+
+class HalfSpaceTrees:
+    """Half-Space Trees: ensemble pohon acak dengan profil massa per window, update O(trees x height)"""
+
+    def __init__(self, n_features, n_trees=HST_TREES, height=HST_HEIGHT, window=HST_WINDOW,
+                 size_limit=None, seed=0):
+        self.n_features = n_features
+        self.n_trees = n_trees
+        self.height = height
+        self.window = window
+        self.size_limit = 0.1 * window if size_limit is None else size_limit
+        self._build(np.random.default_rng(seed))
+
+        n_nodes = 2 ** (height + 1) - 1
+        # r = massa window referensi (sudah lengkap), l = massa window yang sedang berjalan
+        self.r_mass = np.zeros((n_trees, n_nodes))
+        self.l_mass = np.zeros((n_trees, n_nodes))
+        self.window_count = 0
+        self.windows_completed = 0
+
+    def _build(self, rng):
+        """Split tiap node di tengah workspace acak (feature sudah dinormalisasi ke [0, 1])"""
+        n_internal = 2 ** self.height - 1
+        self.split_dims = rng.integers(self.n_features, size=(self.n_trees, n_internal))
+        self.split_values = np.empty((self.n_trees, n_internal))
+
+        s = rng.random((self.n_trees, self.n_features))
+        span = 2 * np.maximum(s, 1 - s)
+        lower = (s - span)[:, None, :]
+        upper = (s + span)[:, None, :]
+        trees = np.arange(self.n_trees)[:, None]
+        for depth in range(self.height):
+            first = 2 ** depth - 1
+            nodes = np.arange(first, 2 * first + 1)
+            dims = self.split_dims[:, nodes]
+            lo = np.take_along_axis(lower, dims[:, :, None], axis=2)[:, :, 0]
+            hi = np.take_along_axis(upper, dims[:, :, None], axis=2)[:, :, 0]
+            mid = (lo + hi) / 2
+            self.split_values[:, nodes] = mid
+
+            # Workspace anak kiri (upper = mid) dan kanan (lower = mid), urut sesuai index node
+            left_upper = upper.copy()
+            right_lower = lower.copy()
+            left_upper[trees, np.arange(len(nodes)), dims] = mid
+            right_lower[trees, np.arange(len(nodes)), dims] = mid
+            lower = np.stack((lower, right_lower), axis=2).reshape(self.n_trees, -1, self.n_features)
+            upper = np.stack((left_upper, upper), axis=2).reshape(self.n_trees, -1, self.n_features)
+
+    def _paths(self, X):
+        """Node yang dilewati tiap baris di tiap pohon: (n_rows, n_trees, height + 1)"""
+        X = np.atleast_2d(X)
+        trees = np.arange(self.n_trees)
+        paths = np.zeros((len(X), self.n_trees, self.height + 1), dtype=np.int64)
+        node = paths[:, :, 0]
+        for depth in range(self.height):
+            dims = self.split_dims[trees, node]
+            values = np.take_along_axis(X, dims, axis=1)
+            node = 2 * node + 1 + (values > self.split_values[trees, node])
+            paths[:, :, depth + 1] = node
+        return paths
+
+    @property
+    def ready(self):
+        return self.windows_completed > 0
+
+    def score(self, X):
+        """Skor anomali [0, 1] (1 = paling anomali) berdasarkan massa window referensi"""
+        paths = self._paths(X)
+        mass = self.r_mass[np.arange(self.n_trees)[None, :, None], paths]
+        # Berhenti di node pertama yang massanya <= size_limit atau di daun
+        small = mass <= self.size_limit
+        small[:, :, -1] = True
+        depth = np.argmax(small, axis=2)
+        node_mass = np.take_along_axis(mass, depth[:, :, None], axis=2)[:, :, 0]
+        total = (node_mass * 2.0 ** depth).sum(axis=1)
+        max_score = self.n_trees * self.window * 2.0 ** self.height
+        return 1 - total / max_score
+
+    def learn_one(self, x):
+        """Tambah satu observasi ke window berjalan; tukar profil massa jika window penuh"""
+        path = self._paths(x)[0]
+        self.l_mass[np.arange(self.n_trees)[:, None], path] += 1
+        self.window_count += 1
+        if self.window_count == self.window:
+            self.r_mass, self.l_mass = self.l_mass, np.zeros_like(self.l_mass)
+            self.window_count = 0
+            self.windows_completed += 1
+            return True
+        return False
+
+
+class OnlineAnomalyDetector:
+    """Detector streaming untuk broker flow harian: skor lalu update model per hari baru"""
+
+    def __init__(self, feature_columns, n_trees=HST_TREES, height=HST_HEIGHT, window=HST_WINDOW,
+                 contamination=0.15, seed=0):
+        self.feature_columns = list(feature_columns)
+        self.contamination = contamination
+        self.trees = HalfSpaceTrees(len(self.feature_columns), n_trees, height, window, seed=seed)
+        self.lower = None
+        self.upper = None
+        self.threshold = None
+        self.n_seen = 0
+        self.updated_at = None
+        self._pending = []
+        self._recent_scores = deque(maxlen=window)
+        self._last_seen = {}
+        # True jika ada update yang belum disimpan ke disk
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_lock', None)
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('dirty', False)
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.trees.ready and self.threshold is not None
+
+    def _normalize(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.lower) / (self.upper - self.lower)
+
+    def _set_range(self, X):
+        """Rentang normalisasi dari window pertama; workspace pohon sudah menampung nilai di luar [0, 1]"""
+        self.lower = X.min(axis=0)
+        self.upper = X.max(axis=0)
+        self.upper = np.where(self.upper > self.lower, self.upper, self.lower + 1.0)
+
+    def _learn(self, X):
+        """Skor prequential (sebelum belajar) lalu update per baris - O(1) per observasi"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        self.dirty = True
+        if self.lower is None:
+            self._pending.extend(X)
+            if len(self._pending) < self.trees.window:
+                return np.full(len(X), np.nan)
+            buffered = np.array(self._pending)
+            self._pending = []
+            self._set_range(buffered)
+            self._learn(buffered)
+            return np.full(len(X), np.nan)
+
+        scores = np.full(len(X), np.nan)
+        X_norm = self._normalize(X)
+        for i, x in enumerate(X_norm):
+            if self.trees.ready:
+                scores[i] = self.trees.score(x)[0]
+                self._recent_scores.append(scores[i])
+            if self.trees.learn_one(x) and self._recent_scores:
+                # Threshold ikut diperbarui setiap window selesai
+                self.threshold = float(np.quantile(self._recent_scores, 1 - self.contamination))
+        self.n_seen += len(X)
+        self.updated_at = datetime.now()
+        return scores
+
+    def fit(self, X):
+        """Bootstrap dari data training batch (dipanggil saat batch model di-train)"""
+        X = np.asarray(X, dtype=np.float64)
+        with self._lock:
+            self._set_range(X)
+            self._learn(X)
+            if self.trees.ready and self.threshold is None:
+                self.threshold = float(np.quantile(self.trees.score(self._normalize(X)), 1 - self.contamination))
+        return self
+
+    def score(self, X):
+        """Skor tanpa update model"""
+        with self._lock:
+            if not self.trees.ready:
+                return np.full(len(X), np.nan)
+            return self.trees.score(self._normalize(X))
+
+    def observe(self, stock_code, broker_df, X, learn=True):
+        """Skor dan pelajari hanya hari yang lebih baru dari observasi terakhir ticker ini
+
+        learn=False hanya memberi skor tanpa mengubah state (proses non-leader di gunicorn).
+        """
+        if broker_df is None or broker_df.empty or len(X) == 0:
+            return []
+        mask = np.ones(len(broker_df), dtype=bool)
+        dates = None
+        if 'date' in broker_df.columns:
+            dates = pd.to_datetime(broker_df['date'], errors='coerce').dt.normalize()
+
+        with self._lock:
+            last_seen = self._last_seen.get(stock_code)
+            if dates is not None:
+                if last_seen is not None:
+                    mask = (dates > last_seen).to_numpy()
+                if learn and mask.any():
+                    self._last_seen[stock_code] = dates[mask].max()
+            if not mask.any():
+                return []
+
+            if learn:
+                scores = self._learn(np.asarray(X)[mask])
+            elif self.trees.ready:
+                scores = self.trees.score(self._normalize(np.asarray(X)[mask]))
+            else:
+                scores = np.full(int(mask.sum()), np.nan)
+            threshold = self.threshold
+
+        new_dates = dates[mask] if dates is not None else pd.Series([None] * int(mask.sum()))
+        return [
+            {
+                'date': date.isoformat() if hasattr(date, 'isoformat') else None,
+                'online_score': None if np.isnan(score) else round(float(score), 4),
+                'online_anomaly': bool(threshold is not None and not np.isnan(score) and score > threshold),
+            }
+            for date, score in zip(new_dates, scores)
+        ]
+
+    def status(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'n_seen': self.n_seen,
+                'windows_completed': self.trees.windows_completed,
+                'window': self.trees.window,
+                'threshold': self.threshold,
+                'tickers': len(self._last_seen),
+                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            }
+
+    def save(self, path):
+        """Simpan state di sebelah file batch model: file temp unik + atomic rename di bawah lock antar worker"""
+        with self._lock:
+            self.dirty = False
+            payload = pickle.dumps(self)
+        try:
+            with file_lock(f"{path}.lock"):
+                write_atomic(path, payload)
+        except OSError:
+            self.dirty = True
+            raise
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
@@ -0,0 +1,217 @@
+import io
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from modules.file_lock import file_lock, write_atomic
+
+# Sisi persegi (px) tiap thumbnail: navbar (2x 32px), kartu kecil, halaman profil (2x 220px)
+AVATAR_SIZES = {'sm': 64, 'md': 160, 'lg': 448}
+
+# Format output: WebP utama, JPEG sebagai fallback untuk browser lama
+AVATAR_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Batas piksel gambar input (lindungi worker dari decompression bomb)
+MAX_INPUT_PIXELS = 40_000_000
+
+# Latar untuk gambar transparan karena JPEG tidak punya alpha (warna dark theme)
+FLATTEN_BACKGROUND = (15, 23, 42)
+
+AVATAR_URL_PATH = '/avatars'
+# Index user -> thumbnail disimpan di instance/, bukan di folder yang disajikan publik
+INDEX_FILENAME = 'profile_photos.json'
+PHOTO_WORKERS = 2
+
+
+def entry_variants(entry):
+    """{ukuran: {format: nama_file}} dari entry index (format lama tanpa 'uploaded_at' juga diterima)"""
+    return entry.get('variants', {}) if 'variants' in entry else entry
+
+
+def render_thumbnails(data):
+    """Decode, koreksi orientasi EXIF, crop persegi dan encode semua ukuran/format
+
+    Return {ukuran: {format: bytes}}. Metadata (EXIF, GPS, ICC) tidak ikut disimpan.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image.seek(0)  # GIF animasi: pakai frame pertama
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, FLATTEN_BACKGROUND)
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        else:
+            image = image.convert('RGB')
+
+        thumbnails = {}
+        for size_name, size in AVATAR_SIZES.items():
+            thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            thumbnails[size_name] = {}
+            for ext, (pil_format, options) in AVATAR_FORMATS.items():
+                buffer = io.BytesIO()
+                thumb.save(buffer, pil_format, **options)
+                thumbnails[size_name][ext] = buffer.getvalue()
+        return thumbnails
+
+
+class ProfilePhotoStore:
+    """Foto profil: upload diproses di background jadi thumbnail ber-hash (WebP/JPEG)"""
+
+    def __init__(self, folder=None, index_path=None, workers=PHOTO_WORKERS, url_path=AVATAR_URL_PATH):
+        self.folder = folder
+        self.index_path = index_path
+        self.url_path = url_path
+        self._workers = workers
+        self._executor = None
+        # Job yang masih berjalan; dibuang saat selesai (lihat _finish)
+        self._jobs = {}
+        # User dengan job gagal yang belum dilihat lewat status()
+        self._failed = set()
+        self._index = {}
+        self._index_mtime = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.folder = app.config.get('AVATAR_FOLDER') or os.path.join(app.static_folder, 'uploads', 'profiles', 'thumbs')
+        self.index_path = os.path.join(app.instance_path, INDEX_FILENAME)
+        os.makedirs(self.folder, exist_ok=True)
+        os.makedirs(app.instance_path, exist_ok=True)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='profile-photo')
+        return self._executor
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _load_index(self):
+        """Index {user_id: {'uploaded_at', 'variants'}}, dibaca ulang jika file berubah"""
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return {}
+        if mtime != self._index_mtime:
+            try:
+                self._index = self._read_index()
+                self._index_mtime = mtime
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Index foto profil tidak bisa dibaca: {e}")
+        return self._index
+
+    def submit(self, user_id, data):
+        """Validasi header gambar (cepat) lalu proses thumbnail di background"""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                width, height = image.size
+        except UnidentifiedImageError:
+            raise ValueError('File bukan gambar yang valid')
+        if width * height > MAX_INPUT_PIXELS:
+            raise ValueError(f'Resolusi gambar terlalu besar (maksimal {MAX_INPUT_PIXELS // 1_000_000} MP)')
+
+        # Waktu upload menentukan urutan: job yang selesai belakangan tidak menimpa upload yang lebih baru
+        future = self._pool().submit(self._process, user_id, data, time.time())
+        with self._lock:
+            self._jobs[user_id] = future
+            self._failed.discard(user_id)
+        future.add_done_callback(lambda done: self._finish(user_id, done))
+        return future
+
+    def _finish(self, user_id, future):
+        """Buang job selesai dari _jobs (kecuali sudah diganti upload baru); kegagalan diingat sampai dilihat"""
+        with self._lock:
+            if self._jobs.get(user_id) is not future:
+                return
+            del self._jobs[user_id]
+            if future.exception() is not None:
+                self._failed.add(user_id)
+
+    def _process(self, user_id, data, uploaded_at):
+        start = datetime.now()
+        try:
+            thumbnails = render_thumbnails(data)
+        except Exception as e:
+            print(f"❌ Gagal memproses foto profil user {user_id}: {e}")
+            raise
+
+        variants = {}
+        for size_name, encoded in thumbnails.items():
+            variants[size_name] = {}
+            for ext, payload in encoded.items():
+                name = f"{hashlib.sha256(payload).hexdigest()[:16]}.{ext}"
+                path = os.path.join(self.folder, name)
+                if not os.path.exists(path):
+                    write_atomic(path, payload)
+                variants[size_name][ext] = name
+
+        # Read-modify-write index dikunci antar thread dan antar proses worker
+        with self._lock, file_lock(f"{self.index_path}.lock"):
+            index = self._read_index()
+            previous = index.get(str(user_id))
+            superseded = previous is not None and previous.get('uploaded_at', 0) > uploaded_at
+            if superseded:
+                # Upload yang lebih baru sudah tersimpan: hasil job ini dibuang
+                stale = variants
+            else:
+                index[str(user_id)] = {'uploaded_at': uploaded_at, 'variants': variants}
+                write_atomic(self.index_path, json.dumps(index, indent=2, sort_keys=True).encode())
+                stale = entry_variants(previous) if previous else {}
+            self._index = index
+            self._index_mtime = os.path.getmtime(self.index_path) if os.path.exists(self.index_path) else None
+
+            # Thumbnail yang tidak dipakai user mana pun dihapus
+            in_use = {name for entry in index.values() for sizes in entry_variants(entry).values()
+                      for name in sizes.values()}
+            for sizes in stale.values():
+                for name in sizes.values():
+                    if name not in in_use:
+                        try:
+                            os.remove(os.path.join(self.folder, name))
+                        except OSError:
+                            pass
+
+        if superseded:
+            print(f"⏭️ Foto profil user {user_id} sudah diganti upload yang lebih baru")
+            return entry_variants(previous)
+
+        total = sum(len(payload) for encoded in thumbnails.values() for payload in encoded.values())
+        print(f"🖼️ Foto profil user {user_id}: {len(thumbnails)} ukuran, {total / 1024:.1f} KB "
+              f"dalam {(datetime.now() - start).total_seconds():.2f}s")
+        return variants
+
+    def status(self, user_id):
+        """'pending', 'error' (sekali, lalu dilupakan), 'ready' atau None (belum pernah upload)"""
+        with self._lock:
+            future = self._jobs.get(user_id)
+            if future is None and user_id in self._failed:
+                self._failed.discard(user_id)
+                return 'error'
+        if future is not None and not future.done():
+            return 'pending'
+        if future is not None and future.exception() is not None:
+            return 'error'
+        return 'ready' if str(user_id) in self._load_index() else None
+
+    def urls(self, user_id):
+        """URL thumbnail {ukuran: {format: url}}, None jika user belum punya foto terproses"""
+        with self._lock:
+            entry = self._load_index().get(str(user_id))
+        variants = entry_variants(entry) if entry else None
+        if not variants:
+            return None
+        return {size_name: {ext: f"{request.script_root}{self.url_path}/{name}" for ext, name in sizes.items()}
+                for size_name, sizes in variants.items()}
@@ -0,0 +1,139 @@
+import zlib
+import numpy as np
+import pandas as pd
+
+ANOMALY_TYPES = np.array(['none', 'accumulation', 'distribution', 'panic_sell'])
+
+# Pengali (foreign_buy, foreign_sell, local_buy, local_sell) per tipe anomali,
+# urutannya sama dengan ANOMALY_TYPES
+ANOMALY_MULTIPLIERS = np.array([
+    [1.0, 1.0, 1.0, 1.0],   # none
+    [1.0, 2.5, 1.8, 1.0],   # accumulation: asing jual, domestik beli kuat
+    [2.2, 1.0, 1.0, 1.7],   # distribution: asing beli, domestik jual
+    [1.0, 3.0, 1.0, 2.5],   # panic_sell: jual di semua sisi
+])
+
+# Rata-rata dan standar deviasi aliran broker harian (foreign_buy, foreign_sell, local_buy, local_sell)
+FLOW_MEANS = np.array([80000.0, 75000.0, 120000.0, 115000.0])
+FLOW_STDS = np.array([30000.0, 28000.0, 50000.0, 48000.0])
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _mix64(x):
+    """Finalizer splitmix64 - hash uint64 secara vectorized"""
+    with np.errstate(over='ignore'):
+        x = x ^ (x >> np.uint64(30))
+        x = x * np.uint64(0xBF58476D1CE4E5B9)
+        x = x ^ (x >> np.uint64(27))
+        x = x * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return x
+
+
+def ticker_seed(stock_code, seed=0):
+    """Seed stabil untuk satu ticker (tidak bergantung pada PYTHONHASHSEED)"""
+    return (zlib.crc32(stock_code.encode('utf-8')) << 16) ^ (seed & 0xFFFF)
+
+
+def counter_uniform(ticker_seeds, day_numbers, stream):
+    """Bilangan acak uniform (0, 1] yang hanya bergantung pada (ticker, tanggal, stream)"""
+    t = np.asarray(ticker_seeds, dtype=np.uint64)
+    d = np.asarray(day_numbers, dtype=np.int64).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        key = _mix64(t * np.uint64(0x9E3779B97F4A7C15) + np.uint64(stream))
+        x = _mix64(key ^ (d * np.uint64(0xD1B54A32D192ED03)))
+    return ((x >> np.uint64(11)).astype(np.float64) + 1.0) * (1.0 / 9007199254740992.0)
+
+
+def counter_normal(ticker_seeds, day_numbers, stream):
+    """Bilangan acak normal standar via Box-Muller dari dua stream uniform"""
+    u1 = counter_uniform(ticker_seeds, day_numbers, stream)
+    u2 = counter_uniform(ticker_seeds, day_numbers, stream + 1)
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+
+def simulate_broker_flow(stock_codes, start_date, end_date, anomaly_rate=0.15,
+                         seed=0, return_labels=True):
+    """Simulasi data broker untuk banyak ticker sekaligus, reproducible per (ticker, tanggal)"""
+    if isinstance(stock_codes, str):
+        stock_codes = [stock_codes]
+
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    n_tickers, n_days = len(stock_codes), len(dates)
+    if n_tickers == 0 or n_days == 0:
+        return pd.DataFrame()
+
+    day_numbers = (dates.normalize().to_numpy(dtype='datetime64[D]') - _EPOCH).astype(np.int64)
+    seeds = np.array([ticker_seed(code, seed) for code in stock_codes], dtype=np.uint64)
+
+    # Grid (ticker, hari) via broadcasting
+    t_grid = seeds[:, None]
+    d_grid = day_numbers[None, :]
+
+    trend = np.sin(dates.dayofyear.to_numpy() / 365 * 2 * np.pi) * 0.3 + 1
+    volatility = 0.8 + 0.4 * counter_uniform(t_grid, d_grid, 0)
+    scale = trend[None, :] * volatility
+
+    flows = np.empty((4, n_tickers, n_days))
+    for k in range(4):
+        z = counter_normal(t_grid, d_grid, 10 + 2 * k)
+        flows[k] = np.abs(FLOW_MEANS[k] * scale + FLOW_STDS[k] * z)
+
+    is_anomaly = counter_uniform(t_grid, d_grid, 1) < anomaly_rate
+    type_idx = 1 + np.minimum((counter_uniform(t_grid, d_grid, 2) * 3).astype(np.int64), 2)
+    type_idx = np.where(is_anomaly, type_idx, 0)
+    flows *= np.moveaxis(ANOMALY_MULTIPLIERS[type_idx], -1, 0)
+
+    foreign_buy, foreign_sell, local_buy, local_sell = (f.ravel() for f in flows)
+
+    df = pd.DataFrame({
+        'stock_code': np.repeat(np.asarray(stock_codes, dtype=object), n_days),
+        'date': np.tile(dates.to_numpy(), n_tickers),
+        'foreign_buy': foreign_buy,
+        'foreign_sell': foreign_sell,
+        'local_buy': local_buy,
+        'local_sell': local_sell,
+        'net_foreign': foreign_buy - foreign_sell,
+        'net_local': local_buy - local_sell,
+        'volume_ratio': (foreign_buy + local_buy) / (foreign_sell + local_sell + 1),
+    })
+
+    if return_labels:
+        df['anomaly_label'] = is_anomaly.ravel().astype(np.int8)
+        df['anomaly_type'] = ANOMALY_TYPES[type_idx.ravel()]
+
+    return df
+
+
+def simulate_price_path(stock_code, start, end, anchor_price, freq='5min',
+                        volatility=0.001, wick=0.005, seed=0):
+    """Generate path OHLCV geometric random walk yang berakhir di anchor_price (bar terbaru)"""
+    dates = pd.date_range(start=start, end=end, freq=freq)
+    n = len(dates)
+    if n == 0:
+        return pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+
+    # Counter = nomor bar sejak epoch, sehingga bar yang sama selalu menghasilkan nilai yang sama
+    step = pd.tseries.frequencies.to_offset(freq).nanos
+    bar_numbers = dates.as_unit('ns').asi8 // step
+    t = np.uint64(ticker_seed(stock_code, seed))
+
+    log_returns = volatility * counter_normal(t, bar_numbers, 100)
+    # Bar terbaru = anchor (close real terakhir); bar sebelumnya dihitung mundur
+    cumulative = np.cumsum(log_returns)
+    close = anchor_price * np.exp(cumulative - cumulative[-1])
+    open_ = np.concatenate(([close[0] * np.exp(-log_returns[0])], close[:-1]))
+
+    high = np.maximum(open_, close) * (1 + np.abs(wick * counter_normal(t, bar_numbers, 102)))
+    low = np.minimum(open_, close) * (1 - np.abs(wick * counter_normal(t, bar_numbers, 104)))
+    volume = 10000 + (counter_uniform(t, bar_numbers, 106) * 90000).astype(np.int64)
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Open': np.maximum(1, open_),
+        'High': np.maximum(1, high),
+        'Low': np.maximum(1, low),
+        'Close': np.maximum(1, close),
+        'Volume': volume,
+    })
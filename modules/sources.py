@@ -0,0 +1,405 @@
+import os
+import re
+import glob
+import time
+import pickle
+import random
+import threading
+import requests
+
+DEFAULT_IDX_BASE_URL = "https://www.idx.co.id"
+IDX_TRADING_INFO_PATH = "/primary/ListedCompany/GetTradingInfoSS"
+
+
+# Batas laju default per sumber: (request per detik, burst)
+DEFAULT_RATE_LIMITS = {
+    'yahoo': (5.0, 10),
+    'idx': (2.0, 5),
+}
+
+
+class UpstreamError(Exception):
+    """Error dari sumber data upstream (asli maupun hasil injeksi replay)"""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Request ditolak governor tanpa menghubungi upstream (rate limit, backoff, circuit terbuka)"""
+
+
+def _yahoo_no_data_errors():
+    """Exception yfinance yang berarti 'data tidak ada' (bukan throttling/jaringan)"""
+    try:
+        from yfinance import exceptions
+    except ImportError:
+        return ()
+    names = ('YFPricesMissingError', 'YFTzMissingError', 'YFTickerMissingError', 'YFInvalidPeriodError')
+    return tuple(getattr(exceptions, name) for name in names if hasattr(exceptions, name))
+
+
+class YahooSource:
+    """Sumber data Yahoo Finance via yfinance"""
+    name = 'yahoo'
+
+    def history(self, stock_code, period='1mo', interval='1d'):
+        import pandas as pd
+        import yfinance as yf
+        # Tanpa raise_errors yfinance hanya log error (mis. throttling) dan return DataFrame kosong,
+        # sehingga governor tidak pernah mencatat kegagalan
+        try:
+            hist = yf.Ticker(stock_code).history(period=period, interval=interval, raise_errors=True)
+        except _yahoo_no_data_errors():
+            # Ticker/interval tanpa data adalah hasil valid, bukan kegagalan upstream: jangan sampai
+            # memicu backoff/circuit yang dipakai bersama semua ticker (fallback 5m -> 1d ikut tertolak)
+            return pd.DataFrame()
+        return hist if hist is not None else pd.DataFrame()
+
+    def info(self, stock_code):
+        import yfinance as yf
+        return yf.Ticker(stock_code).info
+
+
+class IDXSource:
+    """Sumber data endpoint GetTradingInfoSS milik IDX"""
+    name = 'idx'
+
+    def __init__(self, base_url=DEFAULT_IDX_BASE_URL, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def trading_info(self, code, length=100):
+        url = f"{self.base_url}{IDX_TRADING_INFO_PATH}?code={code}&length={length}"
+        response = requests.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise UpstreamError(f"IDX status {response.status_code}")
+        return response.json()
+
+
+# Argumen yang boleh berbeda saat rekaman persis tidak ada (indeks di args):
+# periode histori dan jumlah hari IDX. Ticker dan interval harus sama.
+RELAXABLE_ARGS = {
+    'history': 1,
+    'trading_info': 1,
+}
+
+
+def _recording_key(source_name, method, args):
+    safe = [re.sub(r'[^A-Za-z0-9_.-]', '_', str(a)) for a in args]
+    return '__'.join([source_name, method] + safe)
+
+
+class RecordingSource:
+    """Membungkus sumber asli dan menyimpan setiap response ke disk untuk di-replay"""
+
+    def __init__(self, source, record_dir):
+        self.source = source
+        self.name = source.name
+        self.record_dir = record_dir
+        os.makedirs(record_dir, exist_ok=True)
+
+    def _record(self, method, args, result):
+        path = os.path.join(self.record_dir, _recording_key(self.name, method, args) + '.pkl')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f)
+        os.replace(tmp_path, path)
+
+    def __getattr__(self, method):
+        func = getattr(self.source, method)
+
+        def recorded(*args):
+            result = func(*args)
+            try:
+                self._record(method, args, result)
+            except Exception as e:
+                print(f"⚠️ Gagal merekam {self.name}.{method}{args}: {e}")
+            return result
+
+        return recorded
+
+
+class ReplaySource:
+    """Menyajikan response hasil rekaman dengan latency dan error yang bisa dikonfigurasi"""
+
+    def __init__(self, name, record_dir, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=None):
+        self.name = name
+        self.record_dir = record_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _load(self, method, args):
+        key = _recording_key(self.name, method, args)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        path = os.path.join(self.record_dir, key + '.pkl')
+        if not os.path.exists(path):
+            # Tidak ada rekaman persis: pakai rekaman dengan argumen lain sama, hanya periode yang beda
+            relaxed = RELAXABLE_ARGS.get(method)
+            if relaxed is None or relaxed >= len(args):
+                raise UpstreamError(f"Tidak ada rekaman untuk {key}")
+            parts = _recording_key(self.name, method, args).split('__')
+            offset = len(parts) - len(args)
+            pattern = '__'.join('*' if i == offset + relaxed else glob.escape(part)
+                                for i, part in enumerate(parts))
+            candidates = sorted(glob.glob(os.path.join(self.record_dir, pattern + '.pkl')))
+            if not candidates:
+                raise UpstreamError(f"Tidak ada rekaman untuk {key}")
+            path = candidates[0]
+
+        with open(path, 'rb') as f:
+            result = pickle.load(f)
+        with self._lock:
+            self._cache[key] = result
+        return result
+
+    def _simulate_network(self):
+        with self._lock:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if fail:
+            raise UpstreamError(f"Injected error dari replay {self.name}")
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+
+        def replayed(*args):
+            self._simulate_network()
+            result = self._load(method, args)
+            return result.copy() if hasattr(result, 'copy') else result
+
+        return replayed
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` token per detik, maksimal `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait=0.0):
+        """Ambil satu token; tunggu paling lama max_wait detik, False jika tetap habis"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait > max_wait:
+                return False
+            # Token dipesan sekarang supaya thread lain tidak ikut menunggu token yang sama
+            self.tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class UpstreamGovernor:
+    """Rate limit + exponential backoff dengan jitter + circuit breaker untuk satu sumber upstream
+
+    closed: request normal. Setiap kegagalan menunda request berikutnya (backoff) dan setelah
+    `failure_threshold` kegagalan beruntun circuit menjadi open: semua request langsung ditolak
+    selama `reset_timeout` detik. Setelah itu half_open: satu request percobaan boleh lewat,
+    sukses menutup circuit, gagal membukanya lagi.
+    """
+
+    def __init__(self, name, rate=5.0, burst=10, max_wait=0.5, failure_threshold=5,
+                 reset_timeout=30.0, backoff_base=0.5, backoff_cap=30.0, seed=None):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.backoff_until = 0.0
+        self.opened_at = None
+        self.last_error = None
+        self.counters = {'calls': 0, 'success': 0, 'failure': 0, 'rate_limited': 0, 'rejected': 0}
+        self._probe_in_flight = False
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        """Cek circuit & backoff; return True jika request ini adalah probe half-open"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open':
+                if now - self.opened_at < self.reset_timeout:
+                    self.counters['rejected'] += 1
+                    raise UpstreamUnavailable(f"{self.name}: circuit open")
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self._probe_in_flight:
+                    self.counters['rejected'] += 1
+                    raise UpstreamUnavailable(f"{self.name}: menunggu probe half-open")
+                self._probe_in_flight = True
+                return True
+            if now < self.backoff_until:
+                self.counters['rejected'] += 1
+                raise UpstreamUnavailable(f"{self.name}: backoff {self.backoff_until - now:.1f}s")
+            return False
+
+    def _record_success(self):
+        with self._lock:
+            self.counters['success'] += 1
+            self.consecutive_failures = 0
+            self.backoff_until = 0.0
+            self.state = 'closed'
+            self._probe_in_flight = False
+
+    def _record_failure(self, error, probe):
+        with self._lock:
+            now = time.monotonic()
+            self.counters['failure'] += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)[:200]
+            self._probe_in_flight = False
+            # Full jitter: tunda acak antara 0 dan base * 2^n (dibatasi cap)
+            ceiling = min(self.backoff_cap, self.backoff_base * 2 ** (self.consecutive_failures - 1))
+            self.backoff_until = now + self._random.uniform(0, ceiling)
+            if probe or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"⚠️ Circuit {self.name} open setelah {self.consecutive_failures} kegagalan: {self.last_error}")
+                self.state = 'open'
+                self.opened_at = now
+
+    def call(self, func, *args):
+        """Jalankan func(*args) di bawah aturan governor"""
+        probe = self._admit()
+        if not self.bucket.acquire(self.max_wait):
+            with self._lock:
+                self.counters['rate_limited'] += 1
+                if probe:
+                    self._probe_in_flight = False
+            raise UpstreamUnavailable(f"{self.name}: rate limit")
+
+        with self._lock:
+            self.counters['calls'] += 1
+        try:
+            result = func(*args)
+        except Exception as e:
+            self._record_failure(e, probe)
+            raise
+        self._record_success()
+        return result
+
+    def status(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self.state
+            if state == 'open' and now - self.opened_at >= self.reset_timeout:
+                state = 'half_open'
+            return {
+                'state': state,
+                'consecutive_failures': self.consecutive_failures,
+                'backoff_seconds': round(max(0.0, self.backoff_until - now), 2),
+                'open_seconds_remaining': round(max(0.0, self.reset_timeout - (now - self.opened_at)), 2)
+                if self.state == 'open' else 0.0,
+                'tokens_available': round(self.bucket.available(), 2),
+                'rate_per_second': self.bucket.rate,
+                'burst': self.bucket.burst,
+                'last_error': self.last_error,
+                'counters': dict(self.counters),
+            }
+
+
+class GovernedSource:
+    """Membungkus sumber data sehingga setiap panggilan melewati UpstreamGovernor"""
+
+    def __init__(self, source, governor):
+        self.source = source
+        self.name = source.name
+        self.governor = governor
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        func = getattr(self.source, method)
+
+        def governed(*args):
+            return self.governor.call(func, *args)
+
+        return governed
+
+
+# Governor per nama sumber, dipakai bersama semua DataCollector dalam satu proses
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(name):
+    """Governor bersama untuk satu sumber; batas laju bisa diatur lewat ANOPUS_<NAME>_RATE/_BURST"""
+    with _governors_lock:
+        if name not in _governors:
+            rate, burst = DEFAULT_RATE_LIMITS.get(name, (5.0, 10))
+            prefix = f"ANOPUS_{name.upper()}"
+            _governors[name] = UpstreamGovernor(
+                name,
+                rate=float(os.environ.get(f"{prefix}_RATE", rate)),
+                burst=int(os.environ.get(f"{prefix}_BURST", burst)),
+                failure_threshold=int(os.environ.get('ANOPUS_CIRCUIT_FAILURES', 5)),
+                reset_timeout=float(os.environ.get('ANOPUS_CIRCUIT_RESET_S', 30)),
+            )
+        return _governors[name]
+
+
+def governor_status():
+    """Status semua governor yang sudah dibuat"""
+    with _governors_lock:
+        governors = dict(_governors)
+    return {name: governor.status() for name, governor in governors.items()}
+
+
+def build_sources_from_env():
+    """Bangun sumber Yahoo & IDX berdasarkan environment variable
+
+    ANOPUS_DATA_SOURCE: live (default), record, atau replay
+    ANOPUS_RECORD_DIR: direktori rekaman (default: recordings/)
+    ANOPUS_REPLAY_LATENCY_MS, ANOPUS_REPLAY_JITTER_MS, ANOPUS_REPLAY_ERROR_RATE: injeksi latency/error
+    ANOPUS_IDX_BASE_URL: base URL IDX, misalnya stub server lokal
+    ANOPUS_YAHOO_RATE/_BURST, ANOPUS_IDX_RATE/_BURST, ANOPUS_CIRCUIT_FAILURES, ANOPUS_CIRCUIT_RESET_S: governor
+
+    Semua sumber dibungkus GovernedSource (rate limit, backoff, circuit breaker).
+    """
+    mode = os.environ.get('ANOPUS_DATA_SOURCE', 'live').lower()
+    record_dir = os.environ.get('ANOPUS_RECORD_DIR', 'recordings')
+    idx_base_url = os.environ.get('ANOPUS_IDX_BASE_URL', DEFAULT_IDX_BASE_URL)
+
+    if mode == 'replay':
+        options = {
+            'latency_ms': float(os.environ.get('ANOPUS_REPLAY_LATENCY_MS', 0)),
+            'jitter_ms': float(os.environ.get('ANOPUS_REPLAY_JITTER_MS', 0)),
+            'error_rate': float(os.environ.get('ANOPUS_REPLAY_ERROR_RATE', 0)),
+        }
+        yahoo = ReplaySource('yahoo', record_dir, **options)
+        # IDX bisa diarahkan ke stub server; tanpa itu IDX juga di-replay dari disk
+        if 'ANOPUS_IDX_BASE_URL' in os.environ:
+            idx = IDXSource(idx_base_url)
+        else:
+            idx = ReplaySource('idx', record_dir, **options)
+    else:
+        yahoo, idx = YahooSource(), IDXSource(idx_base_url)
+        if mode == 'record':
+            yahoo, idx = RecordingSource(yahoo, record_dir), RecordingSource(idx, record_dir)
+    return GovernedSource(yahoo, get_governor('yahoo')), GovernedSource(idx, get_governor('idx'))
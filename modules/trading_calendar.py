@@ -0,0 +1,148 @@
+import os
+import json
+from datetime import datetime, date, time, timedelta
+
+from pytz import timezone as pytz_timezone
+
+JAKARTA = pytz_timezone('Asia/Jakarta')
+
+# Hari libur bursa (libur nasional + cuti bersama). Perbarui setiap tahun dari kalender resmi IDX,
+# atau arahkan ANOPUS_HOLIDAYS_FILE ke file JSON berisi daftar tanggal "YYYY-MM-DD".
+IDX_HOLIDAYS = [
+    # 2025
+    '2025-01-01', '2025-01-27', '2025-01-28', '2025-01-29', '2025-03-28', '2025-03-31',
+    '2025-04-01', '2025-04-02', '2025-04-03', '2025-04-04', '2025-04-07', '2025-04-18',
+    '2025-05-01', '2025-05-12', '2025-05-13', '2025-05-29', '2025-05-30', '2025-06-06',
+    '2025-06-09', '2025-06-27', '2025-08-18', '2025-09-05', '2025-12-25', '2025-12-26',
+    '2025-12-31',
+    # 2026
+    '2026-01-01', '2026-01-16', '2026-02-16', '2026-02-17', '2026-03-18', '2026-03-19',
+    '2026-03-20', '2026-03-23', '2026-03-24', '2026-04-03', '2026-05-01', '2026-05-14',
+    '2026-05-15', '2026-05-27', '2026-05-28', '2026-06-01', '2026-06-16', '2026-08-17',
+    '2026-08-25', '2026-12-24', '2026-12-25', '2026-12-31',
+]
+
+# Segmen sesi per hari (jam lokal WIB): (fase, mulai, selesai). Jumat istirahat lebih panjang.
+REGULAR_SESSIONS = [
+    ('pre_open', time(8, 45), time(9, 0)),
+    ('session_1', time(9, 0), time(12, 0)),
+    ('lunch_break', time(12, 0), time(13, 30)),
+    ('session_2', time(13, 30), time(15, 50)),
+    ('pre_close', time(15, 50), time(16, 0)),
+    ('post_trading', time(16, 0), time(16, 15)),
+]
+FRIDAY_SESSIONS = [
+    ('pre_open', time(8, 45), time(9, 0)),
+    ('session_1', time(9, 0), time(11, 30)),
+    ('lunch_break', time(11, 30), time(14, 0)),
+    ('session_2', time(14, 0), time(15, 50)),
+    ('pre_close', time(15, 50), time(16, 0)),
+    ('post_trading', time(16, 0), time(16, 15)),
+]
+
+# Fase ketika harga (atau harga teoritis pre-open/pre-close) bisa berubah
+PRICE_MOVING_PHASES = {'pre_open', 'session_1', 'session_2', 'pre_close'}
+CONTINUOUS_PHASES = {'session_1', 'session_2'}
+
+
+class IDXTradingCalendar:
+    """Kalender bursa IDX: hari libur, segmen sesi, pre-opening dan pre-closing"""
+
+    def __init__(self, holidays=None, tz=JAKARTA):
+        self.tz = tz
+        self.holidays = {date.fromisoformat(d) if isinstance(d, str) else d
+                         for d in (IDX_HOLIDAYS if holidays is None else holidays)}
+
+    def _localize(self, dt=None):
+        if dt is None:
+            return datetime.now(self.tz)
+        if isinstance(dt, (int, float)):
+            return datetime.fromtimestamp(dt, self.tz)
+        if dt.tzinfo is None:
+            return self.tz.localize(dt)
+        return dt.astimezone(self.tz)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def sessions(self, day):
+        """Segmen sesi (fase, mulai, selesai) sebagai datetime lokal; kosong jika libur"""
+        if not self.is_trading_day(day):
+            return []
+        segments = FRIDAY_SESSIONS if day.weekday() == 4 else REGULAR_SESSIONS
+        return [(phase, self.tz.localize(datetime.combine(day, start)), self.tz.localize(datetime.combine(day, end)))
+                for phase, start, end in segments]
+
+    def phase(self, dt=None):
+        """Fase pasar saat ini: pre_open, session_1, lunch_break, session_2, pre_close, post_trading, closed"""
+        dt = self._localize(dt)
+        for phase, start, end in self.sessions(dt.date()):
+            if start <= dt < end:
+                return phase
+        return 'closed'
+
+    def is_market_open(self, dt=None):
+        """True selama perdagangan kontinu (sesi 1 dan sesi 2)"""
+        return self.phase(dt) in CONTINUOUS_PHASES
+
+    def prices_moving(self, dt=None):
+        """True jika harga bisa berubah (pre-open sampai pre-close, kecuali istirahat siang)"""
+        return self.phase(dt) in PRICE_MOVING_PHASES
+
+    def next_change(self, dt=None):
+        """Waktu paling awal harga bisa berubah lagi (dt sendiri jika sedang bergerak)"""
+        dt = self._localize(dt)
+        day = dt.date()
+        # Libur panjang (Lebaran) paling lama ~2 minggu
+        for _ in range(30):
+            for phase, start, end in self.sessions(day):
+                if phase in PRICE_MOVING_PHASES and end > dt:
+                    return max(start, dt)
+            day += timedelta(days=1)
+        return dt + timedelta(days=30)
+
+    def seconds_until_change(self, dt=None):
+        dt = self._localize(dt)
+        return max(0.0, (self.next_change(dt) - dt).total_seconds())
+
+    def valid_until(self, fetched_at, ttl):
+        """Batas fresh data yang diambil pada fetched_at (epoch detik)
+
+        Selama harga bergerak cukup TTL biasa; data yang diambil saat pasar tidak bergerak
+        (setelah close, istirahat, libur) tetap valid sampai sesi berikutnya dimulai.
+        """
+        fetched = self._localize(fetched_at)
+        next_change = self.next_change(fetched)
+        if next_change <= fetched:
+            return fetched_at + ttl
+        return max(fetched_at + ttl, next_change.timestamp())
+
+    def status(self, dt=None):
+        dt = self._localize(dt)
+        phase = self.phase(dt)
+        next_change = self.next_change(dt)
+        return {
+            'time': dt.isoformat(),
+            'phase': phase,
+            'is_open': phase in CONTINUOUS_PHASES,
+            'prices_moving': phase in PRICE_MOVING_PHASES,
+            'is_trading_day': self.is_trading_day(dt.date()),
+            'next_change': next_change.isoformat(),
+            'seconds_until_change': max(0.0, (next_change - dt).total_seconds()),
+        }
+
+
+_calendar = None
+
+
+def get_calendar():
+    """Kalender bersama; hari libur bisa diganti lewat ANOPUS_HOLIDAYS_FILE"""
+    global _calendar
+    if _calendar is None:
+        holidays = None
+        path = os.environ.get('ANOPUS_HOLIDAYS_FILE')
+        if path:
+            with open(path) as f:
+                holidays = json.load(f)
+        _calendar = IDXTradingCalendar(holidays)
+    return _calendar
@@ -0,0 +1,34 @@
+"""Build asset statis: CSS/JS dengan nama ber-hash plus varian .gz/.br di static/dist.
+
+Jalankan saat deploy supaya worker tidak perlu build saat start (app tetap build
+sendiri jika manifest tidak ada atau basi).
+
+    python scripts/build_assets.py
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.assets import DIST_DIR, ENCODINGS, brotli, build_assets
+
+
+def main():
+    static_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    manifest = build_assets(static_folder)
+    dist = os.path.join(static_folder, DIST_DIR)
+    for logical, name in sorted(manifest.items()):
+        sizes = [f"{os.path.getsize(os.path.join(static_folder, logical)):,} B"]
+        for encoding, suffix in ENCODINGS:
+            path = os.path.join(dist, name + suffix)
+            if os.path.exists(path):
+                sizes.append(f"{encoding} {os.path.getsize(path):,} B")
+        print(f"📦 {logical} -> {DIST_DIR}/{name} ({', '.join(sizes)})")
+    if brotli is None:
+        print("⚠️ Paket brotli tidak terpasang, varian .br tidak dibuat")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Event study: apakah anomali broker flow memprediksi return ke depan?
+
+Menjalankan detect_broker_anomalies untuk semua ticker, menggabungkan event dengan forward
+return beberapa horizon, lalu meringkas hit rate dan excess return per severity.
+
+    python scripts/event_study.py                           # semua ENERGY_STOCKS, 5 tahun
+    python scripts/event_study.py --years 2 --horizons 1,5,20
+    python scripts/event_study.py --output event_study.csv
+    python scripts/event_study.py --simulated --years 1         # smoke test tanpa jaringan
+"""
+import os
+import sys
+import time
+import pickle
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ENERGY_STOCKS, AUTO_TRAIN_STOCKS, MODEL_DIR, MODEL_FILENAME
+from modules.anomaly_detector import SimpleAnomalyDetector
+from modules.backtest import (DEFAULT_HORIZONS, SIMULATED_LABEL, event_study, events_from_records,
+                              load_price_panel)
+from modules.data_collector import DataCollector
+
+
+def load_detector(data_collector):
+    """Model aktif dari models/, atau train cepat jika belum ada"""
+    model_path = os.path.join(MODEL_DIR, MODEL_FILENAME)
+    try:
+        with open(model_path, 'rb') as f:
+            detector = pickle.load(f)
+        if detector.is_trained:
+            return detector
+    except Exception as e:
+        print(f"⚠️ Model tidak bisa di-load ({e}), training model baru")
+    detector = SimpleAnomalyDetector()
+    detector.train([data_collector.get_broker_summary(code, '6mo') for code in AUTO_TRAIN_STOCKS])
+    return detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Event study sinyal anomali AnoPus')
+    parser.add_argument('--stocks', help='Daftar ticker dipisah koma (default: semua ENERGY_STOCKS)')
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--horizons', default=','.join(map(str, DEFAULT_HORIZONS)))
+    parser.add_argument('--simulated', action='store_true',
+                        help='Smoke test plumbing dengan harga acak (hasil tidak bermakna)')
+    parser.add_argument('--output', help='Simpan detail per event ke CSV')
+    args = parser.parse_args()
+
+    stock_codes = args.stocks.split(',') if args.stocks else list(ENERGY_STOCKS)
+    horizons = [int(h) for h in args.horizons.split(',')]
+    end = datetime.now()
+    start = end - timedelta(days=365 * args.years)
+
+    data_collector = DataCollector()
+    detector = load_detector(data_collector)
+
+    t0 = time.perf_counter()
+    records = {}
+    for stock_code in stock_codes:
+        broker_data = data_collector.get_simulated_broker_data(stock_code, start, end)
+        records[stock_code] = detector.detect_broker_anomalies(broker_data, stock_code)
+    events = events_from_records(records)
+    t1 = time.perf_counter()
+
+    prices = load_price_panel(stock_codes, start, end, data_collector, period=f"{args.years}y",
+                              simulated=args.simulated)
+    t2 = time.perf_counter()
+
+    detail, summary = event_study(events, prices, horizons)
+    t3 = time.perf_counter()
+
+    print("\n" + "=" * 60)
+    print(f"📈 Event study {len(events)} event, {len(stock_codes)} ticker, {args.years} tahun")
+    if args.simulated:
+        print(f"⚠️ {SIMULATED_LABEL}")
+    print("=" * 60)
+    with pd.option_context('display.width', 120, 'display.max_rows', None):
+        print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\n⏱️ Deteksi {t1 - t0:.2f}s, harga {t2 - t1:.2f}s, event study {(t3 - t2) * 1000:.1f} ms")
+
+    if args.output:
+        detail.to_csv(args.output, index=False)
+        print(f"💾 Detail event disimpan ke {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
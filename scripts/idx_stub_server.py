@@ -0,0 +1,106 @@
+"""Stub server lokal yang meniru endpoint IDX GetTradingInfoSS
+
+Contoh:
+    python scripts/idx_stub_server.py --port 8765 --record-dir recordings --latency-ms 50
+    ANOPUS_IDX_BASE_URL=http://127.0.0.1:8765 ANOPUS_DATA_SOURCE=replay python app.py
+"""
+import os
+import sys
+import json
+import time
+import random
+import pickle
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.simulator import simulate_price_path
+from modules.sources import IDX_TRADING_INFO_PATH, _recording_key
+
+
+def synthetic_trading_info(code, length, anchor_price=2500):
+    """Buat payload GetTradingInfoSS sintetis (terbaru di index 0, seperti IDX)"""
+    end = pd.Timestamp.now().normalize()
+    path = simulate_price_path(code, end - pd.Timedelta(days=length - 1), end, anchor_price,
+                               freq='D', volatility=0.015, wick=0.01)
+    rows = []
+    for row in path.iloc[::-1].itertuples(index=False):
+        rows.append({
+            'StockCode': code,
+            'Date': row.Date.strftime('%Y-%m-%dT00:00:00'),
+            'Open': round(float(row.Open)),
+            'High': round(float(row.High)),
+            'Low': round(float(row.Low)),
+            'Close': round(float(row.Close)),
+            'Volume': int(row.Volume) * 100,
+        })
+    return {'draw': 0, 'recordsTotal': len(rows), 'recordsFiltered': len(rows), 'data': rows}
+
+
+def make_handler(record_dir, latency_ms, error_rate):
+    class IDXStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path != IDX_TRADING_INFO_PATH:
+                self.send_error(404)
+                return
+
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            if random.random() < error_rate:
+                self.send_error(503, 'Injected error')
+                return
+
+            params = parse_qs(parsed.query)
+            code = params.get('code', [''])[0].upper()
+            length = int(params.get('length', ['100'])[0])
+
+            payload = None
+            if record_dir:
+                path = os.path.join(record_dir, _recording_key('idx', 'trading_info', (code, length)) + '.pkl')
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        payload = pickle.load(f)
+            if payload is None:
+                payload = synthetic_trading_info(code, length)
+
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return IDXStubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub server IDX GetTradingInfoSS')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--record-dir', default='recordings', help='Direktori rekaman dari RecordingSource')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port),
+                                 make_handler(args.record_dir, args.latency_ms, args.error_rate))
+    print(f"🚀 IDX stub server berjalan di http://{args.host}:{args.port}{IDX_TRADING_INFO_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stub server dihentikan")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
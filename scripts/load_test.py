@@ -0,0 +1,225 @@
+"""Load test end-to-end untuk aplikasi Flask AnoPus
+
+Jalankan aplikasi dengan upstream replay terlebih dahulu, lalu:
+    ANOPUS_DATA_SOURCE=replay python app.py
+    python scripts/load_test.py --base-url http://127.0.0.1:5000 --users 20 --duration 60
+
+Hasil disimpan ke loadtest_results/<timestamp>.json dan bisa dibandingkan dengan run sebelumnya:
+    python scripts/load_test.py --compare loadtest_results/20240101_120000.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+DEFAULT_STOCKS = ['ADRO.JK', 'PTBA.JK', 'BYAN.JK', 'ITMG.JK', 'GEMS.JK', 'MEDC.JK', 'PGAS.JK', 'INDY.JK']
+
+# Bobot skenario per simulated user (route -> bobot relatif)
+# 'dashboard' hanya shell HTML; fetch upstream, scoring dan rekomendasi ada di 'dashboard_api'
+ROUTE_WEIGHTS = {
+    'dashboard': 1,
+    'dashboard_api': 3,
+    'chart_data': 4,
+    'anomalies': 2,
+    'watchlist': 2,
+    'add_watchlist': 1,
+    'remove_watchlist': 1,
+}
+
+
+class LoadTestStats:
+    """Kumpulan latency dan status per route, thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, route, latency_s, ok):
+        with self._lock:
+            self.samples.setdefault(route, []).append((latency_s, ok))
+
+    def report(self, elapsed_s):
+        report = {}
+        for route, samples in sorted(self.samples.items()):
+            latencies = np.array([s[0] for s in samples]) * 1000
+            errors = sum(1 for s in samples if not s[1])
+            report[route] = {
+                'requests': len(samples),
+                'errors': errors,
+                'error_rate': errors / len(samples),
+                'throughput_rps': len(samples) / elapsed_s if elapsed_s > 0 else 0,
+                'p50_ms': float(np.percentile(latencies, 50)),
+                'p95_ms': float(np.percentile(latencies, 95)),
+                'p99_ms': float(np.percentile(latencies, 99)),
+                'max_ms': float(latencies.max()),
+            }
+        return report
+
+
+class SimulatedUser:
+    """Satu user: register, login, lalu menjalankan skenario dashboard/API/watchlist"""
+
+    def __init__(self, base_url, user_id, run_id, stats, stocks, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.username = f"loadtest_{run_id}_{user_id}"
+        self.stats = stats
+        self.stocks = stocks
+        self.timeout = timeout
+        self.random = random.Random(user_id)
+
+    def _request(self, route, method, path, expect_redirect=False, **kwargs):
+        """Request tercatat di stats; expect_redirect=True hanya menganggap 302/303 sukses"""
+        start = time.perf_counter()
+        ok = False
+        response = None
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout,
+                                            allow_redirects=False, **kwargs)
+            if expect_redirect:
+                ok = response.status_code in (302, 303)
+            else:
+                ok = response.status_code < 400
+        except requests.RequestException:
+            pass
+        self.stats.record(route, time.perf_counter() - start, ok)
+        return response
+
+    def login(self):
+        password = 'loadtest-password'
+        self._request('register', 'POST', '/register', data={
+            'username': self.username,
+            'email': f"{self.username}@loadtest.local",
+            'password': password,
+            'confirm_password': password,
+        })
+        # Login gagal me-render ulang form dengan 200; hanya redirect yang berarti berhasil
+        response = self._request('login', 'POST', '/login', expect_redirect=True, data={
+            'username': self.username, 'password': password
+        })
+        return response is not None and response.status_code in (302, 303)
+
+    def step(self):
+        stock = self.random.choice(self.stocks)
+        route = self.random.choices(list(ROUTE_WEIGHTS), weights=list(ROUTE_WEIGHTS.values()))[0]
+
+        period = self.random.choice(['1mo', '3mo', '6mo', '1y'])
+        if route == 'dashboard':
+            self._request(route, 'GET', f"/dashboard?stock={stock}&period={period}")
+        elif route == 'dashboard_api':
+            self._request(route, 'GET', f"/api/dashboard/{stock}?period={period}&max_points=1000")
+        elif route == 'chart_data':
+            self._request(route, 'GET', f"/api/chart_data/{stock}?max_points=1000")
+        elif route == 'anomalies':
+            self._request(route, 'GET', f"/api/anomalies/{stock}")
+        elif route == 'watchlist':
+            self._request(route, 'GET', '/watchlist')
+        elif route == 'add_watchlist':
+            self._request(route, 'POST', '/add_to_watchlist', data={'stock_code': stock})
+        elif route == 'remove_watchlist':
+            page = self._request('watchlist', 'GET', '/watchlist')
+            if page is None:
+                return
+            ids = re.findall(r'remove_from_watchlist/(\d+)', page.text)
+            if ids:
+                self._request(route, 'GET', f"/remove_from_watchlist/{self.random.choice(ids)}")
+
+    def run(self, deadline, think_time):
+        if not self.login():
+            print(f"⚠️ Login gagal untuk {self.username}")
+            return
+        while time.time() < deadline:
+            self.step()
+            if think_time:
+                time.sleep(self.random.uniform(0, think_time))
+
+
+def print_report(report, baseline=None):
+    header = f"{'route':<18}{'req':>7}{'err%':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header)
+    print('-' * len(header))
+    for route, r in report['routes'].items():
+        line = (f"{route:<18}{r['requests']:>7}{r['error_rate'] * 100:>6.1f}%{r['throughput_rps']:>8.1f}"
+                f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+        if baseline and route in baseline['routes']:
+            base = baseline['routes'][route]
+            if base['p95_ms'] > 0:
+                line += f"   p95 {((r['p95_ms'] - base['p95_ms']) / base['p95_ms']) * 100:+.1f}%"
+        print(line)
+    print(f"\nTotal: {report['total_requests']} request dalam {report['duration_s']:.1f}s "
+          f"({report['total_requests'] / report['duration_s']:.1f} rps)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test AnoPus')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--users', type=int, default=10, help='Jumlah simulated user bersamaan')
+    parser.add_argument('--duration', type=float, default=30, help='Durasi test (detik)')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Jeda acak maksimum antar request (detik)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--stocks', default=','.join(DEFAULT_STOCKS))
+    parser.add_argument('--output-dir', default='loadtest_results')
+    parser.add_argument('--compare', help='File hasil run sebelumnya untuk dibandingkan')
+    args = parser.parse_args()
+
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    stats = LoadTestStats()
+    stocks = [s.strip() for s in args.stocks.split(',') if s.strip()]
+
+    print(f"🚀 Load test {args.users} user selama {args.duration:.0f}s ke {args.base_url}")
+    start = time.time()
+    deadline = start + args.duration
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        users = [SimulatedUser(args.base_url, i, run_id, stats, stocks, args.timeout) for i in range(args.users)]
+        futures = [executor.submit(user.run, deadline, args.think_time) for user in users]
+    elapsed = time.time() - start
+
+    # Simulated user yang crash tidak boleh hilang diam-diam dari hasil
+    crashed = 0
+    for user, future in zip(users, futures):
+        try:
+            future.result()
+        except Exception as e:
+            crashed += 1
+            print(f"❌ Simulated user {user.username} crash: {e!r}")
+
+    routes = stats.report(elapsed)
+    report = {
+        'run_id': run_id,
+        'base_url': args.base_url,
+        'users': args.users,
+        'crashed_users': crashed,
+        'duration_s': elapsed,
+        'think_time_s': args.think_time,
+        'upstream': os.environ.get('ANOPUS_DATA_SOURCE', 'unknown'),
+        'total_requests': sum(r['requests'] for r in routes.values()),
+        'routes': routes,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print()
+    print_report(report, baseline)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"{run_id}.json")
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Hasil disimpan ke {output_path}")
+    return 1 if crashed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,707 @@
+console.log('[v0] Dashboard script loaded');
+
+let chart = null;
+let candlestickSeries = null;
+let lineSeries = null;
+let currentChartData = [];
+let currentChartType = 'candlestick';
+let autoRefreshInterval;
+let chartError = null;
+
+// Data halaman dari template (window.dashboardConfig di dashboard.html)
+const dashboardConfig = window.dashboardConfig;
+
+// Semua panel diisi dari satu response /api/dashboard/<kode>
+const dashboardUrl = dashboardConfig.dashboardUrl;
+const dashboardPeriod = dashboardConfig.period;
+let currentPage = dashboardConfig.page;
+
+function showInfoModal(type) {
+    console.log('[v0] showInfoModal called with type:', type);
+    
+    const modal = document.getElementById('infoModal');
+    const title = document.getElementById('modalTitle');
+    const content = document.getElementById('modalContent');
+    
+    if (!modal || !title || !content) {
+        console.error('[v0] Modal elements not found');
+        return;
+    }
+    
+    const modalData = {
+        'rsi': {
+            title: 'RSI (Relative Strength Index)',
+            content: `
+                <p><strong>RSI</strong> adalah indikator momentum yang mengukur kekuatan pergerakan harga saham dalam skala 0-100.</p>
+                
+                <h4>Cara Membaca:</h4>
+                <ul>
+                    <li><strong>RSI > 70:</strong> Overbought (Jenuh Beli) - Saham mungkin terlalu mahal, harga bisa turun</li>
+                    <li><strong>RSI 30-70:</strong> Neutral - Kondisi normal, tidak ada sinyal kuat</li>
+                    <li><strong>RSI < 30:</strong> Oversold (Jenuh Jual) - Saham mungkin terlalu murah, harga bisa naik</li>
+                </ul>
+                
+                <h4>Contoh Penggunaan:</h4>
+                <p>Jika RSI = 81 (seperti yang ditampilkan), saham dalam kondisi <strong>overbought</strong>. Ini bisa menjadi sinyal untuk berhati-hati atau consider untuk jual karena kemungkinan harga akan koreksi turun.</p>
+                
+                <h4>Tips:</h4>
+                <p>Jangan hanya mengandalkan RSI. Kombinasikan dengan indikator lain seperti Moving Average dan Volume untuk konfirmasi yang lebih baik.</p>
+            `
+        },
+        'ma': {
+            title: 'Moving Average (Rata-rata Bergerak)',
+            content: `
+                <p><strong>Moving Average</strong> adalah rata-rata harga saham dalam periode tertentu. Digunakan untuk melihat trend harga jangka pendek vs jangka panjang.</p>
+                
+                <h4>Cara Membaca:</h4>
+                <ul>
+                    <li><strong>Bullish:</strong> Harga di atas Moving Average - Trend naik, potensi beli</li>
+                    <li><strong>Bearish:</strong> Harga di bawah Moving Average - Trend turun, potensi jual</li>
+                    <li><strong>Neutral:</strong> Harga mendekati Moving Average - Tidak ada trend jelas</li>
+                </ul>
+                
+                <h4>Contoh Penggunaan:</h4>
+                <p>Jika status <strong>Bullish</strong>, artinya harga saat ini lebih tinggi dari rata-rata historis. Ini menunjukkan momentum positif dan bisa menjadi sinyal untuk hold atau beli.</p>
+                
+                <h4>Tips:</h4>
+                <p>Golden Cross (MA jangka pendek memotong ke atas MA jangka panjang) adalah sinyal bullish kuat. Death Cross (kebalikannya) adalah sinyal bearish kuat.</p>
+            `
+        },
+        'volume': {
+            title: 'Volume Perdagangan',
+            content: `
+                <p><strong>Volume</strong> menunjukkan jumlah saham yang diperdagangkan. Volume tinggi mengkonfirmasi kekuatan pergerakan harga.</p>
+                
+                <h4>Cara Membaca:</h4>
+                <ul>
+                    <li><strong>Volume Tinggi:</strong> Banyak transaksi, pergerakan harga lebih valid</li>
+                    <li><strong>Volume Normal:</strong> Transaksi biasa, tidak ada sinyal khusus</li>
+                    <li><strong>Volume Rendah:</strong> Sedikit transaksi, pergerakan harga kurang reliable</li>
+                </ul>
+                
+                <h4>Contoh Penggunaan:</h4>
+                <p>Jika harga naik dengan <strong>volume tinggi</strong>, ini konfirmasi kuat bahwa trend naik didukung banyak investor. Sebaliknya, harga naik dengan volume rendah bisa jadi trap.</p>
+                
+                <h4>Tips:</h4>
+                <p>Perhatikan spike volume yang tiba-tiba - ini bisa menunjukkan ada news penting atau institutional buying/selling yang signifikan.</p>
+            `
+        }
+    };
+    
+    const data = modalData[type];
+    if (data) {
+        title.textContent = data.title;
+        content.innerHTML = data.content;
+        modal.classList.add('show');
+        console.log('[v0] Modal shown successfully');
+    } else {
+        console.error('[v0] Unknown modal type:', type);
+    }
+}
+
+function closeInfoModal() {
+    console.log('[v0] closeInfoModal called');
+    const modal = document.getElementById('infoModal');
+    if (modal) {
+        modal.classList.remove('show');
+        console.log('[v0] Modal closed');
+    }
+}
+
+// Close modal with Escape key
+document.addEventListener('keydown', function(event) {
+    if (event.key === 'Escape') {
+        closeInfoModal();
+    }
+});
+
+
+// Update waktu secara real-time
+function updateCurrentTime() {
+    const now = new Date();
+    const options = { 
+        weekday: 'long', 
+        year: 'numeric', 
+        month: 'long', 
+        day: 'numeric',
+        hour: '2-digit',
+        minute: '2-digit',
+        second: '2-digit'
+    };
+    document.getElementById('current-time').textContent = now.toLocaleDateString('id-ID', options);
+}
+
+// Update waktu setiap detik
+setInterval(updateCurrentTime, 1000);
+updateCurrentTime();
+
+function initializeChart() {
+    console.log('[v0] Memulai inisialisasi chart...');
+    
+    const chartElement = document.getElementById('candlestick-chart');
+    const overlay = document.getElementById('chart-overlay');
+    
+    if (!chartElement) {
+        console.error('[v0] Chart element tidak ditemukan');
+        return;
+    }
+    
+    if (typeof LightweightCharts === 'undefined') {
+        console.error('[v0] LightweightCharts library tidak terload');
+        showChartError('Gagal memuat library grafik. Silakan refresh halaman.');
+        return;
+    }
+    
+    console.log('[v0] Library LightweightCharts tersedia');
+    
+    try {
+        chartElement.innerHTML = '';
+        
+        if (overlay) {
+            overlay.style.display = 'flex';
+        }
+        
+        setTimeout(() => {
+            try {
+                chart = LightweightCharts.createChart(chartElement, {
+                    width: chartElement.clientWidth,
+                    height: 400,
+                    layout: {
+                        background: { color: 'transparent' },
+                        textColor: '#94a3b8',
+                    },
+                    grid: {
+                        vertLines: { color: 'rgba(255, 255, 255, 0.1)' },
+                        horzLines: { color: 'rgba(255, 255, 255, 0.1)' },
+                    },
+                    crosshair: {
+                        mode: LightweightCharts.CrosshairMode.Normal,
+                    },
+                    rightPriceScale: {
+                        borderColor: 'rgba(255, 255, 255, 0.1)',
+                    },
+                    timeScale: {
+                        borderColor: 'rgba(255, 255, 255, 0.1)',
+                        timeVisible: true,
+                        secondsVisible: false,
+                    },
+                    handleScroll: {
+                        mouseWheel: true,
+                        pressedMouseMove: true,
+                    },
+                    handleScale: {
+                        axisPressedMouseMove: true,
+                        mouseWheel: true,
+                        pinch: true,
+                    },
+                });
+                
+                console.log('[v0] Chart berhasil dibuat');
+                
+                candlestickSeries = chart.addCandlestickSeries({
+                    upColor: '#10b981',
+                    downColor: '#ef4444',
+                    borderDownColor: '#ef4444',
+                    borderUpColor: '#10b981',
+                    wickDownColor: '#ef4444',
+                    wickUpColor: '#10b981',
+                });
+                
+                lineSeries = chart.addLineSeries({
+                    color: '#6366f1',
+                    lineWidth: 2,
+                    visible: false,
+                });
+                
+                console.log('[v0] Chart series berhasil dibuat');
+                
+                // Candle awal datang bersama panel lain dari /api/dashboard
+                if (chartError) {
+                    showChartError(chartError);
+                } else if (currentChartData.length > 0) {
+                    renderChart(currentChartData);
+                    hideChartOverlay();
+                }
+
+                setupChartControls();
+                
+                window.addEventListener('resize', () => {
+                    if (chart) {
+                        chart.applyOptions({
+                            width: chartElement.clientWidth,
+                        });
+                    }
+                });
+                
+                console.log('[v0] Chart berhasil diinisialisasi');
+                
+            } catch (error) {
+                console.error('[v0] Error dalam inisialisasi chart:', error);
+                showChartError('Terjadi kesalahan saat memuat grafik: ' + error.message);
+            }
+        }, 100);
+        
+    } catch (error) {
+        console.error('[v0] Error dalam inisialisasi chart:', error);
+        showChartError('Terjadi kesalahan saat memuat grafik: ' + error.message);
+    }
+}
+
+function loadChartDataWithTimeframe(timeframe) {
+    console.log('[v0] Loading chart data for timeframe:', timeframe);
+    const overlay = document.getElementById('chart-overlay');
+
+    if (overlay) {
+        overlay.style.display = 'flex';
+    }
+    
+    const stockCode = dashboardConfig.stockCode;
+    
+    // Batasi jumlah candle sesuai lebar chart supaya payload tetap kecil
+    const chartContainer = document.getElementById('chart-overlay');
+    const maxPoints = Math.max(200, Math.min(2000, Math.round((chartContainer && chartContainer.parentElement ? chartContainer.parentElement.clientWidth : 1000))));
+    
+    fetch(`/api/chart_data/${stockCode}?timeframe=${timeframe}&max_points=${maxPoints}`)
+        .then(response => {
+            console.log('[v0] API response status:', response.status);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('[v0] API data received:', data);
+            applyCandles(data.status === 'success' ? data.data : []);
+        })
+        .catch(error => {
+            console.error('[v0] Error fetching chart data:', error);
+            showChartError('Gagal memuat data grafik: ' + error.message);
+            hideChartOverlay();
+        });
+}
+
+function applyCandles(candles) {
+    const chartData = (candles || []).map(item => ({
+        time: Math.floor(new Date(item.x).getTime() / 1000),
+        open: item.o,
+        high: item.h,
+        low: item.l,
+        close: item.c
+    }));
+    chartData.sort((a, b) => a.time - b.time);
+    console.log('[v0] Formatted chart data:', chartData.length, 'candles');
+    
+    if (chartData.length === 0) {
+        console.error('[v0] No candle data');
+        chartError = 'Tidak ada data untuk timeframe ini.';
+        if (chart) showChartError(chartError);
+        hideChartOverlay();
+        return;
+    }
+    
+    chartError = null;
+    const latestData = chartData[chartData.length - 1];
+    updateStockInfo(latestData);
+    updateChartPrice(latestData.close);
+    
+    currentChartData = chartData;
+    if (candlestickSeries) {
+        renderChart(chartData);
+        hideChartOverlay();
+    }
+}
+
+function updateStockInfo(latestCandle) {
+    console.log('[v0] Updating stock info with latest data:', latestCandle);
+    
+    const detailItems = document.querySelectorAll('.stock-details .detail-item');
+    
+    detailItems.forEach(item => {
+        const label = item.querySelector('.label').textContent.trim();
+        const valueElement = item.querySelector('.value');
+        
+        if (label === 'Open' && latestCandle.open !== undefined) {
+            valueElement.textContent = `Rp ${latestCandle.open.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+        } else if (label === 'High' && latestCandle.high !== undefined) {
+            valueElement.textContent = `Rp ${latestCandle.high.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+        } else if (label === 'Low' && latestCandle.low !== undefined) {
+            valueElement.textContent = `Rp ${latestCandle.low.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+        }
+    });
+    
+    const currentPriceElement = document.querySelector('.stock-basic-info .current-price');
+    if (currentPriceElement && latestCandle.close !== undefined) {
+        currentPriceElement.textContent = `Rp ${latestCandle.close.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+    }
+}
+
+function renderChart(data) {
+    console.log('[v0] Rendering chart with', data.length, 'data points, type:', currentChartType);
+    
+    if (!candlestickSeries || !lineSeries) {
+        console.error('[v0] Chart series not initialized');
+        return;
+    }
+    
+    try {
+        if (currentChartType === 'candlestick') {
+            candlestickSeries.applyOptions({ visible: true });
+            lineSeries.applyOptions({ visible: false });
+            candlestickSeries.setData(data);
+        } else {
+            candlestickSeries.applyOptions({ visible: false });
+            lineSeries.applyOptions({ visible: true });
+            
+            const lineData = data.map(item => ({
+                time: item.time,
+                value: item.close
+            }));
+            lineSeries.setData(lineData);
+        }
+        
+        if (chart) {
+            chart.timeScale().fitContent();
+        }
+        console.log('[v0] Chart rendered successfully');
+        
+    } catch (error) {
+        console.error('[v0] Error rendering chart:', error);
+        showChartError('Terjadi kesalahan saat merender grafik.');
+    }
+}
+
+function hideChartOverlay() {
+    const overlay = document.getElementById('chart-overlay');
+    if (overlay) {
+        overlay.style.display = 'none';
+    }
+}
+
+function showChartError(message) {
+    const chartElement = document.getElementById('candlestick-chart');
+    const overlay = document.getElementById('chart-overlay');
+
+    if (overlay) {
+        overlay.innerHTML = '';
+        overlay.style.display = 'none'; // Hide overlay if error is shown directly in chart element
+    }
+
+    if (chartElement) {
+        chartElement.innerHTML = `
+            <div class="chart-fallback">
+                <div class="fallback-content">
+                    <i class="fas fa-exclamation-triangle"></i>
+                    <h4>Gagal Memuat Grafik</h4>
+                    <p>${message}</p>
+                    <button onclick="window.location.reload()" class="btn-apply" style="margin-top: 1rem;">
+                        <i class="fas fa-redo"></i> Coba Lagi
+                    </button>
+                </div>
+            </div>
+        `;
+    }
+}
+
+function setupChartControls() {
+    const timeframeBtns = document.querySelectorAll('.timeframe-btn');
+    const chartTypeBtns = document.querySelectorAll('.chart-type-btn');
+    
+    timeframeBtns.forEach(btn => {
+        btn.addEventListener('click', function() {
+            timeframeBtns.forEach(b => b.classList.remove('active'));
+            this.classList.add('active');
+            
+            const timeframe = this.dataset.timeframe;
+            console.log('[v0] Switching to timeframe:', timeframe);
+            
+            loadChartDataWithTimeframe(timeframe);
+        });
+    });
+    
+    chartTypeBtns.forEach(btn => {
+        btn.addEventListener('click', function() {
+            const chartType = this.dataset.type;
+            
+            if (chartType === currentChartType) return;
+            
+            chartTypeBtns.forEach(b => b.classList.remove('active'));
+            this.classList.add('active');
+            currentChartType = chartType;
+            
+            console.log('[v0] Switching to chart type:', chartType);
+            
+            if (currentChartData.length > 0) {
+                renderChart(currentChartData);
+            }
+        });
+    });
+}
+
+function updateChartPrice(price) {
+    const priceElement = document.getElementById('current-chart-price');
+    if (priceElement) {
+        priceElement.textContent = `Rp ${price.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+    }
+}
+
+function refreshRealTimeData() {
+    const stockCode = dashboardConfig.stockCode;
+    
+    fetch(`/api/realtime_price/${stockCode}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.status === 'success') {
+                updateRealTimeDisplay(data);
+                
+                if (candlestickSeries) {
+                    const chartData = candlestickSeries.data();
+                    if (chartData && chartData.length > 0) {
+                        const lastDataPoint = chartData[chartData.length - 1];
+                        const updatedClose = data.current_price;
+                        const updatedOpen = lastDataPoint.open;
+                        const updatedHigh = Math.max(updatedOpen, updatedClose, lastDataPoint.high);
+                        const updatedLow = Math.min(updatedOpen, updatedClose, lastDataPoint.low);
+                        
+                        candlestickSeries.update({
+                            time: lastDataPoint.time,
+                            open: updatedOpen,
+                            high: updatedHigh,
+                            low: updatedLow,
+                            close: updatedClose
+                        });
+                        updateChartPrice(updatedClose);
+                    } else {
+                        // If no data, add the new point as a starting point
+                        const newTime = Math.floor(new Date().getTime() / 1000);
+                        candlestickSeries.update({
+                            time: newTime,
+                            open: data.current_price,
+                            high: data.current_price,
+                            low: data.current_price,
+                            close: data.current_price
+                        });
+                        updateChartPrice(data.current_price);
+                    }
+                }
+            } else {
+                console.warn('Real-time price update failed or returned no data.');
+            }
+        })
+        .catch(error => console.error('Error refreshing real-time data:', error));
+}
+
+function updateRealTimeDisplay(data) {
+    const chartPriceElement = document.getElementById('current-chart-price');
+    if (chartPriceElement) {
+        chartPriceElement.textContent = `Rp ${data.current_price.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+    }
+
+    const stockInfoPriceElement = document.querySelector('.stock-basic-info .current-price');
+    const stockInfoPriceChangeElement = document.querySelector('.stock-basic-info .price-change');
+
+    if (stockInfoPriceElement) {
+        stockInfoPriceElement.textContent = `Rp ${data.current_price.toLocaleString('id-ID', { minimumFractionDigits: 2, maximumFractionDigits: 2 })}`;
+    }
+    if (stockInfoPriceChangeElement) {
+        stockInfoPriceChangeElement.textContent = `${data.price_change >= 0 ? '+' : ''}${data.price_change.toFixed(2)}%`;
+        stockInfoPriceChangeElement.classList.remove('positive', 'negative');
+        stockInfoPriceChangeElement.classList.add(data.price_change >= 0 ? 'positive' : 'negative');
+        
+        const icon = stockInfoPriceChangeElement.querySelector('i.fas');
+        if (icon) {
+            icon.classList.remove('fa-arrow-up', 'fa-arrow-down');
+            icon.classList.add(data.price_change >= 0 ? 'fa-arrow-up' : 'fa-arrow-down');
+        }
+    }
+    
+    const volumeElement = document.querySelector('.stock-basic-info .detail-item .value:last-child');
+    if (volumeElement) {
+        volumeElement.textContent = data.volume.toLocaleString('id-ID');
+    }
+}
+
+// Status kalender bursa IDX dari server (fase sesi, kapan harga bisa berubah lagi)
+let marketStatus = dashboardConfig.marketStatus;
+
+function startAutoRefresh() {
+    // Clear any existing timer to prevent multiple timers
+    if (autoRefreshInterval) {
+        clearTimeout(autoRefreshInterval);
+        autoRefreshInterval = null;
+    }
+    
+    // Harga, candle terakhir dan status pasar tidak dikirim lewat stream alert, jadi tetap di-poll:
+    // setiap 15 detik selama harga bergerak; di luar itu tidur sampai sesi berikutnya
+    const delay = marketStatus.prices_moving
+        ? 15000
+        : Math.min(marketStatus.seconds_until_change * 1000, 6 * 3600 * 1000);
+    
+    autoRefreshInterval = setTimeout(function() {
+        fetch('/api/market/status')
+            .then(response => response.json())
+            .then(function(result) {
+                marketStatus = result.market;
+                if (marketStatus.prices_moving) {
+                    console.log('[v0] Refreshing real-time data...');
+                    refreshRealTimeData();
+                } else {
+                    console.log('[v0] Market is closed (' + marketStatus.phase + '), skipping auto-refresh.');
+                }
+            })
+            .catch(error => console.error('[v0] Error fetching market status:', error))
+            .finally(startAutoRefresh);
+    }, Math.max(delay, 1000));
+}
+
+
+function renderPanels(panels) {
+    Object.entries(panels).forEach(([name, html]) => {
+        const container = document.getElementById(`panel-${name}`);
+        if (container) container.innerHTML = html;
+    });
+}
+
+function loadDashboard(page) {
+    // Batasi jumlah candle sesuai lebar chart supaya payload tetap kecil
+    const chartContainer = document.getElementById('chart-overlay');
+    const maxPoints = Math.max(200, Math.min(2000, Math.round((chartContainer && chartContainer.parentElement ? chartContainer.parentElement.clientWidth : 1000))));
+    const params = new URLSearchParams({ period: dashboardPeriod, page: page, max_points: maxPoints });
+    
+    return fetch(`${dashboardUrl}?${params}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            console.log('[v0] Dashboard data received:', data);
+            currentPage = data.pagination.page;
+            renderPanels(data.html);
+            applyCandles(data.candles);
+            const volumeElement = document.getElementById('current-volume');
+            if (volumeElement) volumeElement.textContent = Number(data.quote.volume || 0).toLocaleString('id-ID');
+            if (data.market) marketStatus = data.market;
+            
+            // Simpan halaman di URL supaya reload tetap di halaman yang sama
+            const url = new URL(window.location);
+            url.searchParams.set('page', currentPage);
+            window.history.replaceState(null, '', url);
+        })
+        .catch(error => {
+            console.error('[v0] Error fetching dashboard data:', error);
+            const message = `<div class="empty-state"><i class="fas fa-exclamation-triangle"></i><h3>Gagal memuat data</h3><p>${error.message}</p></div>`;
+            ['quote', 'signals', 'recommendation', 'anomalies'].forEach(name => {
+                const container = document.getElementById(`panel-${name}`);
+                if (container && container.querySelector('.panel-loading')) container.innerHTML = message;
+            });
+            applyCandles([]);
+        });
+}
+
+// Alert baru untuk saham yang sedang dibuka (push dari main.js): muat ulang panel sinyal & anomali
+document.addEventListener('anopus:alert', function(e) {
+    if (e.detail.stock_code === dashboardConfig.stockCode) {
+        console.log('[v0] Alert baru, refresh panel:', e.detail.type);
+        loadDashboard(currentPage);
+    }
+});
+
+// Backlog resume stream terpotong: muat ulang semua panel dari server
+document.addEventListener('anopus:reload', function() {
+    console.log('[v0] Banyak alert terlewat, muat ulang dashboard');
+    loadDashboard(currentPage);
+});
+
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('[v0] DOM loaded, initializing...');
+    initializeChart();
+    loadDashboard(currentPage);
+    startAutoRefresh(); // Start the auto-refresh on page load
+    refreshRealTimeData(); // Perform an initial refresh
+});
+
+
+// Add searchable stock list data
+const stocksData = dashboardConfig.stocks;
+
+// Search functionality
+const searchInput = document.getElementById('stockSearch');
+const searchResults = document.getElementById('searchResults');
+const clearSearchBtn = document.getElementById('clearSearch');
+const selectedStockInput = document.getElementById('selectedStock');
+
+searchInput.addEventListener('input', function(e) {
+    const query = e.target.value.toLowerCase().trim();
+    
+    if (query.length === 0) {
+        searchResults.style.display = 'none';
+        clearSearchBtn.style.display = 'none';
+        return;
+    }
+    
+    clearSearchBtn.style.display = 'block';
+    
+    // Filter stocks
+    const filtered = Object.entries(stocksData).filter(([code, name]) => {
+        return code.toLowerCase().includes(query) || 
+               name.toLowerCase().includes(query);
+    });
+    
+    if (filtered.length === 0) {
+        searchResults.innerHTML = '<div class="search-result-item no-results">Tidak ada hasil</div>';
+        searchResults.style.display = 'block';
+        return;
+    }
+    
+    // Display results
+    searchResults.innerHTML = filtered.map(([code, name]) => `
+        <div class="search-result-item" data-code="${code}">
+            <div class="result-code">${code}</div>
+            <div class="result-name">${name}</div>
+        </div>
+    `).join('');
+    
+    searchResults.style.display = 'block';
+    
+    // Add click handlers
+    document.querySelectorAll('.search-result-item[data-code]').forEach(item => {
+        item.addEventListener('click', function() {
+            const code = this.dataset.code;
+            const name = stocksData[code];
+            searchInput.value = `${code} - ${name}`;
+            selectedStockInput.value = code;
+            searchResults.style.display = 'none';
+            
+            // Auto submit form
+            document.getElementById('periodForm').submit();
+        });
+    });
+});
+
+clearSearchBtn.addEventListener('click', function() {
+    searchInput.value = '';
+    searchResults.style.display = 'none';
+    clearSearchBtn.style.display = 'none';
+    searchInput.focus();
+});
+
+// Close search results when clicking outside
+document.addEventListener('click', function(e) {
+    if (!e.target.closest('.search-container')) {
+        searchResults.style.display = 'none';
+    }
+});
+
+
+// --- Anomaly Table Pagination Logic ---
+
+function goToPage(page) {
+    const section = document.getElementById('panel-anomalies');
+    section.querySelectorAll('.pagination-btn').forEach(btn => btn.disabled = true);
+    loadDashboard(page);
+}
+
+function changePage(direction) {
+    goToPage(Math.max(1, currentPage + direction));
+}
@@ -0,0 +1,41 @@
+let currentSlide = 0;
+const totalSlides = 4;
+
+function updateCarousel() {
+  const track = document.getElementById("carouselTrack");
+  const dots = document.querySelectorAll("#carouselDots button");
+
+  track.style.transform = `translateX(-${currentSlide * 100}%)`;
+
+  dots.forEach((dot, index) => {
+    if (index === currentSlide) {
+      dot.classList.remove("bg-gray-600");
+      dot.classList.add("bg-primary");
+    } else {
+      dot.classList.remove("bg-primary");
+      dot.classList.add("bg-gray-600");
+    }
+  });
+}
+
+function moveCarousel(direction) {
+  currentSlide += direction;
+
+  if (currentSlide < 0) {
+    currentSlide = totalSlides - 1;
+  } else if (currentSlide >= totalSlides) {
+    currentSlide = 0;
+  }
+
+  updateCarousel();
+}
+
+function goToSlide(index) {
+  currentSlide = index;
+  updateCarousel();
+}
+
+// Auto-advance carousel every 5 seconds
+setInterval(() => {
+  moveCarousel(1);
+}, 5000);
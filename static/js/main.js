@@ -26,4 +26,58 @@ document.addEventListener("DOMContentLoaded", function () {
     password.addEventListener("change", validatePassword);
     confirmPassword.addEventListener("keyup", validatePassword);
   }
+
+  // Push alert (SSE): browser reconnect otomatis dan mengirim Last-Event-ID untuk resume
+  const alertStreamUrl = document.body.dataset.alertStream;
+  if (alertStreamUrl && window.EventSource) {
+    const alertSource = new EventSource(alertStreamUrl);
+    alertSource.addEventListener("alert", function (e) {
+      const alert = JSON.parse(e.data);
+      showAlertToast(alert);
+      // Halaman lain (mis. dashboard) bisa ikut refresh
+      document.dispatchEvent(new CustomEvent("anopus:alert", { detail: alert }));
+    });
+    // Terlalu banyak event terlewat saat koneksi putus: server tidak mengirim ulang, halaman memuat ulang datanya
+    alertSource.addEventListener("reload", function (e) {
+      const info = JSON.parse(e.data);
+      showAlertToast({
+        stock_code: "AnoPus",
+        type: "Alert terlewat",
+        severity: "MEDIUM",
+        message: `Lebih dari ${info.missed_more_than} alert terlewat saat koneksi putus. Alert lama tidak ditampilkan ulang.`,
+      });
+      document.dispatchEvent(new CustomEvent("anopus:reload", { detail: info }));
+    });
+  }
 });
+
+function showAlertToast(alert) {
+  let container = document.getElementById("alert-toasts");
+  if (!container) {
+    container = document.createElement("div");
+    container.id = "alert-toasts";
+    container.className = "fixed bottom-4 right-4 z-50 space-y-2 max-w-sm";
+    document.body.appendChild(container);
+  }
+
+  const colors = {
+    HIGH: "bg-red-500/20 border-red-500/50 text-red-200",
+    MEDIUM: "bg-yellow-500/20 border-yellow-500/50 text-yellow-200",
+    LOW: "bg-sky-500/20 border-sky-500/50 text-sky-200",
+  };
+  const toast = document.createElement("div");
+  toast.className = `px-4 py-3 rounded-lg border backdrop-blur-lg shadow-lg transition duration-300 ${colors[alert.severity] || colors.LOW}`;
+  const title = document.createElement("div");
+  title.className = "font-semibold text-sm";
+  title.textContent = `${alert.stock_code} · ${alert.type}`;
+  const message = document.createElement("div");
+  message.className = "text-sm";
+  message.textContent = alert.message;
+  toast.append(title, message);
+  container.appendChild(toast);
+
+  setTimeout(() => {
+    toast.style.opacity = "0";
+    setTimeout(() => toast.remove(), 300);
+  }, 10000);
+}
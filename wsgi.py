@@ -0,0 +1,7 @@
+"""Entry point WSGI: satu instance app per proses worker
+
+    gunicorn wsgi:app
+"""
+from app import create_app
+
+app = create_app()